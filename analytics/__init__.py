@@ -0,0 +1,3 @@
+from analytics.queries import QUERIES, PostAnalytics, read_aggregates, run_query
+
+__all__ = ["QUERIES", "PostAnalytics", "read_aggregates", "run_query"]
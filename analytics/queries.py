@@ -0,0 +1,343 @@
+"""Analyses of the stored posts and authors, run in place over their Parquet objects.
+
+The objects are scanned as Arrow datasets straight from the storage backend,
+through S3 for MinIO or from the local directories, with no download or load
+step. Only the columns a query uses are read and the date range is pushed down
+to the scan. Records are stored with string values, they are cast when read,
+and the engagement counters of posts changed since their object was written
+are taken from their latest delta.
+
+Without a date range the CLI reads the aggregates the storage workers maintain
+(see ``storage.aggregates``) when AGGREGATES_ENABLED is on, and only scans the
+objects with ``--scan``.
+
+Usage: python -m analytics.queries {top-posts,top-posts-weekly,top-authors}
+           [--since 2024-01-01] [--until 2024-02-01] [--limit 10] [--scan] [--json]
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from storage.aggregates import BaseAggregates, create_aggregates
+from storage.base_storage import BaseStorageHandler, parse_column
+
+# Counter deltas are typed, records are written by row_table as strings.
+DELTA_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("num_likes", pa.int64()),
+        ("num_comments", pa.int64()),
+        ("crawled_at", pa.timestamp("us")),
+    ]
+)
+POST_TYPES = {
+    "timestamp": pa.timestamp("us"),
+    "num_likes": pa.int64(),
+    "num_comments": pa.int64(),
+}
+POST_COLUMNS = ("id", "title", "author_id", "timestamp", "num_likes")
+COUNTERS = ("num_likes", "num_comments")
+
+
+def _string_schema(columns: Sequence[str]) -> pa.Schema:
+    return pa.schema([(column, pa.string()) for column in columns])
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _first_per_group(
+    table: pa.Table, keys: List[str], metric: str, columns: Sequence[str]
+) -> pa.Table:
+    """Row with the highest ``metric`` of each group, ties going to the lowest id."""
+    ordered = table.sort_by(
+        [(key, "ascending") for key in keys]
+        + [(metric, "descending"), ("id", "ascending")]
+    )
+    # first follows the sort order when the grouping runs on a single thread.
+    grouped = ordered.group_by(keys, use_threads=False).aggregate(
+        [(column, "first") for column in columns]
+    )
+    return grouped.rename_columns(
+        [name.removesuffix("_first") for name in grouped.column_names]
+    )
+
+
+class PostAnalytics:
+    """The analyses of the former Snowflake notebook, over the storage backend."""
+
+    def __init__(self, storage: BaseStorageHandler):
+        self.filesystem = storage.arrow_filesystem()
+
+    def posts(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        columns: Sequence[str] = POST_COLUMNS,
+    ) -> pa.Table:
+        """Posts published in ``[since, until)``, with typed columns."""
+        files = self._files("posts/")
+        dataset = ds.dataset(
+            [info.path for info in files],
+            schema=_string_schema(columns),
+            format="parquet",
+            filesystem=self.filesystem,
+        )
+        table = dataset.to_table(
+            columns=list(columns), filter=self._window(since, until)
+        )
+        for column, type in POST_TYPES.items():
+            if column in table.column_names:
+                index = table.column_names.index(column)
+                table = table.set_column(
+                    index, column, parse_column(table[column], type)
+                )
+        if since is not None:
+            table = table.filter(pc.field("timestamp") >= _naive_utc(since))
+        if until is not None:
+            table = table.filter(pc.field("timestamp") < _naive_utc(until))
+        if any(counter in table.column_names for counter in COUNTERS):
+            table = self._apply_deltas(table, files)
+        return table
+
+    def authors(self) -> pa.Table:
+        dataset = ds.dataset(
+            [info.path for info in self._files("authors/")],
+            schema=_string_schema(("id", "name")),
+            format="parquet",
+            filesystem=self.filesystem,
+        )
+        return dataset.to_table().rename_columns(["author_id", "author_name"])
+
+    def top_post_per_author(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Most liked post of each author."""
+        top = _first_per_group(
+            self.posts(since, until),
+            ["author_id"],
+            "num_likes",
+            ["id", "title", "num_likes"],
+        )
+        return self._rows(
+            top,
+            ["post_id", "title", "author_id", "author_name", "num_likes"],
+            [("num_likes", "descending"), ("author_id", "ascending")],
+        )
+
+    def top_post_per_author_weekly(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Most liked post of each author for each week, weeks starting on Monday."""
+        posts = self.posts(since, until)
+        posts = posts.filter(pc.is_valid(posts["timestamp"]))
+        posts = posts.append_column(
+            "week",
+            pc.floor_temporal(posts["timestamp"], unit="week", week_starts_monday=True),
+        )
+        top = _first_per_group(
+            posts, ["author_id", "week"], "num_likes", ["id", "title", "num_likes"]
+        )
+        return self._rows(
+            top,
+            ["post_id", "title", "author_id", "author_name", "week", "num_likes"],
+            [
+                ("week", "descending"),
+                ("num_likes", "descending"),
+                ("author_id", "ascending"),
+            ],
+        )
+
+    def top_authors(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 10,
+    ) -> List[Dict]:
+        """Authors with the most posts."""
+        posts = self.posts(since, until, columns=("id", "author_id", "timestamp"))
+        counts = posts.group_by("author_id").aggregate([("id", "count")])
+        counts = counts.rename_columns(["author_id", "post_count"])
+        return self._rows(
+            counts,
+            ["author_id", "author_name", "post_count"],
+            [("post_count", "descending"), ("author_id", "ascending")],
+            limit,
+        )
+
+    def _rows(
+        self,
+        table: pa.Table,
+        columns: List[str],
+        sort_keys: List,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        if "id" in table.column_names:
+            table = table.rename_columns(
+                ["post_id" if name == "id" else name for name in table.column_names]
+            )
+        # Like the notebook's inner join, posts of unknown authors are left out.
+        table = table.join(self.authors(), "author_id", join_type="inner")
+        table = table.sort_by(sort_keys).select(columns)
+        if limit is not None:
+            table = table.slice(0, limit)
+        return table.to_pylist()
+
+    def _files(self, prefix: str) -> List[pafs.FileInfo]:
+        selector = pafs.FileSelector(prefix, recursive=True, allow_not_found=True)
+        return [
+            info
+            for info in self.filesystem.get_file_info(selector)
+            if info.is_file and info.path.endswith(".parquet")
+        ]
+
+    def _window(
+        self, since: Optional[datetime], until: Optional[datetime]
+    ) -> Optional[ds.Expression]:
+        # Timestamps are ISO strings in their own UTC offset: the scan keeps
+        # the posts within a day of the range, comparing strings, and the
+        # range is applied exactly once they are cast.
+        timestamp = ds.field("timestamp")
+        conditions = []
+        if since is not None:
+            conditions.append(timestamp >= str(_naive_utc(since) - timedelta(days=1)))
+        if until is not None:
+            conditions.append(timestamp < str(_naive_utc(until) + timedelta(days=1)))
+        if not conditions:
+            return None
+        expression = timestamp != "None"
+        for condition in conditions:
+            expression = expression & condition
+        return expression
+
+    def _apply_deltas(self, posts: pa.Table, files: List[pafs.FileInfo]) -> pa.Table:
+        """Counters of the deltas crawled after each post object was written."""
+        delta_files = self._files("deltas/posts/")
+        if not delta_files or posts.num_rows == 0:
+            return posts
+        deltas = ds.dataset(
+            [info.path for info in delta_files],
+            schema=DELTA_SCHEMA,
+            format="parquet",
+            filesystem=self.filesystem,
+        ).to_table(filter=pc.is_in(pc.field("id"), posts["id"].combine_chunks()))
+        if deltas.num_rows == 0:
+            return posts
+        latest = (
+            deltas.sort_by([("id", "ascending"), ("crawled_at", "ascending")])
+            .group_by("id", use_threads=False)
+            .aggregate([(column, "last") for column in (*COUNTERS, "crawled_at")])
+        )
+        written = pa.table(
+            {
+                "id": [info.base_name.removesuffix(".parquet") for info in files],
+                "written_at": pa.array(
+                    [_naive_utc(info.mtime) for info in files], pa.timestamp("us")
+                ),
+            }
+        )
+        latest = latest.join(written, "id").filter(
+            pc.greater(pc.field("crawled_at_last"), pc.field("written_at"))
+        )
+        merged = posts.join(latest, "id", join_type="left outer")
+        for counter in COUNTERS:
+            if counter in posts.column_names:
+                merged = merged.set_column(
+                    merged.column_names.index(counter),
+                    counter,
+                    pc.coalesce(merged[f"{counter}_last"], merged[counter]),
+                )
+        return merged.select(posts.column_names)
+
+
+QUERIES = {
+    "top-posts": PostAnalytics.top_post_per_author,
+    "top-posts-weekly": PostAnalytics.top_post_per_author_weekly,
+    "top-authors": PostAnalytics.top_authors,
+}
+
+
+def run_query(
+    storage: BaseStorageHandler,
+    query: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[Dict]:
+    if query not in QUERIES:
+        raise ValueError(f"Unknown query: {query}")
+    analytics = PostAnalytics(storage)
+    if query == "top-authors":
+        return QUERIES[query](analytics, since, until, limit=limit or 10)
+    rows = QUERIES[query](analytics, since, until)
+    return rows[:limit] if limit else rows
+
+
+def read_aggregates(
+    aggregates: BaseAggregates, query: str, limit: Optional[int] = None
+) -> List[Dict]:
+    """Rows of a query over all posts, read from the maintained aggregates."""
+    if query not in QUERIES:
+        raise ValueError(f"Unknown query: {query}")
+    method = getattr(aggregates, QUERIES[query].__name__)
+    if query == "top-authors":
+        return method(limit=limit or 10)
+    rows = method()
+    return rows[:limit] if limit else rows
+
+
+def main():
+    from celery_tasks.base_task import create_storage
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("query", choices=QUERIES)
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument(
+        "--scan", action="store_true", help="Scan the objects, not the aggregates"
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    aggregates = None
+    if not (args.scan or args.since or args.until):
+        aggregates = create_aggregates()
+    if aggregates is not None:
+        rows = read_aggregates(aggregates, args.query, args.limit)
+    else:
+        rows = run_query(
+            create_storage(), args.query, args.since, args.until, args.limit
+        )
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, default=str))
+        return
+    if not rows:
+        print("No posts")
+        return
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in rows))
+        for column in rows[0]
+    }
+    print("  ".join(f"{column:<{width}}" for column, width in widths.items()))
+    for row in rows:
+        print(
+            "  ".join(
+                f"{str(row[column]):<{width}}" for column, width in widths.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Load test of the task chain with synthetic authors, offline.
+
+Every worker process runs the real ``crawl_author`` -> ``process_crawled_data``
+-> ``store_metadata`` / ``process_media`` chain on an in-memory broker, with a
+threads pool consuming all queues. Authors come from ``SyntheticExtractor``,
+records go to a ``LocalStorageHandler`` in a temporary directory.
+
+Reports the authors per hour, the queue wait and run time percentiles of each
+task, the queue depth over time and the peak RSS of each worker process.
+
+Usage: python -m benchmarks.load_test [--authors 200] [--workers 2] [--concurrency 4]
+           [--posts-mean 50] [--distribution lognormal] [--media-rate 0.3]
+           [--scroll-latency 0.05] [--output report.json]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Union
+
+from extractors.base_extractor import BaseExtractor
+from models.data_models import (
+    Author,
+    ExtractionBatch,
+    ExtractionResult,
+    Media,
+    Post,
+    Source,
+)
+
+SOURCE_TYPE = "synthetic"
+QUEUES = ("crawling", "processing", "storage", "media")
+SAMPLE_INTERVAL = 0.1
+
+# Shape of the synthetic authors, set by the worker process before it starts.
+PROFILE = {
+    "posts_mean": 50,
+    "distribution": "lognormal",
+    "media_rate": 0.3,
+    "scroll_latency": 0.0,
+    "batch_size": 10,
+}
+
+
+def num_posts(rng: random.Random, mean: float, distribution: str) -> int:
+    """Posts of one author, drawn around ``mean``."""
+    if distribution == "fixed":
+        return int(mean)
+    if distribution == "uniform":
+        return rng.randint(0, int(2 * mean))
+    if distribution == "lognormal":
+        # sigma=1 gives a long tail of prolific authors, mu keeps the mean.
+        if mean <= 0:
+            return 0
+        return int(rng.lognormvariate(math.log(mean) - 0.5, 1))
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+class SyntheticExtractor(BaseExtractor):
+    """Generates an author's posts and media from a seed taken from the name.
+
+    Posts come in batches of ``batch_size``, each batch costing
+    ``scroll_latency`` seconds like a browser scroll would.
+    """
+
+    def extract(self, source_config: Source) -> ExtractionResult:
+        return self.collect(self.extract_iter(source_config))
+
+    def extract_iter(
+        self, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        rng = random.Random(source_config.author)
+        author = Author(
+            id=f"t2_{source_config.author}",
+            name=source_config.author,
+            url=f"https://example.com/user/{source_config.author}",
+            publication_score=rng.randint(0, 100_000),
+            comment_score=rng.randint(0, 10_000),
+        )
+        yield author
+
+        total = num_posts(rng, PROFILE["posts_mean"], PROFILE["distribution"])
+        total = min(total, source_config.limit)
+        start = datetime(2024, 1, 1)
+        for first in range(0, total, PROFILE["batch_size"]):
+            time.sleep(PROFILE["scroll_latency"])
+            posts = []
+            medias = []
+            last = min(first + PROFILE["batch_size"], total)
+            for i in range(first, last):
+                post = Post(
+                    id=f"t3_{source_config.author}_{i}",
+                    text=" ".join(rng.choices(WORDS, k=rng.randint(5, 120))),
+                    title=" ".join(rng.choices(WORDS, k=8)),
+                    timestamp=start + timedelta(hours=i),
+                    num_likes=rng.randint(0, 5000),
+                    num_comments=rng.randint(0, 300),
+                    url=f"https://example.com/p/{source_config.author}/{i}",
+                    author_id=author.id,
+                )
+                posts.append(post)
+                if rng.random() < PROFILE["media_rate"]:
+                    medias.append(
+                        Media(
+                            id=f"{post.id}_0",
+                            post_id=post.id,
+                            original_url=f"https://example.com/media/{post.id}.jpg",
+                        )
+                    )
+            yield ExtractionBatch(posts=posts, medias=medias)
+
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog crawl post media author feed "
+    "scroll parse store queue worker latency throughput"
+).split()
+
+
+class StageRecorder:
+    """Collects per task queue waits, run times and queue depths from signals."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.published_at: Dict[str, float] = {}
+        self.started_at: Dict[str, float] = {}
+        self.waits = defaultdict(list)
+        self.runtimes = defaultdict(list)
+        self.published = defaultdict(int)
+        self.started = defaultdict(int)
+        self.finished = 0
+        self.depths: List[dict] = []
+        self.start = time.perf_counter()
+
+    def on_publish(self, sender=None, headers=None, **kwargs):
+        with self.lock:
+            self.published_at[headers["id"]] = time.perf_counter()
+            self.published[_queue(sender)] += 1
+
+    def on_prerun(self, task_id=None, task=None, **kwargs):
+        now = time.perf_counter()
+        with self.lock:
+            published = self.published_at.pop(task_id, None)
+            if published is not None:
+                self.waits[task.name].append(now - published)
+            self.started_at[task_id] = now
+            self.started[_queue(task.name)] += 1
+
+    def on_postrun(self, task_id=None, task=None, **kwargs):
+        now = time.perf_counter()
+        with self.lock:
+            self.runtimes[task.name].append(now - self.started_at.pop(task_id, now))
+            self.finished += 1
+
+    def outstanding(self) -> int:
+        with self.lock:
+            return sum(self.published.values()) - self.finished
+
+    def sample_depth(self) -> None:
+        with self.lock:
+            depth = {
+                queue: self.published[queue] - self.started[queue] for queue in QUEUES
+            }
+        depth["t"] = round(time.perf_counter() - self.start, 3)
+        self.depths.append(depth)
+
+
+def _queue(task_name: str) -> str:
+    return task_name.split(":")[0] if ":" in task_name else "celery"
+
+
+def run_worker(authors: List[str], options: dict) -> dict:
+    """Run the pipeline for the authors in this process and report on it."""
+    from celery.contrib.testing.worker import start_worker
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    from celery_app import app
+    from celery_tasks import tasks
+    from celery_tasks.base_task import StorageTask
+    from config.config import settings
+
+    PROFILE.update(options["profile"])
+    root = tempfile.mkdtemp(prefix="load-test-")
+    settings.EXTRACTORS[SOURCE_TYPE] = {
+        "class": f"{__name__}.SyntheticExtractor",
+        "enabled": True,
+    }
+    settings.STORAGE_BACKEND = "local"
+    settings.STORAGE["local"]["config"]["root"] = root
+    settings.CHANGE_INDEX["enabled"] = False
+    settings.AGGREGATES["enabled"] = False
+    StorageTask._storage = None
+    app.conf.update(
+        broker_url="memory://",
+        # The memory transport polls its queues, once a second by default.
+        broker_transport_options={"polling_interval": 0.01},
+        result_backend="cache+memory://",
+        task_ignore_result=True,
+        task_always_eager=False,
+        # The embedded worker's loop only reconsiders its prefetch limit when
+        # it times out draining events, every 2s; don't limit it at all.
+        worker_prefetch_multiplier=0,
+    )
+
+    recorder = StageRecorder()
+    before_task_publish.connect(recorder.on_publish, weak=False)
+    task_prerun.connect(recorder.on_prerun, weak=False)
+    task_postrun.connect(recorder.on_postrun, weak=False)
+
+    with start_worker(
+        app,
+        concurrency=options["concurrency"],
+        pool="threads",
+        perform_ping_check=False,
+        queues=list(QUEUES),
+        shutdown_timeout=60,
+    ):
+        started = time.perf_counter()
+        for author in authors:
+            tasks.crawl_author.delay(author, datetime(2000, 1, 1), SOURCE_TYPE)
+        # The chain is over once every task published so far has finished.
+        while True:
+            recorder.sample_depth()
+            if recorder.outstanding() == 0:
+                break
+            time.sleep(SAMPLE_INTERVAL)
+        elapsed = time.perf_counter() - started
+
+    # ru_maxrss is in kilobytes on Linux.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        "authors": len(authors),
+        "seconds": elapsed,
+        "peak_rss_bytes": peak_rss,
+        "waits": dict(recorder.waits),
+        "runtimes": dict(recorder.runtimes),
+        "queue_depth": recorder.depths,
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(values) == 1:
+        return {"p50": values[0], "p95": values[0], "p99": values[0]}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def summarize(results: List[dict]) -> dict:
+    authors = sum(result["authors"] for result in results)
+    seconds = max(result["seconds"] for result in results)
+    stages = {}
+    for kind in ("waits", "runtimes"):
+        merged = defaultdict(list)
+        for result in results:
+            for name, values in result[kind].items():
+                merged[name].extend(values)
+        for name, values in merged.items():
+            stage = stages.setdefault(name, {"tasks": len(values)})
+            stage[kind[:-1]] = percentiles(values)
+    return {
+        "authors": authors,
+        "seconds": seconds,
+        "authors_per_hour": authors / seconds * 3600 if seconds else 0.0,
+        "stages": stages,
+        "workers": [
+            {
+                "authors": result["authors"],
+                "seconds": result["seconds"],
+                "peak_rss_bytes": result["peak_rss_bytes"],
+                "max_queue_depth": {
+                    queue: max(
+                        (sample[queue] for sample in result["queue_depth"]), default=0
+                    )
+                    for queue in QUEUES
+                },
+                "queue_depth": result["queue_depth"],
+            }
+            for result in results
+        ],
+    }
+
+
+def run(num_authors: int, workers: int, options: dict) -> dict:
+    authors = [f"author{i:05d}" for i in range(num_authors)]
+    shares = [authors[i::workers] for i in range(workers)]
+    if workers == 1:
+        return summarize([run_worker(shares[0], options)])
+    # Each worker process gets its own broker, as separate worker boxes would.
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers) as pool:
+        results = pool.starmap(run_worker, [(share, options) for share in shares])
+    return summarize(results)
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['authors']} authors in {report['seconds']:.2f}s: "
+        f"{report['authors_per_hour']:.0f} authors/hour"
+    )
+    print()
+    print(
+        f"{'task':<30} {'tasks':>6}  {'wait p50/p95/p99 ms':>24}  {'run p50/p95/p99 ms':>24}"
+    )
+    for name, stage in sorted(report["stages"].items()):
+        wait = stage.get("wait", percentiles([]))
+        runtime = stage.get("runtime", percentiles([]))
+        print(
+            f"{name:<30} {stage['tasks']:>6}  " f"{_ms(wait):>24}  {_ms(runtime):>24}"
+        )
+    print()
+    for i, worker in enumerate(report["workers"]):
+        depth = ", ".join(
+            f"{queue} {value}" for queue, value in worker["max_queue_depth"].items()
+        )
+        print(
+            f"worker {i}: {worker['authors']} authors, "
+            f"peak RSS {worker['peak_rss_bytes'] / 2**20:.0f} MiB, max depth: {depth}"
+        )
+
+
+def _ms(values: Dict[str, float]) -> str:
+    return "/".join(f"{values[key] * 1000:.1f}" for key in ("p50", "p95", "p99"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--posts-mean", type=float, default=50)
+    parser.add_argument(
+        "--distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal"
+    )
+    parser.add_argument("--media-rate", type=float, default=0.3)
+    parser.add_argument("--scroll-latency", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the full report, with depth series")
+    args = parser.parse_args()
+
+    options = {
+        "concurrency": args.concurrency,
+        "profile": {
+            "posts_mean": args.posts_mean,
+            "distribution": args.distribution,
+            "media_rate": args.media_rate,
+            "scroll_latency": args.scroll_latency,
+        },
+    }
+    report = run(args.authors, args.workers, options)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Posts parsed per second for each HTML parser backend on the saved fixtures.
+
+The fixture pages are cut into the raw item fragments a crawl hands out and
+parsed with ``BrowserExtractor.parse_raw``, as the processing workers do.
+
+Usage: python -m benchmarks.parse_benchmark [--posts 300] [--repeat 3]
+"""
+
+import argparse
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from config.config import settings
+from extractors import parsing
+from extractors.linkedin_extractor import LinkedinExtractor
+from extractors.reddit_extractor import RedditExtractor
+from models.data_models import RawBatch, Source
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+FEEDS = {
+    "reddit": {
+        "fixture": "reddit_submitted.html",
+        "extractor": RedditExtractor,
+        "container": re.compile(r"(<shreddit-feed>)(.*)(</shreddit-feed>)", re.S),
+        "item": re.compile(r"<shreddit-post "),
+        "item_id": re.compile(r"t3_1kabc0"),
+    },
+    "linkedin": {
+        "fixture": "linkedin_recent_activity.html",
+        "extractor": LinkedinExtractor,
+        "container": re.compile(
+            r'(<ul class="display-flex flex-wrap">)(.*)(</ul>\s*</div>\s*</main>)', re.S
+        ),
+        "item": re.compile(r"data-urn="),
+        "item_id": re.compile(r"urn:li:activity:7"),
+    },
+}
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def build_page(feed: dict, num_posts: int) -> tuple[str, int]:
+    """Grow a fixture page by repeating its feed items with unique ids."""
+    page = load_fixture(feed["fixture"])
+    match = feed["container"].search(page)
+    items = match.group(2)
+    per_copy = len(feed["item"].findall(items))
+    copies = max(1, num_posts // per_copy)
+    body = "".join(
+        feed["item_id"].sub(lambda m: f"{m.group(0)}{i:05d}", items)
+        for i in range(copies)
+    )
+    grown = page.replace(items, body, 1)
+    return grown, copies * per_copy
+
+
+def build_fragments(extractor, page: str) -> list[str]:
+    """Outer HTML of each feed item of a page, as collected from the browser."""
+    return [str(item) for item in extractor._select_items(parsing.make_soup(page))]
+
+
+def available_backends() -> list[str]:
+    backends = []
+    for parser in parsing.SUPPORTED_PARSERS:
+        try:
+            BeautifulSoup("", parser)
+        except FeatureNotFound:
+            continue
+        backends.append(parser)
+    return backends
+
+
+def run(num_posts: int, repeat: int) -> list[dict]:
+    source = Source(
+        author="etnikhalili",
+        date_start=datetime(2000, 1, 1),
+        source_type="benchmark",
+        limit=num_posts * 2,
+    )
+    results = []
+    for name, feed in FEEDS.items():
+        page, posts_in_page = build_page(feed, num_posts)
+        extractor = feed["extractor"]()
+        raw_batch = RawBatch(items=build_fragments(extractor, page))
+        for backend in available_backends():
+            settings.HTML_PARSER = backend
+            parsing.resolve_parser.cache_clear()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(extractor.parse_raw(raw_batch, source))
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results.append(
+                {
+                    "feed": name,
+                    "backend": backend,
+                    "posts": posts_in_page,
+                    "seconds": best,
+                    "posts_per_second": posts_in_page / best,
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'feed':<10} {'backend':<12} {'posts':>6} {'seconds':>9} {'posts/s':>10}")
+    for row in run(args.posts, args.repeat):
+        print(
+            f"{row['feed']:<10} {row['backend']:<12} {row['posts']:>6} "
+            f"{row['seconds']:>9.3f} {row['posts_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""End to end extractor throughput against the replay driver, split by phase.
+
+The fixture feeds are grown to the requested number of posts and served by
+``scrapers.replay_driver.ReplayDriver``, revealing a few posts per scroll, with
+all scroll pauses set to zero. Phases:
+
+- session: driver creation, login and feed load, up to the first batch
+- scroll: scrolling and collecting the remaining raw batches
+- parse: parsing every raw batch into posts
+
+Usage: python -m benchmarks.replay_benchmark [--posts 300] [--per-scroll 25]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.parse_benchmark import FEEDS, build_page
+from config.config import settings
+from models.data_models import Source
+
+LOGIN_PAGE = """<html><body><form>
+<input id="username"><input id="password">
+<input type="checkbox" id="rememberMeOptIn-checkbox">
+</form></body></html>"""
+
+FEED_URLS = {
+    "reddit": "https://www.reddit.com/user/*",
+    "linkedin": "https://www.linkedin.com/in/*",
+}
+
+
+def build_recording(recording_dir: Path, num_posts: int, per_scroll: int) -> dict:
+    """Write a replay recording of every feed, returning the posts per feed."""
+    pages = {
+        "https://www.linkedin.com/login": {"snapshots": ["linkedin_login.html"]},
+    }
+    (recording_dir / "linkedin_login.html").write_text(LOGIN_PAGE, encoding="utf-8")
+
+    posts = {}
+    for name, feed in FEEDS.items():
+        page, posts[name] = build_page(feed, num_posts)
+        (recording_dir / f"{name}.html").write_text(page, encoding="utf-8")
+        pages[FEED_URLS[name]] = {
+            "page": f"{name}.html",
+            "item_selector": feed["extractor"].item_selector,
+            "items_per_scroll": per_scroll,
+        }
+
+    (recording_dir / "manifest.json").write_text(json.dumps({"pages": pages}))
+    return posts
+
+
+def use_replay(recording_dir: Path) -> None:
+    settings.SELENIUM_DRIVER = "replay"
+    settings.SELENIUM_REPLAY_DIR = str(recording_dir)
+    settings.SELENIUM_SCROLL_PAUSE = 0
+    settings.SELENIUM_SCROLL_TIMEOUT = 0
+    settings.SELENIUM_SETTLE_PAUSE = 0
+
+
+def measure(extractor, source: Source) -> dict:
+    start = time.perf_counter()
+    raw_batches = extractor.fetch_iter(source)
+    first = next(raw_batches)
+    session_done = time.perf_counter()
+    collected = [first, *raw_batches]
+    scroll_done = time.perf_counter()
+
+    num_posts = 0
+    for raw_batch in collected:
+        for item in extractor.parse_raw(raw_batch, source):
+            num_posts += len(getattr(item, "posts", []))
+    parse_done = time.perf_counter()
+
+    total = parse_done - start
+    return {
+        "posts": num_posts,
+        "batches": len(collected),
+        "session": session_done - start,
+        "scroll": scroll_done - session_done,
+        "parse": parse_done - scroll_done,
+        "total": total,
+        "posts_per_second": num_posts / total,
+    }
+
+
+def run(num_posts: int, per_scroll: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        recording_dir = Path(tmp)
+        build_recording(recording_dir, num_posts, per_scroll)
+        use_replay(recording_dir)
+
+        for name, feed in FEEDS.items():
+            source = Source(
+                author="etnikhalili",
+                date_start=datetime(2000, 1, 1),
+                source_type=name,
+                limit=num_posts * 2,
+            )
+            row = measure(feed["extractor"](), source)
+            row["feed"] = name
+            results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--per-scroll", type=int, default=25)
+    args = parser.parse_args()
+
+    print(
+        f"{'feed':<10} {'posts':>6} {'batches':>8} {'session':>9} {'scroll':>9} "
+        f"{'parse':>9} {'total':>9} {'posts/s':>10}"
+    )
+    for row in run(args.posts, args.per_scroll):
+        print(
+            f"{row['feed']:<10} {row['posts']:>6} {row['batches']:>8} "
+            f"{row['session']:>9.3f} {row['scroll']:>9.3f} {row['parse']:>9.3f} "
+            f"{row['total']:>9.3f} {row['posts_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Offline benchmarks of the hot paths, with JSON baselines and a regression gate.
+
+Each benchmark is a generator decorated with ``@benchmark``: it sets up its
+inputs, yields the function to time and cleans up after. Every function is
+called in a loop sized to take ~0.1s, the loop is repeated and the median
+time per call is kept. Nothing needs the network.
+
+Usage:
+    python -m benchmarks.suite run [--save benchmarks/baselines/<host>.json]
+    python -m benchmarks.suite compare BASELINE [CURRENT] [--threshold 0.2]
+
+``compare`` runs the suite when CURRENT is not given, and exits with status 1
+when a benchmark got slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+from benchmarks.parse_benchmark import load_fixture
+from models.data_models import Post
+
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+TARGET_LOOP_SECONDS = 0.1
+
+BENCHMARKS: Dict[str, Callable[[], Iterator[Callable]]] = {}
+
+
+def build_posts(num_posts: int) -> List[Post]:
+    start = datetime(2024, 1, 1)
+    return [
+        Post(
+            id=f"t3_{i:07d}",
+            text=f"Post body {i}",
+            title=f"Post title {i}",
+            timestamp=start + timedelta(minutes=i),
+            num_likes=i,
+            num_comments=i % 50,
+            url=f"https://reddit.com/r/test/comments/{i}/post_{i}/",
+            author_id="t2_author",
+        )
+        for i in range(num_posts)
+    ]
+
+
+def benchmark(func: Callable[[], Iterator[Callable]]):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _parse_posts(extractor, fixture: str, author_id: str) -> Iterator[Callable]:
+    from extractors.parsing import make_soup
+
+    items = extractor._select_items(make_soup(load_fixture(fixture)))
+
+    def parse():
+        for item in items:
+            extractor._parse_post(item, author_id)
+
+    yield parse
+
+
+@benchmark
+def reddit_parse_post() -> Iterator[Callable]:
+    from extractors.reddit_extractor import RedditExtractor
+
+    yield from _parse_posts(RedditExtractor(), "reddit_submitted.html", "t2_8x9yz")
+
+
+@benchmark
+def linkedin_parse_post() -> Iterator[Callable]:
+    from extractors.linkedin_extractor import LinkedinExtractor
+
+    yield from _parse_posts(
+        LinkedinExtractor(), "linkedin_recent_activity.html", "etnikhalili"
+    )
+
+
+@benchmark
+def http_url_format_models() -> Iterator[Callable]:
+    from formatters.http_url import HttpUrlFormatter
+
+    posts = build_posts(1000)
+    formatter = HttpUrlFormatter()
+    yield lambda: formatter.format_models(posts)
+
+
+class LocalMinio:
+    """Stand-in for the MinIO client copying uploads to a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def fput_object(self, bucket, object_name, file_path, content_type=None):
+        with open(file_path, "rb") as source:
+            self.put_object(bucket, object_name, source, -1, content_type)
+
+    def put_object(self, bucket, object_name, data, length, content_type=None):
+        path = os.path.join(self.root, bucket, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data.read())
+
+
+@benchmark
+def minio_save_parquet() -> Iterator[Callable]:
+    from storage.minio_storage import MinIOHandler
+
+    post = build_posts(1)[0].model_dump()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # _save_parquet stages the file relative to the working directory.
+        os.chdir(directory)
+        try:
+            handler = MinIOHandler.__new__(MinIOHandler)
+            handler.client = LocalMinio(os.path.join(directory, "minio"))
+            handler.buckets = {"data": "extracts-data", "media": "extracts-media"}
+            yield lambda: handler._save_parquet(
+                post, "posts/t3_0000000.parquet", handler.buckets["data"]
+            )
+        finally:
+            os.chdir(cwd)
+
+
+@benchmark
+def store_metadata_eager() -> Iterator[Callable]:
+    from celery_tasks import tasks
+    from celery_tasks.base_task import StorageTask
+    from config.config import settings
+    from formatters.http_url import HttpUrlFormatter
+    from storage.local_storage import LocalStorageHandler
+
+    formatter = HttpUrlFormatter()
+    posts = formatter.format_models(build_posts(100))
+    author = {"id": "t2_author", "name": "author"}
+    # Engagement would add a file per call, only the record writes are timed.
+    with tempfile.TemporaryDirectory() as directory, patch.object(
+        StorageTask, "_storage", LocalStorageHandler({"root": directory})
+    ), patch.dict(settings.CHANGE_INDEX, {"enabled": False}), patch.dict(
+        settings.AGGREGATES, {"enabled": False}
+    ), patch.object(
+        settings, "ENGAGEMENT_ENABLED", False
+    ):
+        yield lambda: tasks.store_metadata.apply(args=(author, posts)).get()
+
+
+def _loop_size(func: Callable) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_LOOP_SECONDS or number >= 1_000_000:
+            return number
+        number = max(number * 2, int(number * TARGET_LOOP_SECONDS / max(elapsed, 1e-9)))
+
+
+def measure(case: Callable[[], Iterator[Callable]], repeat: int) -> dict:
+    setup = case()
+    func = next(setup)
+    try:
+        number = _loop_size(func)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        setup.close()
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(pattern: Optional[str] = None, repeat: int = 5) -> dict:
+    results = {}
+    for name, case in BENCHMARKS.items():
+        if pattern and not re.search(pattern, name):
+            continue
+        results[name] = measure(case, repeat)
+    return {
+        "created": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """Benchmarks of both runs with their change, slower ones flagged."""
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median"]
+        change = result["median"] / before - 1
+        rows.append(
+            {
+                "name": name,
+                "baseline": before,
+                "current": result["median"],
+                "change": change,
+                "regressed": change > threshold,
+            }
+        )
+    return rows
+
+
+def _print_results(report: dict) -> None:
+    print(f"{'benchmark':<26} {'median us':>12} {'min us':>12} {'loops':>8}")
+    for name, result in report["results"].items():
+        print(
+            f"{name:<26} {result['median'] * 1e6:>12.1f} "
+            f"{result['min'] * 1e6:>12.1f} {result['number']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--save", help="Write the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="Compare with a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    for command in (run_parser, compare_parser):
+        command.add_argument("--filter", help="Regex selecting benchmarks by name")
+        command.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run(args.filter, args.repeat)
+        _print_results(report)
+        if args.save:
+            Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.save).write_text(json.dumps(report, indent=2) + "\n")
+            print(f"Saved results to {args.save}")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        current = run(args.filter, args.repeat)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'benchmark':<26} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['name']:<26} {row['baseline'] * 1e6:>12.1f} "
+            f"{row['current'] * 1e6:>12.1f} {row['change']:>+8.1%}{flag}"
+        )
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(
+            f"{len(regressed)} benchmark(s) slower than the baseline by more than "
+            f"{args.threshold:.0%}: {', '.join(regressed)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
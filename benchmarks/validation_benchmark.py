@@ -0,0 +1,93 @@
+"""Per record cost of building data models one by one versus in batches.
+
+Records are shaped like the dicts the storage tasks receive from the queue.
+
+Usage: python -m benchmarks.validation_benchmark [--records 10000] [--repeat 3]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from formatters.http_url import HttpUrlFormatter
+from models.data_models import Media, Post
+
+
+def build_records(num_records: int) -> dict:
+    formatter = HttpUrlFormatter()
+    start = datetime(2024, 1, 1)
+    posts = [
+        Post(
+            id=f"t3_{i:07d}",
+            text=f"Post body {i}",
+            title=f"Post title {i}",
+            timestamp=start + timedelta(minutes=i),
+            num_likes=i,
+            num_comments=i % 50,
+            url=f"https://reddit.com/r/test/comments/{i}/post_{i}/",
+            author_id="t2_author",
+        )
+        for i in range(num_records)
+    ]
+    medias = [
+        Media(
+            id=f"t3_{i:07d}_0",
+            post_id=f"t3_{i:07d}",
+            original_url=f"https://i.redd.it/{i}.jpg",
+        )
+        for i in range(num_records)
+    ]
+    # Timestamps travel as ISO strings through the JSON serializer.
+    posts_data = formatter.format_models(posts)
+    for post_data in posts_data:
+        post_data["timestamp"] = post_data["timestamp"].isoformat()
+    return {Post: posts_data, Media: formatter.format_models(medias)}
+
+
+STRATEGIES = {
+    "one by one": lambda model, data: [model(**item) for item in data],
+    "validate_many": lambda model, data: model.validate_many(data),
+    "validate_many trusted": lambda model, data: model.validate_many(
+        data, trusted=True
+    ),
+}
+
+
+def run(num_records: int, repeat: int) -> list[dict]:
+    results = []
+    for model, data in build_records(num_records).items():
+        for strategy, validate in STRATEGIES.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                validate(model, data)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results.append(
+                {
+                    "model": model.__name__,
+                    "strategy": strategy,
+                    "records": num_records,
+                    "seconds": best,
+                    "us_per_record": best / num_records * 1e6,
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'model':<6} {'strategy':<22} {'records':>8} {'seconds':>9} {'us/rec':>8}")
+    for row in run(args.records, args.repeat):
+        print(
+            f"{row['model']:<6} {row['strategy']:<22} {row['records']:>8} "
+            f"{row['seconds']:>9.3f} {row['us_per_record']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import celery_tasks.signals  # noqa: F401 (metrics and trace propagation handlers)
 from config.celery_helper import create_celery
 
 app = create_celery()
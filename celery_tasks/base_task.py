@@ -1,11 +1,40 @@
 import importlib
-from typing import Optional
+import logging
+import random
+from collections import Counter
+from typing import Callable, List, Optional
 
 from celery import Task
+from celery.exceptions import Retry
+from pydantic import BaseModel
 
 from config.config import settings
 from extractors.base_extractor import BaseExtractor
-from storage.minio_storage import MinIOHandler
+from models.data_models import Author, Post
+from storage.aggregates import BaseAggregates, create_aggregates
+from storage.base_storage import BaseStorageHandler
+from storage.change_index import BaseChangeIndex, Change, counters_row
+
+logger = logging.getLogger(__name__)
+
+GRID_DEFERRALS_HEADER = "grid_deferrals"
+
+
+def create_storage() -> BaseStorageHandler:
+    """Storage handler of the configured STORAGE_BACKEND."""
+    backend = settings.STORAGE_BACKEND
+    if backend not in settings.STORAGE:
+        raise ValueError(f"Unsupported storage backend: {backend}")
+
+    storage_config = settings.STORAGE[backend]
+    if not storage_config["enabled"]:
+        raise ValueError(f"Storage {backend} is disabled in configuration")
+
+    module_path, class_name = storage_config["class"].rsplit(".", 1)
+    module = importlib.import_module(module_path)
+    storage_class = getattr(module, class_name)
+
+    return storage_class(storage_config["config"])
 
 
 class ExtractTask(Task):
@@ -29,20 +58,178 @@ class ExtractTask(Task):
             self._extractors[source_type] = extractor_class()
         return self._extractors[source_type]
 
+    def acquire_grid_slot(self, extractor: BaseExtractor) -> None:
+        """Defer the task while the Selenium Grid has no free slot.
+
+        Only browser extractors are checked. The check is best effort: slots are
+        not reserved, so concurrent tasks may still race for the last one and
+        fall back to the regular retry when the session can't be created.
+        """
+        if not settings.SELENIUM_ADMISSION_CONTROL or not extractor.uses_browser:
+            return
+
+        from scrapers.grid import GridCapacityError, free_slots
+
+        slots = free_slots()
+        if slots is None or slots > 0:
+            return
+
+        self.defer(GridCapacityError("No free Selenium Grid slot"))
+
+    def defer(self, exc: Exception) -> None:
+        """Re-queue the task with a short countdown, without using up a retry.
+
+        Unlike ``self.retry`` the retry counter is left untouched, so waiting for
+        the grid never eats into the retries kept for real failures. Deferrals
+        are counted in a message header and capped by SELENIUM_MAX_DEFERRALS.
+        """
+        request = self.request
+        headers = dict(request.headers or {})
+        deferrals = int(headers.get(GRID_DEFERRALS_HEADER, 0))
+        if request.called_directly or deferrals >= settings.SELENIUM_MAX_DEFERRALS:
+            raise exc
+
+        # Jitter spreads deferred tasks so they don't all poll the hub at once.
+        countdown = settings.SELENIUM_DEFER_COUNTDOWN * random.uniform(1, 2)
+        headers[GRID_DEFERRALS_HEADER] = deferrals + 1
+        signature = self.signature_from_request(
+            request, countdown=countdown, headers=headers
+        )
+        logger.info(
+            f"Deferring {self.name}[{request.id}] for {countdown:.0f}s: {exc} "
+            f"(deferral {deferrals + 1}/{settings.SELENIUM_MAX_DEFERRALS})"
+        )
+        if not request.is_eager:
+            signature.apply_async()
+        raise Retry(exc=exc, when=countdown, sig=signature)
+
 
 class StorageTask(Task):
-    _storage: Optional[MinIOHandler] = None
+    _storage: Optional[BaseStorageHandler] = None
+    _change_index: Optional[BaseChangeIndex] = None
+    _aggregates: Optional[BaseAggregates] = None
 
     @property
-    def storage(self) -> MinIOHandler:
+    def storage(self) -> BaseStorageHandler:
         if self._storage is None:
-            storage_config = settings.STORAGE["minio"]
-            if not storage_config["enabled"]:
-                raise ValueError("MinIO storage is disabled in configuration")
+            self._storage = create_storage()
+        return self._storage
 
-            module_path, class_name = storage_config["class"].rsplit(".", 1)
+    @property
+    def change_index(self) -> Optional[BaseChangeIndex]:
+        index_config = settings.CHANGE_INDEX
+        if not index_config["enabled"]:
+            return None
+        if self._change_index is None:
+            module_path, class_name = index_config["class"].rsplit(".", 1)
             module = importlib.import_module(module_path)
-            storage_class = getattr(module, class_name)
+            index_class = getattr(module, class_name)
 
-            self._storage = storage_class(storage_config["config"])
-        return self._storage
+            self._change_index = index_class(index_config["config"])
+        return self._change_index
+
+    @property
+    def aggregates(self) -> Optional[BaseAggregates]:
+        if not settings.AGGREGATES["enabled"]:
+            return None
+        if self._aggregates is None:
+            self._aggregates = create_aggregates()
+        return self._aggregates
+
+    @property
+    def engagement(self):
+        # pyarrow.compute is only needed once engagement is recorded or read.
+        from storage.engagement import EngagementStore
+
+        return EngagementStore(self.storage)
+
+    def record_engagement(self, posts: List[Post]) -> None:
+        """Append a point per crawled post to the engagement time series.
+
+        Every post gets a point, unchanged counts included, so curves show when
+        engagement stalled. The series is secondary data: failures are logged
+        rather than retried, a retry would store the posts a second time.
+        """
+        if not settings.ENGAGEMENT_ENABLED or not posts:
+            return
+        try:
+            self.engagement.append(posts)
+        except Exception as e:
+            logger.warning(f"Could not record engagement of {len(posts)} posts: {e}")
+
+    def update_aggregates(
+        self, posts: List[Post], author: Optional[Author] = None
+    ) -> None:
+        """Add the stored posts and author to the aggregates.
+
+        Like the engagement series, the aggregates are secondary data: failures
+        are logged rather than retried.
+        """
+        try:
+            aggregates = self.aggregates
+            if aggregates is not None:
+                aggregates.update(posts, author)
+        except Exception as e:
+            logger.warning(f"Could not update aggregates of {len(posts)} posts: {e}")
+
+    def store_changed(
+        self, kind: str, records: List[BaseModel], store_record: Callable
+    ) -> Counter:
+        """Store the records that changed since they were last stored.
+
+        New records and records whose content changed are stored in full with
+        ``store_record``, records whose counters alone changed are written
+        together as one delta file, unchanged records are skipped. The index
+        only saves writes: when it can't be reached every record is stored.
+
+        Only the records actually written are committed to the index. When a
+        write fails the others are still committed, then the first error is
+        raised, so a retry only writes the failed records again.
+
+        Returns:
+            The number of records per kind of change
+        """
+        changes = self._detect_changes(kind, records)
+        stored = []
+        counters_only = []
+        error = None
+        for record, change in zip(records, changes):
+            if change in (Change.NEW, Change.CONTENT):
+                try:
+                    store_record(record)
+                except Exception as e:
+                    error = error or e
+                    continue
+                stored.append(record)
+            elif change is Change.COUNTERS:
+                counters_only.append(record)
+
+        if counters_only:
+            try:
+                self.storage.store_deltas(
+                    kind, [counters_row(record) for record in counters_only]
+                )
+                stored.extend(counters_only)
+            except Exception as e:
+                error = error or e
+        self._commit_changes(kind, stored)
+        if error is not None:
+            raise error
+        return Counter(changes)
+
+    def _detect_changes(self, kind: str, records: List[BaseModel]) -> List[Change]:
+        try:
+            index = self.change_index
+            if index is not None:
+                return index.changes(kind, records)
+        except Exception as e:
+            logger.warning(f"Change index unavailable, storing all {kind}: {e}")
+        return [Change.NEW] * len(records)
+
+    def _commit_changes(self, kind: str, records: List[BaseModel]) -> None:
+        try:
+            index = self.change_index
+            if index is not None:
+                index.commit(kind, records)
+        except Exception as e:
+            logger.warning(f"Could not update change index: {e}")
@@ -0,0 +1,136 @@
+"""Thin client queueing crawls by task name.
+
+The CLI and the Streamlit app only submit tasks and read their results. This
+module imports celery and the settings but none of the task code (extractors,
+Selenium, pyarrow, MinIO), so they start fast. Tasks are routed to their queue
+by the prefix of their name, as when queued from the workers.
+
+Usage:
+    result = client.crawl_author("CozyBvnnies", date_start, "reddit")
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from celery import states
+from celery.result import AsyncResult
+
+from config.celery_helper import create_celery
+from telemetry import tracing
+
+CRAWL_AUTHOR = "crawling:crawl_author"
+BACKFILL_AUTHOR = "crawling:backfill_author"
+
+app = create_celery()
+
+
+def submit(task_name: str, headers: Optional[dict] = None, **kwargs) -> AsyncResult:
+    # The workers propagate traces in a publish signal, not connected here.
+    headers = {**tracing.headers(), **(headers or {})}
+    return app.send_task(task_name, kwargs=kwargs, headers=headers or None)
+
+
+def crawl_author(
+    author_name: str,
+    date_start: datetime,
+    source_type: str,
+    limit: Optional[int] = None,
+) -> AsyncResult:
+    return submit(
+        CRAWL_AUTHOR,
+        author_name=author_name,
+        date_start=date_start,
+        source_type=source_type,
+        limit=limit,
+    )
+
+
+def backfill_author(
+    author_name: str, date_start: datetime, source_type: str
+) -> AsyncResult:
+    return submit(
+        BACKFILL_AUTHOR,
+        author_name=author_name,
+        date_start=date_start,
+        source_type=source_type,
+    )
+
+
+def task_statuses(task_ids: Iterable[str]) -> Dict[str, dict]:
+    """Status of each task, with the statuses of the tasks it queued.
+
+    Results are read with one MGET per level of the task tree (crawl,
+    processing, then storage and media), whatever the number of tasks. The
+    tasks a task queued are only known once it finished.
+
+    Returns:
+        Per task id, its ``status``, ``result`` and ``error``, and ``children``:
+        the number of tasks it queued, directly or not, per status
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    metas = {}
+    level = task_ids
+    while level:
+        metas.update(_task_metas(level))
+        children = (
+            child_id for task_id in level for child_id in _child_ids(metas[task_id])
+        )
+        level = [
+            child_id for child_id in dict.fromkeys(children) if child_id not in metas
+        ]
+
+    statuses = {}
+    for task_id in task_ids:
+        meta = metas[task_id]
+        children = Counter()
+        seen = set()
+        pending = _child_ids(meta)
+        while pending:
+            child_id = pending.pop()
+            if child_id in seen:
+                continue
+            seen.add(child_id)
+            children[metas[child_id]["status"]] += 1
+            pending.extend(_child_ids(metas[child_id]))
+        failed = meta["status"] == states.FAILURE
+        statuses[task_id] = {
+            "status": meta["status"],
+            "result": None if failed else meta.get("result"),
+            "error": str(meta.get("traceback")) if failed else None,
+            "children": dict(children),
+        }
+    return statuses
+
+
+def _task_metas(task_ids: List[str]) -> Dict[str, dict]:
+    backend = app.backend
+    if not hasattr(backend, "mget"):
+        return {task_id: backend.get_task_meta(task_id) for task_id in task_ids}
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    values = backend.mget(keys)
+    if hasattr(values, "get"):
+        # The cache backend maps keys to values, Redis returns them in order.
+        values = [values.get(key) for key in keys]
+    return {
+        task_id: (
+            backend.decode_result(value)
+            if value
+            else {"status": states.PENDING, "result": None, "children": []}
+        )
+        for task_id, value in zip(task_ids, values)
+    }
+
+
+def _child_ids(meta: dict) -> List[str]:
+    return list(_result_ids(meta.get("children") or []))
+
+
+def _result_ids(results: list) -> Iterable[str]:
+    # Results are serialized as ((id, parent), None), groups and chords as
+    # ((id, parent), [member results]).
+    for (result_id, _), members in results:
+        if members is None:
+            yield result_id
+        else:
+            yield from _result_ids(members)
@@ -0,0 +1,170 @@
+"""Opt-in profiling of task runs.
+
+Tasks decorated with ``profiled`` are profiled when their message carries a
+truthy ``profile`` header, or for a PROFILING_SAMPLE_RATE share of their runs
+when PROFILING_ENABLED is set. A run writes to the storage backend, under
+``profiles/<task id>``:
+
+- ``.prof``: cProfile stats, for ``pstats``, snakeviz or tuna, or
+  ``.speedscope.json`` with the sampling profiler (pyinstrument, if installed)
+- ``.tracemalloc``: allocations snapshot, for ``tracemalloc.Snapshot.load``
+- ``.txt``: the top functions and allocation sites
+
+Usage:
+    crawl_author.apply_async(args, headers={"profile": True})
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, Optional
+
+from celery import Task
+
+from celery_tasks.base_task import create_storage
+from config.config import settings
+from storage.base_storage import BaseStorageHandler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "profile"
+
+_storage: Optional[BaseStorageHandler] = None
+# Set while a run is profiled; tasks run eagerly inside it aren't profiled apart.
+_profiling = threading.local()
+
+
+def should_profile(task: Task) -> bool:
+    request = task.request
+    header = getattr(request, PROFILE_HEADER, None)
+    if header is None:
+        header = (getattr(request, "headers", None) or {}).get(PROFILE_HEADER)
+    if header is not None:
+        return str(header).lower() in ("1", "true", "yes")
+    return (
+        settings.PROFILING_ENABLED and random.random() < settings.PROFILING_SAMPLE_RATE
+    )
+
+
+def _sampling_profiler():
+    if settings.PROFILING_PROFILER != "sampling":
+        return None
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.warning("pyinstrument is not installed, profiling with cProfile")
+        return None
+    return Profiler(interval=0.001)
+
+
+class TaskProfile:
+    """Profiles the code run in its ``with`` block and collects the artifacts."""
+
+    def __init__(self, task_name: str):
+        self.task_name = task_name
+        self.artifacts: Dict[str, bytes] = {}
+
+    def __enter__(self):
+        self._sampler = _sampling_profiler()
+        self._profile = None if self._sampler else cProfile.Profile()
+        # Don't restart tracemalloc when something else already traces.
+        tracing = tracemalloc.is_tracing()
+        self._tracemalloc = settings.PROFILING_TRACEMALLOC and not tracing
+        if self._tracemalloc:
+            tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        self._start = time.perf_counter()
+        if self._sampler:
+            self._sampler.start()
+        else:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._sampler:
+            self._sampler.stop()
+        else:
+            self._profile.disable()
+        elapsed = time.perf_counter() - self._start
+
+        summary = io.StringIO()
+        summary.write(f"{self.task_name}: {elapsed:.3f}s\n\n")
+        if self._sampler:
+            from pyinstrument.renderers import SpeedscopeRenderer
+
+            self.artifacts[".speedscope.json"] = self._sampler.output(
+                SpeedscopeRenderer()
+            ).encode("utf-8")
+            summary.write(self._sampler.output_text())
+        else:
+            self._profile.create_stats()
+            self.artifacts[".prof"] = marshal.dumps(self._profile.stats)
+            stats = pstats.Stats(self._profile, stream=summary)
+            stats.sort_stats("cumulative").print_stats(30)
+
+        if self._tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.artifacts[".tracemalloc"] = _snapshot_bytes(snapshot)
+            summary.write("\nTop allocations:\n")
+            for stat in snapshot.statistics("lineno")[:20]:
+                summary.write(f"{stat}\n")
+
+        self.artifacts[".txt"] = summary.getvalue().encode("utf-8")
+        return False
+
+
+def _snapshot_bytes(snapshot: tracemalloc.Snapshot) -> bytes:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot")
+        snapshot.dump(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def _profile_storage(task: Task) -> BaseStorageHandler:
+    global _storage
+    if hasattr(task, "storage"):
+        return task.storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+def save_profile(task: Task, profile: TaskProfile) -> None:
+    try:
+        storage = _profile_storage(task)
+        task_id = task.request.id or uuid.uuid4().hex
+        for suffix, data in profile.artifacts.items():
+            storage.put_bytes(f"profiles/{task_id}{suffix}", data)
+        logger.info(f"Saved profile of {task.name}[{task_id}] to profiles/")
+    except Exception as e:
+        logger.warning(f"Could not save profile of {task.name}: {e}")
+
+
+def profiled(func: Callable) -> Callable:
+    """Profile runs of a bound task on demand, see the module docstring."""
+
+    @functools.wraps(func)
+    def wrapper(task: Task, *args, **kwargs):
+        if getattr(_profiling, "active", False) or not should_profile(task):
+            return func(task, *args, **kwargs)
+        profile = TaskProfile(task.name)
+        _profiling.active = True
+        try:
+            with profile:
+                return func(task, *args, **kwargs)
+        finally:
+            _profiling.active = False
+            save_profile(task, profile)
+
+    return wrapper
@@ -0,0 +1,158 @@
+import inspect
+import logging
+import time
+from typing import Optional
+
+import redis
+from billiard.process import current_process
+from celery import current_app
+from celery.concurrency import prefork
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_init,
+    worker_ready,
+)
+
+from celery_tasks import warmup
+from config.config import settings
+from scrapers.grid import GridCapacityError
+from telemetry import metrics, tracing
+from telemetry.server import start_http_server
+from telemetry.task_stats import task_stats
+
+logger = logging.getLogger(__name__)
+
+_task_starts = {}
+_task_spans = {}
+
+
+@worker_ready.connect
+def expose_main_process_metrics(sender=None, **kwargs):
+    # With the solo and threads pools tasks run in the main process.
+    if metrics.enabled():
+        start_http_server(settings.METRICS_PORT)
+
+
+@worker_process_init.connect
+def expose_child_process_metrics(**kwargs):
+    """Each prefork child serves its own metrics on METRICS_PORT + index + 1."""
+    if metrics.enabled():
+        index = getattr(current_process(), "index", 0) or 0
+        start_http_server(settings.METRICS_PORT + index + 1)
+
+
+@worker_process_init.connect
+def warm_up_child_process(sender=None, **kwargs):
+    if settings.WORKER_WARMUP:
+        app = current_app._get_current_object()
+        warmup.warm_up(app, warmup.consumed_queues(app))
+
+
+@worker_ready.connect
+def warm_up_main_process(sender=None, **kwargs):
+    # Prefork children warm up themselves, the other pools run tasks in here.
+    if settings.WORKER_WARMUP and not isinstance(sender.pool, prefork.TaskPool):
+        warmup.warm_up(sender.app, warmup.consumed_queues(sender.app))
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    if metrics.enabled():
+        _task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_time(task_id=None, task=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is not None:
+        metrics.TASK_SECONDS.observe(
+            time.perf_counter() - start, task=task.name, state=state or ""
+        )
+
+
+@task_postrun.connect
+def count_finished_task(task=None, state=None, **kwargs):
+    stats = task_stats()
+    request = task.request
+    if stats is None or request.is_eager or ":" not in task.name:
+        return
+    queue = task.name.split(":")[0]
+    try:
+        stats.record(queue, task_source(task, request) or "", state or "")
+    except redis.RedisError as e:
+        logger.warning(f"Could not count task {task.name}: {e}")
+
+
+@before_task_publish.connect
+def propagate_trace(headers=None, **kwargs):
+    if headers is not None and tracing.active():
+        for key, value in tracing.headers().items():
+            headers.setdefault(key, value)
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    if not tracing.enabled():
+        return
+    request = task.request
+    span = tracing.continue_trace(
+        f"task:{task.name}",
+        _request_header(request, tracing.TRACE_HEADER),
+        _request_header(request, tracing.PARENT_HEADER),
+        task_id=task_id,
+        retries=request.retries or 0,
+    )
+    if span is not None:
+        _task_spans[task_id] = span.__enter__()
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **kwargs):
+    span = _task_spans.pop(task_id, None)
+    if span is None:
+        return
+    span.set_attribute("state", state or "")
+    if state == "FAILURE":
+        span.status = "error"
+    span.__exit__(None, None, None)
+    tracing.flush()
+
+
+def _request_header(request, key: str) -> Optional[str]:
+    value = getattr(request, key, None)
+    if value is None:
+        value = (getattr(request, "headers", None) or {}).get(key)
+    return value
+
+
+@task_retry.connect
+def count_retry(sender=None, request=None, reason=None, **kwargs):
+    if not metrics.enabled():
+        return
+    source = task_source(sender, request) or ""
+    # ExtractTask.defer re-queues through a Retry too, without using up a retry.
+    if isinstance(getattr(reason, "exc", None), GridCapacityError):
+        metrics.DEFERRALS.inc(task=sender.name, source=source)
+    else:
+        metrics.RETRIES.inc(task=sender.name, source=source)
+
+
+def task_source(task, request) -> Optional[str]:
+    """Source type a task runs for, read from its arguments."""
+    try:
+        arguments = (
+            inspect.signature(task.run)
+            .bind_partial(*(request.args or ()), **(request.kwargs or {}))
+            .arguments
+        )
+    except (TypeError, ValueError):
+        return None
+    if "source_type" in arguments:
+        return arguments["source_type"]
+    source_data = arguments.get("source_data")
+    if isinstance(source_data, dict):
+        return source_data.get("source_type")
+    return None
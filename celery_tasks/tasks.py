@@ -1,80 +1,440 @@
 import logging
-from datetime import datetime
-from typing import List, Optional
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from celery import shared_task
+from celery import chord, shared_task
+from celery.exceptions import Retry
 
 from celery_tasks.base_task import ExtractTask, StorageTask
+from celery_tasks.profiling import profiled
+from config.config import settings
+from extractors.base_extractor import SliceCursorError
 from formatters.http_url import HttpUrlFormatter
-from models.data_models import Author, ExtractionResult, Media, Post, Source
+from models.data_models import (
+    Author,
+    ExtractionBatch,
+    Media,
+    Post,
+    RawBatch,
+    Source,
+)
+from telemetry import metrics, stage
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, base=ExtractTask, name="crawling:crawl_author")
+@profiled
 def crawl_author(
-    self, author_name: str, date_start: datetime, source_type: str
+    self,
+    author_name: str,
+    date_start: datetime,
+    source_type: str,
+    limit: Optional[int] = None,
 ) -> Optional[str]:
+    """Crawl an author and queue the posts for processing as they are scrolled.
+
+    At most ``limit`` posts are listed, CRAWL_LIMIT by default. Limits above
+    DEEP_CRAWL_MIN_POSTS make browser extractors crawl deep.
+
+    Returns:
+        The author id, or None when no post was found. With OFFLOAD_PARSING the
+        id is only known once the raw posts are parsed, None is returned then
+    """
     try:
         logger.info(f"Starting crawl for author: {author_name} from date: {date_start}")
         source_config = Source(
             author=author_name,
             date_start=date_start,
             source_type=source_type,
-            limit=100,
+            limit=limit or settings.CRAWL_LIMIT,
         )
 
         extractor = self.get_extractor(source_type)
-        result: ExtractionResult = extractor.extract(source_config)
+        self.acquire_grid_slot(extractor)
+        if settings.OFFLOAD_PARSING and extractor.supports_raw_fetch:
+            pairs = (
+                (source_config, raw) for raw in extractor.fetch_iter(source_config)
+            )
+            return _dispatch_raw(pairs)[author_name]
+        pairs = (
+            (source_config, item) for item in extractor.extract_iter(source_config)
+        )
+        return _dispatch_parsed(pairs)[author_name]
 
-        if result.author and result.posts:
-            logger.info(f"Successfully extracted data for author: {author_name}")
-            formatter = HttpUrlFormatter()
-            author_dict = formatter.format_model(result.author)
-            posts_dict = formatter.format_models(result.posts)
-            medias_dict = formatter.format_models(result.medias)
+    except Retry:
+        raise
+    except Exception as e:
+        logger.error(f"Error crawling author {author_name}: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
 
-            process_crawled_data.delay(author_dict, posts_dict, medias_dict)
-            return result.author.id
 
+@shared_task(bind=True, base=ExtractTask, name="crawling:crawl_authors")
+@profiled
+def crawl_authors(
+    self,
+    author_names: List[str],
+    date_start: datetime,
+    source_type: str,
+    limit: Optional[int] = None,
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """Crawl several authors in one extractor session.
+
+    Authors the session had to skip after an error are crawled again on their
+    own by crawl_author tasks, with its retries.
+
+    Returns:
+        ``authors``, the id of each crawled author as returned by crawl_author,
+        and ``requeued``, the crawl_author task id of each skipped author
+    """
+    try:
+        logger.info(
+            f"Starting crawl for {len(author_names)} authors from date: {date_start}"
+        )
+        source_configs = [
+            Source(
+                author=author_name,
+                date_start=date_start,
+                source_type=source_type,
+                limit=limit or settings.CRAWL_LIMIT,
+            )
+            for author_name in author_names
+        ]
+
+        # Browser extractors drive all authors in one session, one tab each.
+        extractor = self.get_extractor(source_type)
+        self.acquire_grid_slot(extractor)
+        skipped = []
+        if settings.OFFLOAD_PARSING and extractor.supports_raw_fetch:
+            pairs = extractor.fetch_many_iter(source_configs)
+            results = _dispatch_raw(_without_skipped(pairs, skipped))
+        else:
+            pairs = extractor.extract_many_iter(source_configs)
+            results = _dispatch_parsed(_without_skipped(pairs, skipped))
+
+        requeued = {
+            author_name: crawl_author.delay(
+                author_name, date_start, source_type, limit
+            ).id
+            for author_name in dict.fromkeys(skipped)
+        }
+        if requeued:
+            logger.warning(f"Requeued skipped authors: {list(requeued)}")
+        return {
+            "authors": {
+                author_name: results[author_name]
+                for author_name in author_names
+                if author_name not in requeued
+            },
+            "requeued": requeued,
+        }
+
+    except Retry:
+        raise
+    except Exception as e:
+        logger.error(f"Error crawling authors {author_names}: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, base=ExtractTask, name="crawling:backfill_author")
+def backfill_author(
+    self,
+    author_name: str,
+    date_start: datetime,
+    source_type: str,
+    num_slices: Optional[int] = None,
+) -> Optional[str]:
+    """Crawl ``[date_start, now)`` as time slices running on separate workers.
+
+    Each slice is crawled by ``crawl_slice``, which queues its posts for
+    processing, and ``finish_backfill`` reports once all are done. Extractors
+    that can't start a listing at a date crawl the whole range as one slice,
+    with the post limit of all the slices together.
+
+    Returns:
+        The id of the chord result
+    """
+    try:
+        source_config = Source(
+            author=author_name, date_start=date_start, source_type=source_type
+        )
+        num_slices = num_slices or settings.BACKFILL_SLICES
+        limit = settings.BACKFILL_SLICE_LIMIT
+        extractor = self.get_extractor(source_type)
+        date_end = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        if not extractor.supports_time_slices or num_slices <= 1:
+            logger.info(f"Backfilling {author_name} in a single crawl")
+            slices = [(source_config.date_start, date_end)]
+            limit *= max(num_slices, 1)
+        else:
+            slices = _time_slices(source_config.date_start, date_end, num_slices)
+            logger.info(
+                f"Backfilling {author_name} from {source_config.date_start} "
+                f"in {len(slices)} slices"
+            )
+        result = chord(
+            crawl_slice.s(author_name, start, end, source_type, limit)
+            for start, end in slices
+        )(finish_backfill.s(author_name))
+        return result.id
+
+    except Exception as e:
+        logger.error(f"Error backfilling author {author_name}: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, base=ExtractTask, name="crawling:crawl_slice")
+@profiled
+def crawl_slice(
+    self,
+    author_name: str,
+    date_start: datetime,
+    date_end: datetime,
+    source_type: str,
+    limit: Optional[int] = None,
+) -> Optional[str]:
+    """Crawl one time slice of a backfill, queueing the posts as they are listed.
+
+    Slices are half-open, ``[date_start, date_end)``: a post created on the
+    boundary of two slices is only listed by the newer one. A slice whose
+    cursor lists nothing fails, listing it from the newest post instead would
+    repeat the work of every newer slice.
+
+    Returns:
+        The author id, or None when the slice has no post
+    """
+    try:
+        source_config = Source(
+            author=author_name,
+            date_start=date_start,
+            date_end=date_end,
+            source_type=source_type,
+            limit=limit or settings.BACKFILL_SLICE_LIMIT,
+        )
+        logger.info(
+            f"Crawling slice {source_config.date_start} - {source_config.date_end} "
+            f"for author: {author_name}"
+        )
+
+        extractor = self.get_extractor(source_type)
+        self.acquire_grid_slot(extractor)
+        if extractor.supports_time_slices:
+            try:
+                source_config.cursor = extractor.slice_cursor(source_config.date_end)
+            except Exception as e:
+                # Listing from the newest post gives the same posts, only slower.
+                logger.warning(f"No listing cursor for {source_config.date_end}: {e}")
+
+        author_id = _crawl_slice_pairs(extractor, source_config)
+        if author_id is None:
+            _check_listing_reach(extractor, source_config)
+        return author_id
+
+    except Retry:
+        raise
+    except SliceCursorError as e:
+        # A retry would get the same empty listing.
+        logger.error(f"Slice of author {author_name} failed: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error crawling slice of author {author_name}: {str(e)}", exc_info=True
+        )
+        self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, name="processing:finish_backfill")
+def finish_backfill(
+    self, slice_results: List[Optional[str]], author_name: str
+) -> Optional[str]:
+    """Report a backfill once all its slices are done.
+
+    Returns:
+        The author id, None when no slice found a post
+    """
+    author_id = next((result for result in slice_results if result), None)
+    empty = sum(result is None for result in slice_results)
+    if author_id is None:
         logger.warning(f"No data found for author: {author_name}")
-        return None
+    else:
+        logger.info(
+            f"Backfilled author: {author_name} from {len(slice_results)} slices, "
+            f"{empty} of them empty"
+        )
+    return author_id
+
+
+def _crawl_slice_pairs(extractor, source_config: Source) -> Optional[str]:
+    pairs = ((source_config, item) for item in extractor.extract_iter(source_config))
+    return _dispatch_parsed(pairs)[source_config.author]
+
 
+def _check_listing_reach(extractor, source_config: Source) -> None:
+    try:
+        reach = extractor.listing_reach(source_config.author)
     except Exception as e:
-        logger.error(f"Error crawling author {author_name}: {str(e)}", exc_info=True)
+        logger.warning(f"Could not read the listing reach: {e}")
+        return
+    if reach is not None and source_config.date_start < reach:
+        logger.error(
+            f"Slice {source_config.date_start} - {source_config.date_end} of "
+            f"{source_config.author} is empty, posts older than {reach} are beyond "
+            f"the reach of the author's listing and could not be crawled"
+        )
+
+
+def _time_slices(
+    date_start: datetime, date_end: datetime, num_slices: int
+) -> List[Tuple[datetime, datetime]]:
+    """Split ``[date_start, date_end]`` into slices of equal length, oldest first."""
+    step = (date_end - date_start) / num_slices
+    bounds = [date_start + step * i for i in range(num_slices)] + [date_end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _without_skipped(
+    pairs: Iterable[Tuple[Source, Optional[Union[Author, ExtractionBatch, RawBatch]]]],
+    skipped: List[str],
+) -> Iterator[Tuple[Source, Union[Author, ExtractionBatch, RawBatch]]]:
+    """Pass the pairs through, recording in ``skipped`` the authors yielded None."""
+    for source_config, item in pairs:
+        if item is None:
+            skipped.append(source_config.author)
+        else:
+            yield source_config, item
+
+
+def _dispatch_parsed(
+    pairs: Iterable[Tuple[Source, Union[Author, ExtractionBatch]]],
+) -> Dict[str, Optional[str]]:
+    formatter = HttpUrlFormatter()
+    authors = {}
+    num_posts = defaultdict(int)
+
+    # Batches are dispatched while the extractor keeps scrolling; the author
+    # travels with the first batch only.
+    for source_config, item in pairs:
+        name = source_config.author
+        if isinstance(item, Author):
+            authors[name] = item
+            continue
+        if not item.posts:
+            continue
+
+        with stage("format", source_config.source_type):
+            author_dict = None
+            if num_posts[name] == 0:
+                author_dict = formatter.format_model(authors[name])
+            posts_dict = formatter.format_models(item.posts)
+            medias_dict = formatter.format_models(item.medias)
+        process_crawled_data.delay(author_dict, posts_dict, medias_dict)
+        num_posts[name] += len(item.posts)
+
+    results = defaultdict(lambda: None)
+    for name, author in authors.items():
+        if num_posts[name]:
+            logger.info(
+                f"Successfully extracted {num_posts[name]} posts for author: {name}"
+            )
+            results[name] = author.id
+        else:
+            logger.warning(f"No data found for author: {name}")
+    return results
+
+
+def _dispatch_raw(
+    pairs: Iterable[Tuple[Source, RawBatch]],
+) -> Dict[str, Optional[str]]:
+    num_items = defaultdict(int)
+
+    # The browser only collects raw HTML; parsing runs on the processing queue so
+    # the grid session is released as soon as scrolling is over.
+    for source_config, raw_batch in pairs:
+        parse_raw_batch.delay(
+            raw_batch.model_dump(), source_config.model_dump(mode="json")
+        )
+        num_items[source_config.author] += len(raw_batch.items)
+
+    for name, count in num_items.items():
+        if count:
+            logger.info(f"Queued {count} raw posts for parsing for author: {name}")
+        else:
+            logger.warning(f"No data found for author: {name}")
+    # The author ids are only known once the batches have been parsed.
+    return defaultdict(lambda: None)
+
+
+@shared_task(bind=True, base=ExtractTask, name="processing:parse_raw_batch")
+@profiled
+def parse_raw_batch(self, raw_data: dict, source_data: dict):
+    try:
+        source_config = Source(**source_data)
+        raw_batch = RawBatch(**raw_data)
+        logger.info(
+            f"Parsing {len(raw_batch.items)} raw posts for author: {source_config.author}"
+        )
+        extractor = self.get_extractor(source_config.source_type)
+
+        formatter = HttpUrlFormatter()
+        author_dict = None
+        posts_dict = []
+        medias_dict = []
+        for item in extractor.parse_raw(raw_batch, source_config):
+            with stage("format", source_config.source_type):
+                if isinstance(item, Author):
+                    author_dict = formatter.format_model(item)
+                else:
+                    posts_dict.extend(formatter.format_models(item.posts))
+                    medias_dict.extend(formatter.format_models(item.medias))
+
+        if author_dict is not None or posts_dict:
+            process_crawled_data.delay(author_dict, posts_dict, medias_dict)
+    except Exception as e:
+        logger.error(f"Error parsing raw batch: {str(e)}", exc_info=True)
         self.retry(exc=e, countdown=60)
 
 
 @shared_task(bind=True, name="processing:process_crawled_data")
 def process_crawled_data(
-    self, author_data: dict, posts_data: List[dict], medias_data: List[dict]
+    self,
+    author_data: Optional[dict],
+    posts_data: List[dict],
+    medias_data: List[dict],
 ):
+    author_id = _author_id(author_data, posts_data)
     try:
-        logger.info(f"Processing Reddit data for author: {author_data.get('id')}")
+        logger.info(f"Processing Reddit data for author: {author_id}")
         store_metadata.delay(author_data, posts_data)
         for media in medias_data:
             process_media.delay(media)
-        logger.info(
-            f"Successfully queued processing for author: {author_data.get('id')}"
-        )
+        logger.info(f"Successfully queued processing for author: {author_id}")
     except Exception as e:
         logger.error(f"Error processing Reddit data: {str(e)}", exc_info=True)
         self.retry(exc=e, countdown=60)
 
 
 @shared_task(bind=True, base=StorageTask, name="storage:store_metadata")
-def store_metadata(self, author_data: dict, posts_data: List[dict]):
+@profiled
+def store_metadata(self, author_data: Optional[dict], posts_data: List[dict]):
     try:
-        logger.info(f"Storing metadata for author: {author_data.get('id')}")
-        author = Author(**author_data)
-        posts = [Post(**post_data) for post_data in posts_data]
+        logger.info(
+            f"Storing metadata for author: {_author_id(author_data, posts_data)}"
+        )
+        trusted = settings.TRUSTED_VALIDATION
+        posts = Post.validate_many(posts_data, trusted=trusted)
+        metrics.POSTS_PROCESSED.inc(len(posts))
 
-        self.storage.store_author(author)
-        logger.info(f"Stored author data: {author.id}")
+        author = None
+        if author_data is not None:
+            author = Author.validate_one(author_data, trusted=trusted)
+            changes = self.store_changed("authors", [author], self.storage.store_author)
+            logger.info(f"Author {author.id}: {_changes_summary(changes)}")
 
-        for post in posts:
-            self.storage.store_post(post)
-            logger.debug(f"Stored post: {post.id}")
+        changes = self.store_changed("posts", posts, self.storage.store_post)
+        logger.info(f"Posts: {_changes_summary(changes)}")
+        self.record_engagement(posts)
+        self.update_aggregates(posts, author)
 
     except Exception as e:
         logger.error(f"Error storing metadata: {str(e)}", exc_info=True)
@@ -82,12 +442,86 @@ def store_metadata(self, author_data: dict, posts_data: List[dict]):
 
 
 @shared_task(bind=True, base=StorageTask, name="media:process_media")
+@profiled
 def process_media(self, media_data: dict):
     try:
         logger.info(f"Processing media: {media_data.get('id')}")
-        media = Media(**media_data)
+        media = Media.validate_one(media_data, trusted=settings.TRUSTED_VALIDATION)
         self.storage.store_media(media)
+        metrics.MEDIA_PROCESSED.inc()
         logger.info(f"Successfully stored media: {media.id}")
     except Exception as e:
         logger.error(f"Error processing media: {str(e)}", exc_info=True)
         self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, base=StorageTask, name="storage:load_warehouse")
+def load_warehouse(self, sources: Optional[List[str]] = None) -> Dict[str, int]:
+    from loaders import Loader, create_target
+
+    try:
+        target = create_target()
+        try:
+            loader = Loader(
+                self.storage,
+                target,
+                workers=settings.LOAD_WORKERS,
+                batch_files=settings.LOAD_BATCH_FILES,
+            )
+            loaded = loader.load(sources)
+        finally:
+            target.close()
+        logger.info(f"Warehouse loaded: {loaded}")
+        return loaded
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading the warehouse: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, base=StorageTask, name="storage:compact_engagement")
+def compact_engagement(self) -> List[str]:
+    """Rewrite the engagement partitions of the past days into one file each."""
+    try:
+        paths = self.engagement.compact_closed()
+        logger.info(f"Compacted {len(paths)} engagement partitions")
+        return paths
+    except Exception as e:
+        logger.error(f"Error compacting engagement: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, base=StorageTask, name="processing:run_query")
+def run_query(
+    self,
+    query: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    from analytics import queries
+
+    try:
+        logger.info(f"Running query {query} from {since} until {until}")
+        return queries.run_query(self.storage, query, since, until, limit)
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error running query {query}: {str(e)}", exc_info=True)
+        self.retry(exc=e, countdown=60)
+
+
+def _changes_summary(changes: Counter) -> str:
+    return (
+        ", ".join(f"{count} {change.value}" for change, count in changes.items())
+        or "nothing to store"
+    )
+
+
+def _author_id(author_data: Optional[dict], posts_data: List[dict]) -> Optional[str]:
+    if author_data is not None:
+        return author_data.get("id")
+    if posts_data:
+        return posts_data[0].get("author_id")
+    return None
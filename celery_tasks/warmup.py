@@ -0,0 +1,95 @@
+"""Build what tasks use when a worker process starts, not on its first task.
+
+Extractors, storage clients and validators are otherwise built lazily by the
+first task of each process, and with CELERY_WORKER_MAX_TASKS_PER_CHILD prefork
+children are recycled often. Only what the tasks of the consumed queues use is
+built, e.g. a storage worker creates no extractor.
+"""
+
+import logging
+import time
+from typing import Collection, Dict, Optional
+
+from celery import Celery
+
+from celery_tasks.base_task import ExtractTask, StorageTask, create_storage
+from config.config import settings
+from extractors.parsing import resolve_parser
+from models.data_models import Author, Media, Post
+
+logger = logging.getLogger(__name__)
+
+# The solo pool runs worker_process_init in the main process, then worker_ready.
+_warmed_up = False
+
+
+def consumed_queues(app: Celery) -> Optional[Collection[str]]:
+    """Names of the queues the worker consumes from, None when unknown."""
+    queues = app.amqp.queues.consume_from
+    return set(queues) if queues else None
+
+
+def _task_bases(app: Celery, queues: Optional[Collection[str]]) -> set:
+    bases = set()
+    for name, task in app.tasks.items():
+        if ":" not in name:
+            continue
+        if queues is None or name.split(":")[0] in queues:
+            bases.update(type(task).__mro__)
+    return bases
+
+
+def warm_up(app: Celery, queues: Optional[Collection[str]] = None) -> Dict[str, float]:
+    """Build the worker's extractors, storage and validators, once per process.
+
+    Failures are logged and left for the first task to hit again.
+
+    Returns:
+        Seconds spent per warmed up component
+    """
+    global _warmed_up
+    if _warmed_up:
+        return {}
+    _warmed_up = True
+    bases = _task_bases(app, queues)
+    steps = {"validators": _warm_validators}
+    if ExtractTask in bases:
+        steps["extractors"] = lambda: _warm_extractors(app)
+        steps["parser"] = resolve_parser
+    if StorageTask in bases:
+        steps["storage"] = _warm_storage
+
+    timings = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    logger.info(
+        "Worker process warmed up: "
+        + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items())
+    )
+    return timings
+
+
+def _warm_validators() -> None:
+    # Builds and caches the list validator of each model.
+    for model in (Author, Post, Media):
+        model.validate_many([])
+
+
+def _warm_extractors(app: Celery) -> None:
+    # The extractors are cached on the ExtractTask class, shared by its tasks.
+    task = next(task for task in app.tasks.values() if isinstance(task, ExtractTask))
+    for source_type, extractor_config in settings.EXTRACTORS.items():
+        if extractor_config["enabled"]:
+            task.get_extractor(source_type)
+
+
+def _warm_storage() -> None:
+    # Set on the class so every storage task shares the client.
+    if StorageTask._storage is None:
+        StorageTask._storage = create_storage()
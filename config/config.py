@@ -1,4 +1,5 @@
 import os
+import tempfile
 from functools import lru_cache
 
 from dotenv import load_dotenv
@@ -28,7 +29,7 @@ class BaseConfig:
     )
 
     CELERY_TASK_ROUTES = (route_task,)
-    imports = ("celery_tasks.tasks",)
+    imports = ("celery_tasks.tasks", "celery_tasks.signals")
 
     task_serializer = "json"
     result_serializer = "json"
@@ -52,11 +53,34 @@ class BaseConfig:
     SELENIUM_HUB_URL = os.environ.get(
         "SELENIUM_HUB_URL", "http://localhost:4444/wd/hub"
     )
+    # Browser crawls check the hub for a free slot before opening a session and
+    # are deferred while the grid is full.
+    SELENIUM_ADMISSION_CONTROL = (
+        os.environ.get("SELENIUM_ADMISSION_CONTROL", "true").lower() == "true"
+    )
+    SELENIUM_STATUS_URL = os.environ.get(
+        "SELENIUM_STATUS_URL", f"{SELENIUM_HUB_URL.rstrip('/')}/status"
+    )
+    SELENIUM_STATUS_TIMEOUT = float(os.environ.get("SELENIUM_STATUS_TIMEOUT", 2))
+    SELENIUM_DEFER_COUNTDOWN = int(os.environ.get("SELENIUM_DEFER_COUNTDOWN", 10))
+    SELENIUM_MAX_DEFERRALS = int(os.environ.get("SELENIUM_MAX_DEFERRALS", 60))
+    # "remote" drives the Selenium hub, "replay" serves recorded pages offline.
+    SELENIUM_DRIVER = os.environ.get("SELENIUM_DRIVER", "remote")
+    SELENIUM_REPLAY_DIR = os.environ.get("SELENIUM_REPLAY_DIR", "recordings")
+    SELENIUM_SCROLL_PAUSE = float(os.environ.get("SELENIUM_SCROLL_PAUSE", 3))
+    SELENIUM_SCROLL_TIMEOUT = float(os.environ.get("SELENIUM_SCROLL_TIMEOUT", 10))
+    SELENIUM_SETTLE_PAUSE = float(os.environ.get("SELENIUM_SETTLE_PAUSE", 2))
 
     MINIO_HOST = os.environ.get("MINIO_HOST", "localhost")
     MINIO_PORT = os.environ.get("MINIO_PORT", 9000)
     MINIO_ACCESS_KEY = os.environ.get("MINIO_ACCESS_KEY", "minioadmin")
     MINIO_SECRET_KEY = os.environ.get("MINIO_SECRET_KEY", "minioadmin")
+    # Bucket checks are skipped for this many seconds after a worker process
+    # on the host made them, 0 checks in every process.
+    MINIO_BUCKETS_CHECK_TTL = int(os.environ.get("MINIO_BUCKETS_CHECK_TTL", 3600))
+    MINIO_BUCKETS_FLAG_DIR = os.environ.get(
+        "MINIO_BUCKETS_FLAG_DIR", tempfile.gettempdir()
+    )
 
     SNOWFLAKE_USER = os.environ.get("SNOWFLAKE_USER", "user")
     SNOWFLAKE_PASSWORD = os.environ.get("SNOWFLAKE_PASSWORD", "password")
@@ -65,12 +89,76 @@ class BaseConfig:
     SNOWFLAKE_STAGE = os.environ.get("SNOWFLAKE_STAGE", "stage")
     SNOWFLAKE_DATABASE = os.environ.get("SNOWFLAKE_DATABASE", "database")
 
+    HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+    # Parse browser pages on the processing queue instead of the crawling worker.
+    OFFLOAD_PARSING = os.environ.get("OFFLOAD_PARSING", "true").lower() == "true"
+    # Posts listed by a crawl when the task is given no limit.
+    CRAWL_LIMIT = int(os.environ.get("CRAWL_LIMIT", 100))
+    # Crawls above these sizes prune collected posts from the DOM while scrolling.
+    DEEP_CRAWL_MIN_POSTS = int(os.environ.get("DEEP_CRAWL_MIN_POSTS", 300))
+    DEEP_CRAWL_MIN_DAYS = int(os.environ.get("DEEP_CRAWL_MIN_DAYS", 90))
+    # Backfills are split into this many time slices crawled in parallel.
+    BACKFILL_SLICES = int(os.environ.get("BACKFILL_SLICES", 6))
+    BACKFILL_SLICE_LIMIT = int(os.environ.get("BACKFILL_SLICE_LIMIT", 1000))
+    # Build extractors, storage clients and validators when a worker process
+    # starts rather than on its first task.
+    WORKER_WARMUP = os.environ.get("WORKER_WARMUP", "true").lower() == "true"
+
+    # Per-stage timings and counters, served in the Prometheus text format on
+    # METRICS_PORT by the worker and on the following ports by its children.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_PORT = int(os.environ.get("METRICS_PORT", 9808))
+    # Finished tasks per minute, queue, source and state, counted in Redis for
+    # the dashboard along with the queue depths of the broker at TASK_STATS_URL.
+    TASK_STATS = {
+        "enabled": os.environ.get("TASK_STATS_ENABLED", "false").lower() == "true",
+        "url": os.environ.get("TASK_STATS_URL", broker_url),
+    }
+    # Seconds between refreshes of the task statuses and queue stats in Streamlit.
+    DASHBOARD_REFRESH_SECONDS = float(os.environ.get("DASHBOARD_REFRESH_SECONDS", 5))
+    # Profiles of sampled task runs, written under profiles/ in the storage.
+    # A "profile" message header profiles a run whatever these settings.
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0.01))
+    # "cprofile", or "sampling" to use pyinstrument when it is installed.
+    PROFILING_PROFILER = os.environ.get("PROFILING_PROFILER", "cprofile")
+    PROFILING_TRACEMALLOC = (
+        os.environ.get("PROFILING_TRACEMALLOC", "true").lower() == "true"
+    )
+    PROFILING_TRACEMALLOC_FRAMES = int(
+        os.environ.get("PROFILING_TRACEMALLOC_FRAMES", 10)
+    )
+    # Spans of each crawl, from submission to storage. Exporters: a local JSONL
+    # file (JsonlSpanExporter) or an OTLP/HTTP collector (OtlpHttpSpanExporter).
+    TRACING = {
+        "class": os.environ.get(
+            "TRACING_EXPORTER", "telemetry.tracing.JsonlSpanExporter"
+        ),
+        "enabled": os.environ.get("TRACING_ENABLED", "false").lower() == "true",
+        "config": {
+            "path": os.environ.get("TRACING_PATH", "traces/spans.jsonl"),
+            "url": os.environ.get(
+                "TRACING_COLLECTOR_URL", "http://localhost:4318/v1/traces"
+            ),
+        },
+    }
+
+    # Skip URL parsing when validating records the pipeline produced itself.
+    TRUSTED_VALIDATION = os.environ.get("TRUSTED_VALIDATION", "false").lower() == "true"
+
+    REDDIT_API_URL = os.environ.get("REDDIT_API_URL", "https://www.reddit.com")
+    REDDIT_USER_AGENT = os.environ.get(
+        "REDDIT_USER_AGENT", "python:reddit-crawlers:v0.1.0 (by /u/reddit-crawlers)"
+    )
+    REDDIT_HTTP_POOL_SIZE = int(os.environ.get("REDDIT_HTTP_POOL_SIZE", 10))
+    REDDIT_HTTP_TIMEOUT = float(os.environ.get("REDDIT_HTTP_TIMEOUT", 15))
+
     LINKEDIN_EMAIL = os.environ.get("LINKEDIN_EMAIL", "email")
     LINKEDIN_PASSWORD = os.environ.get("LINKEDIN_PASSWORD", "password")
 
     EXTRACTORS = {
         "reddit": {
-            "class": "extractors.reddit_extractor.RedditExtractor",
+            "class": "extractors.reddit_json_extractor.RedditJsonExtractor",
             "enabled": True,
         },
         "linkedin": {
@@ -89,7 +177,99 @@ class BaseConfig:
                 "secret_key": MINIO_SECRET_KEY,
                 "secure": False,
             },
-        }
+        },
+        "local": {
+            "class": "storage.local_storage.LocalStorageHandler",
+            "enabled": True,
+            "config": {"root": os.environ.get("LOCAL_STORAGE_ROOT", "data")},
+        },
+    }
+    # Key of STORAGE used by the storage workers.
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "minio")
+
+    # Like and comment counts of every crawled post, one point per crawl. The
+    # partitions of past days are compacted into one file each by the
+    # storage:compact_engagement task every ENGAGEMENT_COMPACT_INTERVAL_SECONDS
+    # when celery beat runs.
+    ENGAGEMENT_ENABLED = os.environ.get("ENGAGEMENT_ENABLED", "true").lower() == "true"
+    ENGAGEMENT_COMPACT_INTERVAL_SECONDS = float(
+        os.environ.get("ENGAGEMENT_COMPACT_INTERVAL_SECONDS", 3600)
+    )
+
+    # Digests of stored records, used to skip unchanged writes and to write
+    # counters-only deltas. Backends: RedisChangeIndex, SqliteChangeIndex.
+    CHANGE_INDEX = {
+        "class": os.environ.get(
+            "CHANGE_INDEX_CLASS", "storage.change_index.RedisChangeIndex"
+        ),
+        "enabled": os.environ.get("CHANGE_INDEX_ENABLED", "true").lower() == "true",
+        "config": {
+            "url": os.environ.get("CHANGE_INDEX_URL", broker_url),
+            "path": os.environ.get("CHANGE_INDEX_PATH", "change_index.sqlite3"),
+        },
+    }
+
+    # Best posts and post counts per author, updated by the storage workers and
+    # read by the dashboard and the analytics CLI without scanning the posts.
+    # Backends: RedisAggregates, SqliteAggregates.
+    AGGREGATES = {
+        "class": os.environ.get(
+            "AGGREGATES_CLASS", "storage.aggregates.RedisAggregates"
+        ),
+        "enabled": os.environ.get("AGGREGATES_ENABLED", "true").lower() == "true",
+        "config": {
+            "url": os.environ.get("AGGREGATES_URL", broker_url),
+            "path": os.environ.get("AGGREGATES_PATH", "aggregates.sqlite3"),
+        },
+    }
+
+    # Loads of the stored records into a warehouse, by the storage:load_warehouse
+    # task every LOAD_INTERVAL_SECONDS when celery beat runs. Targets:
+    # SqliteTarget, DuckDBTarget (needs the duckdb extra), SnowflakeTarget.
+    LOAD_TARGET = {
+        "class": os.environ.get(
+            "LOAD_TARGET_CLASS", "loaders.sqlite_target.SqliteTarget"
+        ),
+        "enabled": os.environ.get("LOAD_ENABLED", "false").lower() == "true",
+        "config": {
+            "path": os.environ.get("LOAD_TARGET_PATH", "warehouse.sqlite3"),
+            "account": SNOWFLAKE_ACCOUNT,
+            "user": SNOWFLAKE_USER,
+            "password": SNOWFLAKE_PASSWORD,
+            "database": SNOWFLAKE_DATABASE,
+            "schema": SNOWFLAKE_SCHEMA,
+            "stage": SNOWFLAKE_STAGE,
+        },
+    }
+    LOAD_INTERVAL_SECONDS = float(os.environ.get("LOAD_INTERVAL_SECONDS", 3600))
+    # Objects read concurrently, and objects merged per transaction.
+    LOAD_WORKERS = int(os.environ.get("LOAD_WORKERS", 8))
+    LOAD_BATCH_FILES = int(os.environ.get("LOAD_BATCH_FILES", 1000))
+
+    CELERY_BEAT_SCHEDULE = {
+        **(
+            {
+                "load-warehouse": {
+                    "task": "storage:load_warehouse",
+                    "schedule": LOAD_INTERVAL_SECONDS,
+                    # A load still waiting when the next one is due is dropped.
+                    "options": {"expires": LOAD_INTERVAL_SECONDS},
+                }
+            }
+            if LOAD_TARGET["enabled"]
+            else {}
+        ),
+        **(
+            {
+                "compact-engagement": {
+                    "task": "storage:compact_engagement",
+                    "schedule": ENGAGEMENT_COMPACT_INTERVAL_SECONDS,
+                    "options": {"expires": ENGAGEMENT_COMPACT_INTERVAL_SECONDS},
+                }
+            }
+            if ENGAGEMENT_ENABLED
+            else {}
+        ),
     }
 
 
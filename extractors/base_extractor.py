@@ -1,9 +1,27 @@
 import abc
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
-from models.data_models import ExtractionResult, Source
+from models.data_models import (
+    Author,
+    ExtractionBatch,
+    ExtractionResult,
+    RawBatch,
+    Source,
+)
+
+
+class SliceCursorError(Exception):
+    """Raised when a listing started at a slice cursor returns nothing."""
 
 
 class BaseExtractor(abc.ABC):
+    # Extractors holding a browser can hand out raw page data and parse it later.
+    supports_raw_fetch: bool = False
+    # Extractors opening a Selenium Grid session need a free grid slot.
+    uses_browser: bool = False
+    # Extractors able to start a listing at a given date can backfill in slices.
+    supports_time_slices: bool = False
 
     @abc.abstractmethod
     def extract(self, source_config: Source) -> ExtractionResult:
@@ -16,3 +34,117 @@ class BaseExtractor(abc.ABC):
             ExtractionResult containing the author, posts, and media
         """
         raise NotImplementedError("Method not implemented")
+
+    def extract_iter(
+        self, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        """Extract data from a source incrementally.
+
+        Extractors that can stream override this; the default wraps ``extract``.
+
+        Args:
+            source_config: Configuration for the source to extract from
+
+        Yields:
+            The Author first, then ExtractionBatch objects as posts become available
+        """
+        result = self.extract(source_config)
+        yield result.author
+        yield ExtractionBatch(posts=result.posts, medias=result.medias)
+
+    def extract_many_iter(
+        self, source_configs: List[Source]
+    ) -> Iterator[Tuple[Source, Optional[Union[Author, ExtractionBatch]]]]:
+        """Extract data from several sources.
+
+        Extractors able to interleave sources override this; the default
+        extracts them one after the other.
+
+        Args:
+            source_configs: Configurations of the sources to extract from
+
+        Yields:
+            (source, item) pairs, items following the ``extract_iter`` contract.
+            A source skipped after an error is yielded with None
+        """
+        for source_config in source_configs:
+            for item in self.extract_iter(source_config):
+                yield source_config, item
+
+    def slice_cursor(self, at: datetime) -> Optional[str]:
+        """Listing cursor from which posts older than ``at`` are listed.
+
+        Extractors raise ``SliceCursorError`` from ``extract_iter`` when the
+        listing started at the cursor comes back empty.
+
+        Args:
+            at: End of the time slice to crawl
+
+        Returns:
+            The cursor to set on ``Source.cursor``, None to list from the newest
+        """
+        raise NotImplementedError("Method not implemented")
+
+    def listing_reach(self, author: str) -> Optional[datetime]:
+        """Creation date of the oldest post the listing of an author returns.
+
+        Args:
+            author: Name of the author
+
+        Returns:
+            The date, None when the listing returns every post of the author
+        """
+        raise NotImplementedError("Method not implemented")
+
+    def fetch_iter(self, source_config: Source) -> Iterator[RawBatch]:
+        """Fetch raw page data without parsing it.
+
+        Args:
+            source_config: Configuration for the source to extract from
+
+        Yields:
+            RawBatch objects, the first one carrying the author page
+        """
+        raise NotImplementedError("Method not implemented")
+
+    def fetch_many_iter(
+        self, source_configs: List[Source]
+    ) -> Iterator[Tuple[Source, Optional[RawBatch]]]:
+        """Fetch raw page data for several sources.
+
+        Args:
+            source_configs: Configurations of the sources to extract from
+
+        Yields:
+            (source, raw_batch) pairs, batches following the ``fetch_iter``
+            contract. A source skipped after an error is yielded with None
+        """
+        raise NotImplementedError("Method not implemented")
+
+    def parse_raw(
+        self, raw_batch: RawBatch, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        """Parse a RawBatch produced by ``fetch_iter``.
+
+        Args:
+            raw_batch: Raw page data to parse
+            source_config: Configuration of the source the data was fetched from
+
+        Yields:
+            The Author if the batch carries the author page, then an ExtractionBatch
+        """
+        raise NotImplementedError("Method not implemented")
+
+    @staticmethod
+    def collect(items: Iterable[Union[Author, ExtractionBatch]]) -> ExtractionResult:
+        """Gather the output of ``extract_iter`` into a single ExtractionResult."""
+        author = None
+        posts = []
+        medias = []
+        for item in items:
+            if isinstance(item, Author):
+                author = item
+            else:
+                posts.extend(item.posts)
+                medias.extend(item.medias)
+        return ExtractionResult(author=author, posts=posts, medias=medias)
@@ -0,0 +1,274 @@
+import abc
+import logging
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+from selenium.common.exceptions import TimeoutException
+
+from config.config import settings
+from extractors.base_extractor import BaseExtractor
+from extractors.parsing import make_soup
+from models.data_models import (
+    Author,
+    ExtractionBatch,
+    ExtractionResult,
+    Media,
+    Post,
+    RawBatch,
+    Source,
+)
+from scrapers.selenium_scraper import WebScraper
+from telemetry import stage
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserExtractor(BaseExtractor):
+    """Base for extractors that read an infinitely scrolling feed in Selenium.
+
+    Feed items are pulled out of the page while it is being scrolled, so
+    ``extract_iter`` can hand out batches of posts before scrolling is over.
+    ``fetch_iter`` hands out the same data unparsed, so parsing can happen
+    after the browser session has been released.
+    """
+
+    supports_raw_fetch = True
+    uses_browser = True
+
+    # CSS selector of one feed item, used to read items from the live page.
+    item_selector: str
+    # Tag name of the root element of a feed item fragment.
+    item_tag: str
+    # Optional strainer scoping full page parses.
+    page_strainer: Optional[SoupStrainer] = None
+
+    def __init__(self):
+        self.scraper = WebScraper()
+
+    @abc.abstractmethod
+    def _posts_url(self, source_config: Source) -> str:
+        """URL of the feed listing the author's posts"""
+        raise NotImplementedError("Method not implemented")
+
+    def _start_session(self, driver) -> None:
+        """Prepare a new browser session, e.g. log in"""
+
+    @abc.abstractmethod
+    def _open_feed(self, driver, url: str) -> None:
+        """Load the feed in the driver and wait until the first items are shown"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def _parse_author(self, soup: BeautifulSoup, source_config: Source) -> Author:
+        """Parse the author from the feed page"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def _select_items(self, soup: BeautifulSoup) -> list:
+        """Select the feed items of a full page"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def _item_author_id(self, item, source_config: Source) -> str:
+        """Author id of a feed item parsed without the author page"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def _parse_post(
+        self, post_element, author_id: str
+    ) -> Optional[Tuple[Post, List[Media]]]:
+        """Parse a single feed item"""
+        raise NotImplementedError("Method not implemented")
+
+    def extract(self, source_config: Source) -> ExtractionResult:
+        return self.collect(self.extract_iter(source_config))
+
+    def extract_iter(
+        self, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        for raw_batch in self.fetch_iter(source_config):
+            yield from self.parse_raw(raw_batch, source_config)
+
+    def fetch_iter(self, source_config: Source) -> Iterator[RawBatch]:
+        url = self._posts_url(source_config)
+        source = source_config.source_type
+
+        with self.scraper.create_driver() as driver:
+            try:
+                with stage("login", source):
+                    self._start_session(driver)
+                with stage("page_load", source):
+                    self._open_feed(driver, url)
+                with stage("page_source", source):
+                    author_page = driver.page_source
+
+                deep_crawl = self._is_deep_crawl(source_config)
+                remaining = source_config.limit
+                for _ in self.scraper.iter_scroll(driver):
+                    fragments = self.scraper.collect_items(
+                        driver, self.item_selector, prune=deep_crawl
+                    )
+                    fragments = fragments[:remaining]
+                    remaining -= len(fragments)
+                    if author_page is not None or fragments:
+                        yield RawBatch(author_page=author_page, items=fragments)
+                        author_page = None
+                    if remaining <= 0:
+                        break
+
+            except TimeoutException:
+                logger.error(f"Timeout while loading {url}")
+                raise
+            except Exception as e:
+                logger.error(f"Error extracting data from {url}: {e}")
+                raise
+
+    def extract_many_iter(
+        self, source_configs: List[Source]
+    ) -> Iterator[Tuple[Source, Optional[Union[Author, ExtractionBatch]]]]:
+        for source_config, raw_batch in self.fetch_many_iter(source_configs):
+            if raw_batch is None:
+                yield source_config, None
+                continue
+            for item in self.parse_raw(raw_batch, source_config):
+                yield source_config, item
+
+    def fetch_many_iter(
+        self, source_configs: List[Source]
+    ) -> Iterator[Tuple[Source, Optional[RawBatch]]]:
+        """Crawl several authors at once in one browser session, one tab each.
+
+        Scroll steps of all tabs are interleaved, so the time spent waiting for
+        a feed to load more posts is shared by all authors. An author whose
+        feed can't be loaded or read is skipped and yielded with None.
+        """
+        source = source_configs[0].source_type if source_configs else None
+        with self.scraper.create_driver() as driver:
+            with stage("login", source):
+                self._start_session(driver)
+
+            tabs = {}
+            # The tab of a feed that failed to load is reused for the next author.
+            spare = None
+            for source_config in source_configs:
+                url = self._posts_url(source_config)
+                handle = spare or self.scraper.open_tab(driver, first=not tabs)
+                spare = None
+                try:
+                    with stage("page_load", source):
+                        self._open_feed(driver, url)
+                except Exception as e:
+                    logger.error(f"Error loading {url}, skipping author: {e}")
+                    spare = handle
+                    yield source_config, None
+                    continue
+                with stage("page_source", source):
+                    author_page = driver.page_source
+                tabs[handle] = {
+                    "source": source_config,
+                    "author_page": author_page,
+                    "deep_crawl": self._is_deep_crawl(source_config),
+                    "remaining": source_config.limit,
+                }
+            if spare is not None and tabs:
+                self.scraper.close_tab(driver)
+
+            finished = set()
+            for handle in self.scraper.iter_scroll_tabs(driver, list(tabs), finished):
+                tab = tabs[handle]
+                try:
+                    fragments = self.scraper.collect_items(
+                        driver, self.item_selector, prune=tab["deep_crawl"]
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Error reading feed of {tab['source'].author}, "
+                        f"skipping author: {e}"
+                    )
+                    finished.add(handle)
+                    yield tab["source"], None
+                    continue
+                fragments = fragments[: tab["remaining"]]
+                tab["remaining"] -= len(fragments)
+                if tab["author_page"] is not None or fragments:
+                    yield tab["source"], RawBatch(
+                        author_page=tab["author_page"], items=fragments
+                    )
+                    tab["author_page"] = None
+                if tab["remaining"] <= 0:
+                    finished.add(handle)
+
+    def _is_deep_crawl(self, source_config: Source) -> bool:
+        if source_config.deep_crawl is not None:
+            return source_config.deep_crawl
+        return source_config.limit >= settings.DEEP_CRAWL_MIN_POSTS or (
+            datetime.now() - source_config.date_start
+            >= timedelta(days=settings.DEEP_CRAWL_MIN_DAYS)
+        )
+
+    def parse_raw(
+        self, raw_batch: RawBatch, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        author = None
+        batch = None
+        with stage("parse", source_config.source_type):
+            if raw_batch.author_page is not None:
+                soup = make_soup(raw_batch.author_page, parse_only=self.page_strainer)
+                author = self._parse_author(soup, source_config)
+
+            items = self._parse_fragments(raw_batch.items)
+            if items:
+                author_id = self._item_author_id(items[0], source_config)
+                batch = self._parse_posts(items, author_id, source_config)
+
+        if author is not None:
+            yield author
+        if batch is not None and batch.posts:
+            yield batch
+
+    def _parse_page(self, page_source: str, source_config: Source) -> ExtractionResult:
+        soup = make_soup(page_source, parse_only=self.page_strainer)
+        author = self._parse_author(soup, source_config)
+        items = self._select_items(soup)[: source_config.limit]
+        batch = self._parse_posts(items, author.id, source_config)
+        return ExtractionResult(author=author, posts=batch.posts, medias=batch.medias)
+
+    def _parse_fragments(self, fragments: List[str]) -> list:
+        """Feed items of the fragments, parsed together in a single pass.
+
+        The fragments are joined into one document and parsed once, scoped to
+        the item elements, rather than building a soup per fragment.
+        """
+        if not fragments:
+            return []
+        soup = make_soup("".join(fragments), parse_only=SoupStrainer(self.item_tag))
+        # html5lib ignores strainers, items nested in another item are skipped.
+        return [
+            item
+            for item in soup.find_all(self.item_tag)
+            if item.find_parent(self.item_tag) is None
+        ]
+
+    def _parse_posts(
+        self, items: list, author_id: str, source_config: Source
+    ) -> ExtractionBatch:
+        posts = []
+        all_medias = []
+        for item in items:
+            try:
+                result = self._parse_post(item, author_id)
+                if result:
+                    post, medias = result
+                    if (
+                        post
+                        and post.timestamp
+                        and post.timestamp >= source_config.date_start
+                    ):
+                        posts.append(post)
+                        all_medias.extend(medias)
+            except Exception as e:
+                logger.warning(f"Failed to extract post: {str(e)}")
+                continue
+
+        return ExtractionBatch(posts=posts, medias=all_medias)
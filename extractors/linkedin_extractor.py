@@ -1,72 +1,68 @@
+import hashlib
 import logging
 import re
 import time
 from datetime import datetime, timedelta
 
+import soupsieve as sv
 from bs4 import BeautifulSoup
-from nanoid import generate
-from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 
 from config.config import settings
-from extractors.base_extractor import BaseExtractor
-from models.data_models import Author, ExtractionResult, Media, Post, Source
-from scrapers.selenium_scraper import WebScraper
+from extractors.browser_extractor import BrowserExtractor
+from models.data_models import Author, Media, Post, Source
 
 logger = logging.getLogger(__name__)
 
+FEED_ITEMS = sv.compile("div.scaffold-finite-scroll__content li")
+POST_URN = sv.compile("div[data-urn]")
+POST_TIME = sv.compile(
+    "div.update-components-actor__container span.update-components-actor__sub-description"
+)
+POST_TEXT = sv.compile("div.update-components-text")
+SOCIAL_COUNTS = sv.compile("div.social-details-social-counts")
+REACTIONS_BUTTON = sv.compile("li.social-details-social-counts__reactions button")
+COMMENTS_BUTTON = sv.compile("li.social-details-social-counts__comments button")
+POST_IMAGES = sv.compile('img[src]:not([src=""])')
+AUTHOR_NAME = sv.compile('a[href*="/in/"] h3')
+AUTHOR_LINK = sv.compile('a[href*="/in/"]')
+AUTHOR_HEADLINE = sv.compile('div[class*="break-words"] h4')
+# e.g. urn:li:activity:7325598765432109876, also urn:li:share and urn:li:ugcPost
+POST_URN_ID = re.compile(r"^urn:li:\w+:(\d+)$")
+
+
+class LinkedinExtractor(BrowserExtractor):
+    item_selector = "div.scaffold-finite-scroll__content > ul > li"
+    item_tag = "li"
 
-class LinkedinExtractor(BaseExtractor):
     def __init__(self):
-        self.scraper = WebScraper()
+        super().__init__()
         self.base_url = "https://www.linkedin.com"
 
-    def extract(self, source_config: Source) -> ExtractionResult:
-        author_posts_url = (
-            f"{self.base_url}/in/{source_config.author}/recent-activity/all/"
+    def _posts_url(self, source_config: Source) -> str:
+        return f"{self.base_url}/in/{source_config.author}/recent-activity/all/"
+
+    def _start_session(self, driver) -> None:
+        self._login(driver)
+
+    def _open_feed(self, driver, url: str) -> None:
+        driver.get(url)
+        self.scraper.wait_for_element(
+            driver, ".//div[@class='scaffold-finite-scroll__content']"
         )
-        posts = []
-        all_medias = []
 
-        with self.scraper.create_driver() as driver:
-            try:
-                self._login(driver)
-                driver.get(author_posts_url)
-                self.scraper.wait_for_element(
-                    driver, ".//div[@class='scaffold-finite-scroll__content']"
-                )
-                self.scraper.scroll_page(driver)
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                author = self._parse_author_profile(soup, source_config.author)
-                posts_soup = soup.select("div.scaffold-finite-scroll__content li")
-                for post_soup in posts_soup[: source_config.limit]:
-                    try:
-                        result = self._parse_post(post_soup, author.id)
-                        if result:
-                            post, medias = result
-                            if (
-                                post
-                                and post.timestamp
-                                and post.timestamp >= source_config.date_start
-                            ):
-                                posts.append(post)
-                                all_medias.extend(medias)
-                    except Exception as e:
-                        logger.warning(f"Failed to extract post: {str(e)}")
-                        continue
-
-                return ExtractionResult(author=author, posts=posts, medias=all_medias)
-
-            except TimeoutException:
-                logger.error(f"Timeout while loading {author_posts_url}")
-                raise
-            except Exception as e:
-                logger.error(f"Error extracting data from {author_posts_url}: {e}")
-                raise
+    def _parse_author(self, soup: BeautifulSoup, source_config: Source) -> Author:
+        return self._parse_author_profile(soup, source_config.author)
+
+    def _select_items(self, soup: BeautifulSoup) -> list:
+        return FEED_ITEMS.select(soup)
+
+    def _item_author_id(self, item, source_config: Source) -> str:
+        return source_config.author
 
     def _login(self, driver):
         driver.get("https://www.linkedin.com/login")
-        time.sleep(2)
+        time.sleep(settings.SELENIUM_SETTLE_PAUSE)
         driver.execute_script(
             "document.getElementById('rememberMeOptIn-checkbox').checked = false;"
         )
@@ -80,58 +76,42 @@ class LinkedinExtractor(BaseExtractor):
 
     def _parse_post(self, post_element, author_id):
 
-        post_id = generate(size=8)
-
+        activity_urn = None
         post_url = None
-        post_div = post_element.find("div", attrs={"data-urn": True})
+        post_div = POST_URN.select_one(post_element)
         if post_div:
             activity_urn = post_div["data-urn"]
             post_url = f"https://www.linkedin.com/feed/update/{activity_urn}"
 
         post_time = None
-        actor_container = post_element.find(
-            "div", {"class": "update-components-actor__container"}
-        )
-        if actor_container:
-            time_tag = actor_container.find(
-                "span", {"class": "update-components-actor__sub-description"}
-            )
-            if time_tag:
-                post_time = self._convert_relative_date(time_tag.get_text(strip=True))
+        time_tag = POST_TIME.select_one(post_element)
+        if time_tag:
+            post_time = self._convert_relative_date(time_tag.get_text(strip=True))
 
         post_content = None
-        content_div = post_element.find("div", {"class": "update-components-text"})
+        content_div = POST_TEXT.select_one(post_element)
         if content_div:
             post_content = content_div.get_text(separator="\n", strip=True)
 
         post_reactions = 0
         post_comments = 0
-        social_counts_div = post_element.find(
-            "div", {"class": "social-details-social-counts"}
-        )
+        social_counts_div = SOCIAL_COUNTS.select_one(post_element)
         if social_counts_div:
-            reaction_item = social_counts_div.find(
-                "li", {"class": "social-details-social-counts__reactions"}
-            )
-            if reaction_item:
-                button_tag = reaction_item.find("button")
-                if button_tag and button_tag.has_attr("aria-label"):
-                    raw_reactions = button_tag["aria-label"].split(" ")[0]
-                    post_reactions = self._convert_abbreviated_to_number(raw_reactions)
-
-            comment_item = social_counts_div.find(
-                "li", {"class": "social-details-social-counts__comments"}
-            )
-            if comment_item:
-                cbutton_tag = comment_item.find("button")
-                if cbutton_tag and cbutton_tag.has_attr("aria-label"):
-                    raw_comments = cbutton_tag["aria-label"].split(" ")[0]
-                    post_comments = self._convert_abbreviated_to_number(raw_comments)
-
+            button_tag = REACTIONS_BUTTON.select_one(social_counts_div)
+            if button_tag and button_tag.has_attr("aria-label"):
+                raw_reactions = button_tag["aria-label"].split(" ")[0]
+                post_reactions = self._convert_abbreviated_to_number(raw_reactions)
+
+            cbutton_tag = COMMENTS_BUTTON.select_one(social_counts_div)
+            if cbutton_tag and cbutton_tag.has_attr("aria-label"):
+                raw_comments = cbutton_tag["aria-label"].split(" ")[0]
+                post_comments = self._convert_abbreviated_to_number(raw_comments)
+
+        images = [img["src"] for img in POST_IMAGES.select(post_element)]
+        post_id = self._post_id(activity_urn, author_id, post_content, images)
         medias = [
-            Media(id=f"{post_id}-{i}", post_id=post_id, original_url=img["src"])
-            for i, img in enumerate(post_element.find_all("img"))
-            if img.get("src")
+            Media(id=f"{post_id}-{i}", post_id=post_id, original_url=src)
+            for i, src in enumerate(images)
         ]
 
         post = Post(
@@ -146,23 +126,27 @@ class LinkedinExtractor(BaseExtractor):
 
         return post, medias
 
+    def _post_id(self, activity_urn, author_id, post_content, images) -> str:
+        """Stable post id, taken from the activity URN when the post has one.
+
+        Posts without a URN get a hash of their author, text and images, so that
+        recrawls of the same post still map to the same id.
+        """
+        match = POST_URN_ID.match(activity_urn or "")
+        if match:
+            return match.group(1)
+        content = "\n".join([author_id, post_content or "", *images])
+        return "h" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
     def _parse_author_profile(self, author_profile_soup: BeautifulSoup, author_id: str):
-        author_name = (
-            author_profile_soup.select_one('a[href*="/in/"] h3').get_text(strip=True)
-            if author_profile_soup.select_one('a[href*="/in/"] h3')
-            else None
-        )
+        name_tag = AUTHOR_NAME.select_one(author_profile_soup)
+        author_name = name_tag.get_text(strip=True) if name_tag else None
 
-        author_path = author_profile_soup.select_one('a[href*="/in/"]')["href"]
+        author_path = AUTHOR_LINK.select_one(author_profile_soup)["href"]
         author_url = f"{self.base_url}{author_path}" if author_path else None
 
-        author_headline = (
-            author_profile_soup.select_one('div[class*="break-words"] h4').get_text(
-                strip=True
-            )
-            if author_profile_soup.select_one('div[class*="break-words"] h4')
-            else None
-        )
+        headline_tag = AUTHOR_HEADLINE.select_one(author_profile_soup)
+        author_headline = headline_tag.get_text(strip=True) if headline_tag else None
 
         return Author(
             id=author_id, name=author_name, url=author_url, headline=author_headline
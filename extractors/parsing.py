@@ -0,0 +1,37 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_PARSERS = ("lxml", "html.parser", "html5lib")
+FALLBACK_PARSER = "html.parser"
+
+
+@lru_cache()
+def resolve_parser(parser: Optional[str] = None) -> str:
+    """Return the configured BeautifulSoup backend, or the stdlib one if missing."""
+    parser = parser or settings.HTML_PARSER
+    if parser not in SUPPORTED_PARSERS:
+        raise ValueError(f"Unsupported HTML parser: {parser}")
+    try:
+        BeautifulSoup("", parser)
+    except FeatureNotFound:
+        logger.warning(
+            f"HTML parser {parser} is not installed, using {FALLBACK_PARSER}"
+        )
+        return FALLBACK_PARSER
+    return parser
+
+
+def make_soup(
+    markup: str,
+    parse_only: Optional[SoupStrainer] = None,
+    parser: Optional[str] = None,
+) -> BeautifulSoup:
+    """Parse markup with the configured backend, optionally scoped by a strainer."""
+    return BeautifulSoup(markup, resolve_parser(parser), parse_only=parse_only)
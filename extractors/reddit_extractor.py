@@ -2,57 +2,49 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Tuple
 
-from bs4 import BeautifulSoup
-from selenium.common.exceptions import TimeoutException
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
 
-from extractors.base_extractor import BaseExtractor
-from models.data_models import Author, ExtractionResult, Media, Post, Source
-from scrapers.selenium_scraper import WebScraper
+from extractors.browser_extractor import BrowserExtractor
+from models.data_models import Author, Media, Post, Source
 from storage import minio_storage
 
 logger = logging.getLogger(__name__)
 
+# Only posts and the profile sidebar (cake day and karma) are kept in the tree.
+PAGE_STRAINER = SoupStrainer(["shreddit-post", "time", "span"])
+POST_TITLE = sv.compile('a[id^="post-title-"]')
+POST_CONTENT = sv.compile('div[id$="-post-rtjson-content"]')
+POST_PARAGRAPHS = sv.compile("p, li")
+POST_IMAGES = sv.compile("img.media-lightbox-img")
+
+
+class RedditExtractor(BrowserExtractor):
+    item_selector = "shreddit-post"
+    item_tag = "shreddit-post"
+    page_strainer = PAGE_STRAINER
 
-class RedditExtractor(BaseExtractor):
     def __init__(self):
-        self.scraper = WebScraper()
+        super().__init__()
         self.base_url = "https://www.reddit.com"
 
-    def extract(self, source_config: Source) -> ExtractionResult:
-        author_posts_url = (
+    def _posts_url(self, source_config: Source) -> str:
+        return (
             f"{self.base_url}/user/{source_config.author}/submitted/?sort=top&t=month"
         )
-        posts = []
-        all_medias = []
-
-        with self.scraper.create_driver() as driver:
-            try:
-                driver.get(author_posts_url)
-                self.scraper.wait_for_element(driver, ".//shreddit-feed")
-
-                self.scraper.scroll_page(driver)
-
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                author = self._parse_author_profile(soup)
-                posts_soup = soup.find_all("shreddit-post")
-                for post_soup in posts_soup[: source_config.limit]:
-                    try:
-                        post, medias = self._parse_post(post_soup, author.id)
-                        if post and post.timestamp >= source_config.date_start:
-                            posts.append(post)
-                            all_medias.extend(medias)
-                    except Exception as e:
-                        logger.warning(f"Failed to extract post: {str(e)}")
-                        continue
-
-                return ExtractionResult(author=author, posts=posts, medias=all_medias)
-
-            except TimeoutException:
-                logger.error(f"Timeout while loading {author_posts_url}")
-                raise
-            except Exception as e:
-                logger.error(f"Error extracting data from {author_posts_url}: {e}")
-                raise
+
+    def _open_feed(self, driver, url: str) -> None:
+        driver.get(url)
+        self.scraper.wait_for_element(driver, ".//shreddit-feed")
+
+    def _parse_author(self, soup: BeautifulSoup, source_config: Source) -> Author:
+        return self._parse_author_profile(soup)
+
+    def _select_items(self, soup: BeautifulSoup) -> list:
+        return soup.find_all("shreddit-post")
+
+    def _item_author_id(self, item, source_config: Source) -> str:
+        return item.get("author-id")
 
     def _parse_post(self, post_element, author_id) -> Tuple[Post, List[Media]]:
         try:
@@ -65,20 +57,16 @@ class RedditExtractor(BaseExtractor):
                 "subreddit": post_element.get("subreddit-name"),
             }
 
-            title_element = post_element.find(
-                "a", id=lambda x: x and x.startswith("post-title-")
-            )
+            title_element = POST_TITLE.select_one(post_element)
             title = title_element.text.strip() if title_element else ""
 
-            content_element = post_element.find(
-                "div", id=lambda x: x and x.endswith("-post-rtjson-content")
-            )
+            content_element = POST_CONTENT.select_one(post_element)
             content_text = ""
             if content_element:
-                paragraphs = content_element.find_all(["p", "li"])
+                paragraphs = POST_PARAGRAPHS.select(content_element)
                 content_text = "\n".join(p.text.strip() for p in paragraphs)
 
-            img_elements = post_element.find_all("img", class_="media-lightbox-img")
+            img_elements = POST_IMAGES.select(post_element)
             media_urls = [
                 img_element.get("src")
                 for img_element in img_elements
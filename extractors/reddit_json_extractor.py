@@ -0,0 +1,336 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.config import settings
+from extractors.base_extractor import BaseExtractor, SliceCursorError
+from models.data_models import (
+    Author,
+    ExtractionBatch,
+    ExtractionResult,
+    Media,
+    Post,
+    Source,
+)
+from telemetry import stage
+
+logger = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif")
+
+
+class RedditJsonExtractor(BaseExtractor):
+    """Reddit extractor reading the public JSON listings over a pooled HTTP client.
+
+    Falls back to the Selenium based ``RedditExtractor`` when the JSON endpoints
+    cannot be used (rate limiting, blocked requests, unexpected payloads).
+    """
+
+    page_size = 100
+    # User listings stop after about this many posts, newest first.
+    listing_limit = 1000
+    supports_time_slices = True
+    # Ids probed per /api/info.json request, and requests spent per cursor.
+    probe_size = 100
+    cursor_search_rounds = 8
+
+    def __init__(self, fallback: Optional[BaseExtractor] = None):
+        self.base_url = "https://www.reddit.com"
+        self.api_url = settings.REDDIT_API_URL.rstrip("/")
+        self.session = self._create_session()
+        self._fallback = fallback
+
+    @property
+    def fallback(self) -> BaseExtractor:
+        if self._fallback is None:
+            from extractors.reddit_extractor import RedditExtractor
+
+            self._fallback = RedditExtractor()
+        return self._fallback
+
+    def extract(self, source_config: Source) -> ExtractionResult:
+        return self.collect(self.extract_iter(source_config))
+
+    def extract_iter(
+        self, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        yielded_posts = set()
+        author_yielded = False
+        try:
+            for item in self._iter_pages(source_config):
+                if isinstance(item, Author):
+                    author_yielded = True
+                else:
+                    yielded_posts.update(post.id for post in item.posts)
+                yield item
+        except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+            logger.warning(
+                f"JSON extraction failed for {source_config.author}, "
+                f"falling back to browser: {e}"
+            )
+            for item in self.fallback.extract_iter(source_config):
+                if isinstance(item, Author):
+                    if not author_yielded:
+                        yield item
+                    continue
+                # Skip what was already handed out before the JSON listing failed.
+                posts = [
+                    post
+                    for post in item.posts
+                    if post.id not in yielded_posts
+                    and not self._after_date_end(post.timestamp, source_config)
+                ]
+                post_ids = {post.id for post in posts}
+                medias = [media for media in item.medias if media.post_id in post_ids]
+                if posts:
+                    yield ExtractionBatch(posts=posts, medias=medias)
+
+    def _iter_pages(
+        self, source_config: Source
+    ) -> Iterator[Union[Author, ExtractionBatch]]:
+        about = self._get_json(f"/user/{source_config.author}/about.json")
+        author = self._parse_author(about["data"])
+        yield author
+
+        after = source_config.cursor
+        remaining = source_config.limit
+
+        while remaining > 0:
+            params = {
+                "sort": "new",
+                "limit": min(self.page_size, remaining),
+                "raw_json": 1,
+            }
+            if after:
+                params["after"] = after
+            listing = self._get_json(
+                f"/user/{source_config.author}/submitted.json", params=params
+            )["data"]
+            if after and after == source_config.cursor and not listing["children"]:
+                self._check_cursor_listing(author, source_config)
+
+            posts = []
+            all_medias = []
+            reached_date_start = False
+            for child in listing["children"]:
+                if child.get("kind") != "t3":
+                    continue
+                created = self._from_utc(child["data"].get("created_utc"))
+                if self._after_date_end(created, source_config):
+                    continue
+                remaining -= 1
+                try:
+                    post, medias = self._parse_post(child["data"], author.id)
+                except Exception as e:
+                    logger.warning(f"Failed to extract post: {str(e)}")
+                    continue
+                if post.timestamp < source_config.date_start:
+                    reached_date_start = True
+                    break
+                posts.append(post)
+                all_medias.extend(medias)
+                if remaining <= 0:
+                    break
+
+            if posts:
+                yield ExtractionBatch(posts=posts, medias=all_medias)
+
+            after = listing.get("after")
+            if reached_date_start or not after:
+                break
+
+    def slice_cursor(self, at: datetime) -> Optional[str]:
+        """Fullname of the first post created after ``at``.
+
+        Reddit assigns post ids from one base36 counter, so ids grow with the
+        creation time. The id is found by probing evenly spaced ids with
+        /api/info.json and narrowing the range around ``at``, each request
+        dividing it by ``probe_size``.
+
+        The cursor assumes that listings sorted by new resolve ``after`` with the
+        creation date of that post, whoever its author is. Reddit doesn't
+        document it, a listing started at the cursor that comes back empty
+        raises ``SliceCursorError``.
+        """
+        newest = self._get_json("/r/all/new.json", params={"limit": 1})
+        children = newest["data"]["children"]
+        if not children:
+            return None
+        high = int(children[0]["data"]["id"], 36)
+        if self._from_utc(children[0]["data"]["created_utc"]) <= at:
+            return None
+        low = 0
+
+        for _ in range(self.cursor_search_rounds):
+            if high - low <= 1:
+                break
+            step = max((high - low) // (self.probe_size + 1), 1)
+            probes = range(low + step, high, step)[: self.probe_size]
+            info = self._get_json(
+                "/api/info.json",
+                params={"id": ",".join(f"t3_{_to_base36(probe)}" for probe in probes)},
+            )
+            bounds = (low, high)
+            for child in info["data"]["children"]:
+                post_id = int(child["data"]["id"], 36)
+                if self._from_utc(child["data"]["created_utc"]) > at:
+                    high = min(high, post_id)
+                else:
+                    low = max(low, post_id)
+            if (low, high) == bounds:
+                # None of the probed ids exist (deleted, private), stop here.
+                break
+        return f"t3_{_to_base36(high)}"
+
+    def listing_reach(self, author: str) -> Optional[datetime]:
+        """Creation date of the oldest post the author's listing returns.
+
+        Listings stop after about ``listing_limit`` posts, older posts can't be
+        listed with or without a cursor. None when the listing ends before.
+        """
+        path = f"/user/{author}/submitted.json"
+        after = None
+        listed = 0
+        oldest = None
+        for _ in range(self.listing_limit // self.page_size + 1):
+            params = {"sort": "new", "limit": self.page_size, "raw_json": 1}
+            if after:
+                params["after"] = after
+            listing = self._get_json(path, params=params)["data"]
+            for child in listing["children"]:
+                listed += 1
+                oldest = self._from_utc(child["data"].get("created_utc")) or oldest
+            after = listing.get("after")
+            if not after:
+                break
+        return oldest if listed >= self.listing_limit else None
+
+    def _check_cursor_listing(self, author: Author, source_config: Source) -> None:
+        # Before the author joined the listing is empty whatever the cursor.
+        joined = author.joined_date
+        if joined is not None and source_config.date_end is not None:
+            if joined >= source_config.date_end:
+                return
+        raise SliceCursorError(
+            f"Cursor {source_config.cursor} listed no post of {source_config.author}"
+        )
+
+    def _after_date_end(
+        self, timestamp: Optional[datetime], source_config: Source
+    ) -> bool:
+        # Slices are half-open, a post on a boundary belongs to the newer one.
+        return (
+            source_config.date_end is not None
+            and timestamp is not None
+            and timestamp >= source_config.date_end
+        )
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({"User-Agent": settings.REDDIT_USER_AGENT})
+        retries = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.REDDIT_HTTP_POOL_SIZE,
+            pool_maxsize=settings.REDDIT_HTTP_POOL_SIZE,
+            max_retries=retries,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_json(self, path: str, params: Optional[dict] = None) -> dict:
+        with stage("http_fetch", "reddit"):
+            response = self.session.get(
+                f"{self.api_url}{path}",
+                params=params,
+                timeout=settings.REDDIT_HTTP_TIMEOUT,
+            )
+            response.raise_for_status()
+            return response.json()
+
+    def _parse_author(self, data: dict) -> Author:
+        return Author(
+            id=f"t2_{data['id']}",
+            name=data["name"],
+            joined_date=self._from_utc(data.get("created_utc")),
+            publication_score=max(int(data.get("link_karma") or 0), 0),
+            comment_score=max(int(data.get("comment_karma") or 0), 0),
+            url=f"{self.base_url}/user/{data['name']}",
+        )
+
+    def _parse_post(self, data: dict, author_id: str) -> Tuple[Post, List[Media]]:
+        post = Post(
+            id=data["name"],
+            text=data.get("selftext") or "",
+            title=(data.get("title") or "").strip(),
+            timestamp=self._from_utc(data["created_utc"]),
+            num_likes=int(data.get("score") or 0),
+            num_comments=int(data.get("num_comments") or 0),
+            url=f"https://reddit.com{data['permalink']}",
+            author_id=author_id,
+        )
+
+        medias = [
+            Media(
+                id=f"{post.id}_{i}",
+                post_id=post.id,
+                original_url=media_url,
+                hosted_url=None,
+            )
+            for i, media_url in enumerate(self._media_urls(data))
+        ]
+        return post, medias
+
+    def _media_urls(self, data: dict) -> List[str]:
+        urls = []
+        url = data.get("url_overridden_by_dest") or data.get("url") or ""
+        if any(ext in url for ext in MEDIA_EXTENSIONS):
+            urls.append(url)
+
+        gallery = data.get("gallery_data") or {}
+        metadata = data.get("media_metadata") or {}
+        for item in gallery.get("items", []):
+            source = metadata.get(item.get("media_id"), {}).get("s", {})
+            media_url = source.get("u")
+            if media_url and any(ext in media_url for ext in MEDIA_EXTENSIONS):
+                urls.append(media_url)
+        return urls
+
+    def _from_utc(self, timestamp: Optional[float]) -> Optional[datetime]:
+        if timestamp is None:
+            return None
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc).replace(
+            tzinfo=None
+        )
+
+
+def _to_base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+        if number == 0:
+            return encoded
+
+
+if __name__ == "__main__":
+    extractor = RedditJsonExtractor()
+    results = extractor.extract(
+        Source(
+            author="CozyBvnnies",
+            date_start=datetime.now() - timedelta(days=21),
+            source_type="reddit",
+            limit=10,
+        ),
+    )
+    print(f"Extracted {len(results.posts)} posts and {len(results.medias)} medias")
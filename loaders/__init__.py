@@ -0,0 +1,4 @@
+from loaders.base import SOURCES, TABLES, BaseLoadTarget
+from loaders.loader import Loader, create_target
+
+__all__ = ["SOURCES", "TABLES", "BaseLoadTarget", "Loader", "create_target"]
@@ -0,0 +1,88 @@
+import abc
+import typing
+from datetime import datetime
+from typing import Dict, Type
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pydantic import BaseModel
+
+from models.data_models import Author, Media, Post
+from storage.change_index import COUNTER_FIELDS
+
+
+def arrow_schema(model: Type[BaseModel]) -> pa.Schema:
+    """Warehouse columns of a model, with the time of the data they hold."""
+    fields = []
+    for name, field in model.model_fields.items():
+        types = typing.get_args(field.annotation) or (field.annotation,)
+        if int in types:
+            fields.append((name, pa.int64()))
+        elif datetime in types:
+            fields.append((name, pa.timestamp("us")))
+        else:
+            fields.append((name, pa.string()))
+    # Rows are only replaced by data at least as recent, whatever the load order.
+    fields.append(("_modified_at", pa.timestamp("us")))
+    return pa.schema(fields)
+
+
+TABLES = {
+    "authors": arrow_schema(Author),
+    "posts": arrow_schema(Post),
+    "media": arrow_schema(Media),
+}
+
+# Records are loaded before the counter deltas that update them.
+SOURCES = {
+    "authors": {"prefix": "authors/", "table": "authors"},
+    "posts": {"prefix": "posts/", "table": "posts"},
+    "media": {"prefix": "media/metadata/", "table": "media"},
+    "author_deltas": {
+        "prefix": "deltas/authors/",
+        "table": "authors",
+        "columns": COUNTER_FIELDS[Author],
+    },
+    "post_deltas": {
+        "prefix": "deltas/posts/",
+        "table": "posts",
+        "columns": COUNTER_FIELDS[Post],
+    },
+}
+
+
+def latest_per_id(rows: pa.Table) -> pa.Table:
+    """Most recent row of each id, the only one a batch may merge."""
+    if rows.num_rows < 2:
+        return rows
+    rows = rows.sort_by([("id", "ascending"), ("_modified_at", "descending")])
+    ids = rows["id"].combine_chunks()
+    first = pc.not_equal(ids.slice(1), ids.slice(0, len(ids) - 1))
+    return rows.filter(pa.concat_arrays([pa.array([True]), first]))
+
+
+class BaseLoadTarget(abc.ABC):
+    """Warehouse the stored records are loaded into.
+
+    Rows are merged by id. The loaded objects are recorded in the target, in
+    the same transaction as their rows, so each load only reads the objects
+    written or rewritten since the previous one.
+    """
+
+    @abc.abstractmethod
+    def loaded_versions(self, prefix: str) -> Dict[str, str]:
+        """Version of each object under a prefix, as of its last load"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def upsert(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        """Insert rows, or replace the rows of their id holding older data"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def update(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        """Update the columns of ``rows`` in the rows of their id holding older data"""
+        raise NotImplementedError("Method not implemented")
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,167 @@
+"""Incremental loads of the stored records into a warehouse.
+
+Each run lists the objects of every source with their modification time and
+size, skips those the target already loaded in that version, and reads the
+others concurrently. Records are cast back to their types and merged by id,
+counter deltas update the counters of the records they belong to.
+
+Usage: python -m loaders.loader [--sources posts post_deltas] [--workers 8]
+"""
+
+import argparse
+import importlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from config.config import settings
+from loaders.base import SOURCES, TABLES, BaseLoadTarget, latest_per_id
+from storage.base_storage import BaseStorageHandler, parse_column
+
+logger = logging.getLogger(__name__)
+
+
+def create_target() -> BaseLoadTarget:
+    """Load target of the LOAD_TARGET setting."""
+    target_config = settings.LOAD_TARGET
+    if not target_config["enabled"]:
+        raise ValueError("Warehouse loads are disabled in configuration")
+
+    module_path, class_name = target_config["class"].rsplit(".", 1)
+    module = importlib.import_module(module_path)
+    target_class = getattr(module, class_name)
+
+    return target_class(target_config["config"])
+
+
+def object_version(info: pafs.FileInfo) -> str:
+    return f"{info.mtime_ns}:{info.size}"
+
+
+class Loader:
+    def __init__(
+        self,
+        storage: BaseStorageHandler,
+        target: BaseLoadTarget,
+        workers: int = 8,
+        batch_files: int = 1000,
+    ):
+        self.filesystem = storage.arrow_filesystem()
+        self.target = target
+        self.workers = workers
+        self.batch_files = batch_files
+
+    def load(self, sources: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Load the new and rewritten objects of each source.
+
+        Each batch of ``batch_files`` objects is merged in one transaction, an
+        interrupted load resumes after the last merged batch.
+
+        Returns:
+            The number of objects loaded per source
+        """
+        sources = [name for name in SOURCES if sources is None or name in sources]
+        loaded = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for name in sources:
+                files = self.pending(name)
+                for start in range(0, len(files), self.batch_files):
+                    end = start + self.batch_files
+                    self._load_batch(pool, name, files[start:end])
+                loaded[name] = len(files)
+                logger.info(f"Loaded {len(files)} objects of {name}")
+        return loaded
+
+    def pending(self, name: str) -> List[pafs.FileInfo]:
+        """Objects of a source never loaded, or rewritten since."""
+        prefix = SOURCES[name]["prefix"]
+        versions = self.target.loaded_versions(prefix)
+        selector = pafs.FileSelector(prefix, recursive=True, allow_not_found=True)
+        return sorted(
+            (
+                info
+                for info in self.filesystem.get_file_info(selector)
+                if info.is_file
+                and info.path.endswith(".parquet")
+                and versions.get(info.path) != object_version(info)
+            ),
+            key=lambda info: info.path,
+        )
+
+    def _load_batch(
+        self, pool: ThreadPoolExecutor, name: str, files: List[pafs.FileInfo]
+    ) -> None:
+        source = SOURCES[name]
+        read = self._read_delta if "columns" in source else self._read_record
+        rows = latest_per_id(
+            pa.concat_tables(pool.map(lambda info: read(source, info), files))
+        )
+        versions = {info.path: object_version(info) for info in files}
+        if "columns" in source:
+            self.target.update(source["table"], rows, versions)
+        else:
+            self.target.upsert(source["table"], rows, versions)
+
+    def _read_record(self, source: dict, info: pafs.FileInfo) -> pa.Table:
+        stored = pq.read_table(info.path, filesystem=self.filesystem)
+        schema = TABLES[source["table"]]
+        columns = [
+            (
+                parse_column(stored[field.name], field.type)
+                if field.name in stored.column_names
+                else pa.nulls(stored.num_rows, field.type)
+            )
+            for field in schema
+            if field.name != "_modified_at"
+        ]
+        modified_at = info.mtime.astimezone(timezone.utc).replace(tzinfo=None)
+        columns.append(pa.array([modified_at] * stored.num_rows, pa.timestamp("us")))
+        return pa.table(columns, schema=schema)
+
+    def _read_delta(self, source: dict, info: pafs.FileInfo) -> pa.Table:
+        stored = pq.read_table(info.path, filesystem=self.filesystem)
+        schema = TABLES[source["table"]]
+        names = ["id", *source["columns"], "_modified_at"]
+        stored = stored.rename_columns(
+            [
+                "_modified_at" if name == "crawled_at" else name
+                for name in stored.column_names
+            ]
+        )
+        return pa.table(
+            [parse_column(stored[name], schema.field(name).type) for name in names],
+            schema=pa.schema([schema.field(name) for name in names]),
+        )
+
+
+def main():
+    from celery_tasks.base_task import create_storage
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", nargs="+", choices=SOURCES)
+    parser.add_argument("--workers", type=int, default=settings.LOAD_WORKERS)
+    parser.add_argument("--batch-files", type=int, default=settings.LOAD_BATCH_FILES)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    target = create_target()
+    start = time.perf_counter()
+    try:
+        loader = Loader(create_storage(), target, args.workers, args.batch_files)
+        loaded = loader.load(args.sources)
+    finally:
+        target.close()
+    elapsed = time.perf_counter() - start
+    for name, count in loaded.items():
+        print(f"{name:<14} {count:>8} objects")
+    print(f"{sum(loaded.values())} objects loaded in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
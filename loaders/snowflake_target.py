@@ -0,0 +1,139 @@
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from loaders.base import TABLES, BaseLoadTarget
+
+SQL_TYPES = {"string": "STRING", "int64": "INTEGER", "timestamp[us]": "TIMESTAMP_NTZ"}
+
+
+class SnowflakeTarget(BaseLoadTarget):
+    """Warehouse in Snowflake, through the internal stage of SNOWFLAKE_STAGE.
+
+    A batch is written as one Parquet file per worker, the files are PUT to the
+    stage concurrently, copied into a temporary table in a single COPY, then
+    merged by id. The one-row objects of the storage are never PUT one by one.
+    """
+
+    def __init__(self, config: dict):
+        import snowflake.connector
+
+        self.connection = snowflake.connector.connect(
+            account=config["account"],
+            user=config["user"],
+            password=config["password"],
+            database=config["database"],
+            schema=config["schema"],
+        )
+        self.stage = config["stage"]
+        self.workers = config.get("workers", 4)
+        with self.connection.cursor() as cursor:
+            for table, schema in TABLES.items():
+                columns = ", ".join(
+                    f"{field.name} {SQL_TYPES[str(field.type)]}"
+                    + (" PRIMARY KEY" if field.name == "id" else "")
+                    for field in schema
+                )
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS _load_manifest "
+                "(path STRING PRIMARY KEY, version STRING NOT NULL)"
+            )
+
+    def loaded_versions(self, prefix: str) -> Dict[str, str]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT path, version FROM _load_manifest WHERE STARTSWITH(path, %s)",
+                (prefix,),
+            )
+            return dict(cursor.fetchall())
+
+    def upsert(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        columns = rows.column_names
+        updates = ", ".join(f"{column} = s.{column}" for column in columns)
+        self._merge(
+            table,
+            rows,
+            versions,
+            f"MERGE INTO {table} t USING {{staged}} s ON t.id = s.id "
+            f"WHEN MATCHED AND s._modified_at >= t._modified_at "
+            f"THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) "
+            f"VALUES ({', '.join(f's.{column}' for column in columns)})",
+        )
+
+    def update(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        updates = ", ".join(
+            f"{column} = s.{column}" for column in rows.column_names if column != "id"
+        )
+        self._merge(
+            table,
+            rows,
+            versions,
+            f"MERGE INTO {table} t USING {{staged}} s ON t.id = s.id "
+            f"WHEN MATCHED AND s._modified_at > t._modified_at "
+            f"THEN UPDATE SET {updates}",
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _merge(
+        self, table: str, rows: pa.Table, versions: Dict[str, str], statement: str
+    ) -> None:
+        location = f"@{self.stage}/loads/{uuid.uuid4().hex}/"
+        staged = f"staged_{table}"
+        with tempfile.TemporaryDirectory() as directory:
+            paths = self._write_files(rows, directory)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(lambda path: self._put(path, location), paths))
+
+        with self.connection.cursor() as cursor:
+            # DDL commits the open transaction in Snowflake, the staging tables
+            # are created before it so the merge and manifest commit together.
+            cursor.execute(f"CREATE OR REPLACE TEMPORARY TABLE {staged} LIKE {table}")
+            cursor.execute(
+                "CREATE OR REPLACE TEMPORARY TABLE staged_manifest LIKE _load_manifest"
+            )
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute(
+                    f"COPY INTO {staged} FROM {location} "
+                    "FILE_FORMAT = (TYPE = PARQUET) "
+                    "MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE"
+                )
+                cursor.execute(statement.format(staged=staged))
+                cursor.executemany(
+                    "INSERT INTO staged_manifest VALUES (%s, %s)",
+                    list(versions.items()),
+                )
+                cursor.execute(
+                    "MERGE INTO _load_manifest t USING staged_manifest s "
+                    "ON t.path = s.path "
+                    "WHEN MATCHED THEN UPDATE SET version = s.version "
+                    "WHEN NOT MATCHED THEN INSERT (path, version) "
+                    "VALUES (s.path, s.version)"
+                )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def _write_files(self, rows: pa.Table, directory: str) -> List[str]:
+        paths = []
+        size = max(1, -(-rows.num_rows // self.workers))
+        for index, start in enumerate(range(0, rows.num_rows, size)):
+            path = os.path.join(directory, f"part-{index}.parquet")
+            pq.write_table(rows.slice(start, size), path)
+            paths.append(path)
+        return paths
+
+    def _put(self, path: str, location: str) -> None:
+        # One cursor per thread, the connection runs the PUTs concurrently.
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"PUT file://{path} {location} AUTO_COMPRESS = FALSE")
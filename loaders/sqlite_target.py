@@ -0,0 +1,88 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict
+
+import pyarrow as pa
+
+from loaders.base import TABLES, BaseLoadTarget
+
+SQL_TYPES = {"string": "TEXT", "int64": "INTEGER", "timestamp[us]": "TIMESTAMP"}
+
+
+def _value(value):
+    # Timestamps are stored as ISO text, which sorts like the times.
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _prefix_range(prefix: str) -> tuple:
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SqliteTarget(BaseLoadTarget):
+    """Warehouse in a local SQLite file, for offline runs, tests and benchmarks."""
+
+    def __init__(self, config: dict):
+        self.connection = sqlite3.connect(config["path"], timeout=30)
+        with self.connection:
+            for table, schema in TABLES.items():
+                columns = ", ".join(
+                    f"{field.name} {SQL_TYPES[str(field.type)]}"
+                    + (" PRIMARY KEY" if field.name == "id" else "")
+                    for field in schema
+                )
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ({columns}) WITHOUT ROWID"
+                )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS _load_manifest "
+                "(path TEXT PRIMARY KEY, version TEXT NOT NULL) WITHOUT ROWID"
+            )
+
+    def loaded_versions(self, prefix: str) -> Dict[str, str]:
+        return dict(
+            self.connection.execute(
+                "SELECT path, version FROM _load_manifest WHERE path >= ? AND path < ?",
+                _prefix_range(prefix),
+            )
+        )
+
+    def upsert(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        columns = rows.column_names
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates} "
+                f"WHERE excluded._modified_at >= {table}._modified_at",
+                self._rows(rows),
+            )
+            self._record(versions)
+
+    def update(self, table: str, rows: pa.Table, versions: Dict[str, str]) -> None:
+        columns = [column for column in rows.column_names if column != "id"]
+        updates = ", ".join(f"{column} = ?" for column in columns)
+        with self.connection:
+            self.connection.executemany(
+                f"UPDATE {table} SET {updates} WHERE id = ? AND _modified_at < ?",
+                [
+                    (*values[1:], values[0], values[-1])
+                    for values in self._rows(rows.select(["id", *columns]))
+                ],
+            )
+            self._record(versions)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _record(self, versions: Dict[str, str]) -> None:
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO _load_manifest VALUES (?, ?)", versions.items()
+        )
+
+    @staticmethod
+    def _rows(rows: pa.Table):
+        for row in zip(*(column.to_pylist() for column in rows.columns)):
+            yield tuple(_value(value) for value in row)
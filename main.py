@@ -1,10 +1,11 @@
 import argparse
 import logging
+from functools import partial
 from datetime import datetime, timedelta
 
-from celery_app import app
-from celery_tasks import tasks
+from celery_tasks import client
 from config.config import settings
+from telemetry import tracing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,19 +32,40 @@ def main():
         default=21,
         help="Number of days to look back (default: 21)",
     )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Maximum number of posts to crawl (default: CRAWL_LIMIT)",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Crawl the period in time slices on parallel workers",
+    )
     args = parser.parse_args()
 
-    app.connection().ensure_connection(timeout=3)
+    client.app.connection().ensure_connection(timeout=3)
 
     try:
-        task = tasks.crawl_author.delay(
-            author_name=args.author,
-            date_start=datetime.now() - timedelta(days=args.days),
-            source_type=args.source_type,
-        )
+        if args.backfill:
+            submit = client.backfill_author
+        else:
+            submit = partial(client.crawl_author, limit=args.limit)
+        with tracing.start_trace(
+            "submit", author=args.author, source=args.source_type
+        ) as trace:
+            task = submit(
+                author_name=args.author,
+                date_start=datetime.now() - timedelta(days=args.days),
+                source_type=args.source_type,
+            )
         logger.info(
             f"Started crawling task for {args.source_type} user {args.author}: {task.id}"
         )
+        if trace is not None:
+            logger.info(
+                f"Trace {trace.trace_id}: python -m telemetry.waterfall {trace.trace_id}"
+            )
 
     except Exception as e:
         logger.error(f"Error in main execution: {e}")
@@ -1,34 +1,89 @@
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Annotated, Any, List, Optional, Type, TypeVar
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import (
+    BaseModel,
+    Field,
+    HttpUrl,
+    PlainSerializer,
+    TypeAdapter,
+    ValidationInfo,
+    WrapValidator,
+)
 
+ModelT = TypeVar("ModelT", bound="DataModel")
 
-class Post(BaseModel):
+
+def _validate_url(value: Any, handler, info: ValidationInfo) -> Any:
+    # In trusted mode URLs produced by the pipeline itself are not parsed again.
+    if isinstance(value, str) and info.context and info.context.get("trusted"):
+        return value
+    return handler(value)
+
+
+# URLs are kept as strings when dumped, whether they were parsed or trusted.
+Url = Annotated[
+    HttpUrl,
+    WrapValidator(_validate_url),
+    PlainSerializer(str, return_type=str),
+]
+
+
+@lru_cache()
+def _list_adapter(model: Type["DataModel"]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+class DataModel(BaseModel):
+    @classmethod
+    def validate_many(
+        cls: Type[ModelT], data: List[dict], trusted: bool = False
+    ) -> List[ModelT]:
+        """Validate a list of records in a single call.
+
+        Args:
+            data: Records to validate
+            trusted: Skip URL parsing, for records produced by the pipeline itself
+
+        Returns:
+            The validated models, in the order of ``data``
+        """
+        context = {"trusted": True} if trusted else None
+        return _list_adapter(cls).validate_python(data, context=context)
+
+    @classmethod
+    def validate_one(cls: Type[ModelT], data: dict, trusted: bool = False) -> ModelT:
+        """Validate a single record, see ``validate_many``."""
+        context = {"trusted": True} if trusted else None
+        return cls.model_validate(data, context=context)
+
+
+class Post(DataModel):
     id: str
     text: Optional[str] = None
     title: Optional[str] = None
     timestamp: Optional[datetime] = None
     num_likes: Optional[int] = None
     num_comments: Optional[int] = None
-    url: Optional[HttpUrl] = None
+    url: Optional[Url] = None
     author_id: str
 
 
-class Author(BaseModel):
+class Author(DataModel):
     id: str
     name: str
     headline: Optional[str] = None
-    url: Optional[HttpUrl] = None
+    url: Optional[Url] = None
     joined_date: Optional[datetime] = None
     publication_score: Optional[int] = Field(default=0, ge=0)
     comment_score: Optional[int] = Field(default=0, ge=0)
 
 
-class Media(BaseModel):
+class Media(DataModel):
     id: str
     post_id: str
-    original_url: HttpUrl
+    original_url: Url
     hosted_url: Optional[str] = None
 
 
@@ -37,9 +92,24 @@ class Source(BaseModel):
     date_start: datetime
     source_type: str
     limit: int = 100
+    deep_crawl: Optional[bool] = None
+    # Backfill slices: posts created at or after date_end are skipped, and extractors
+    # able to seek start their listing at cursor instead of the newest post.
+    date_end: Optional[datetime] = None
+    cursor: Optional[str] = None
 
 
 class ExtractionResult(BaseModel):
     author: Author
     posts: List[Post]
     medias: List[Media]
+
+
+class ExtractionBatch(BaseModel):
+    posts: List[Post]
+    medias: List[Media]
+
+
+class RawBatch(BaseModel):
+    author_page: Optional[str] = None
+    items: List[str] = []
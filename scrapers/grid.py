@@ -0,0 +1,53 @@
+import logging
+from typing import Optional
+
+import requests
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GridCapacityError(Exception):
+    """Raised when the Selenium Grid has no free slot for a new session."""
+
+
+def grid_status(status_url: Optional[str] = None) -> dict:
+    """Read the Selenium Grid ``/status`` document."""
+    response = requests.get(
+        status_url or settings.SELENIUM_STATUS_URL,
+        timeout=settings.SELENIUM_STATUS_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()["value"]
+
+
+def count_free_slots(status: dict, browser_name: str = "chrome") -> int:
+    """Count the idle slots of available nodes able to start ``browser_name``."""
+    if not status.get("ready", False):
+        return 0
+
+    free_slots = 0
+    for node in status.get("nodes", []):
+        if node.get("availability") != "UP":
+            continue
+        for slot in node.get("slots", []):
+            stereotype = slot.get("stereotype") or {}
+            if stereotype.get("browserName", browser_name) != browser_name:
+                continue
+            if slot.get("session") is None:
+                free_slots += 1
+    return free_slots
+
+
+def free_slots(status_url: Optional[str] = None) -> Optional[int]:
+    """Number of free browser slots on the grid, or None if the hub can't tell.
+
+    An unreachable or unreadable status endpoint is not treated as a full grid:
+    the caller is expected to go ahead and let session creation fail normally.
+    """
+    try:
+        return count_free_slots(grid_status(status_url))
+    except (requests.RequestException, KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Could not read Selenium Grid status: {e}")
+        return None
@@ -0,0 +1,328 @@
+"""Offline stand-in for the Selenium WebDriver, serving recorded pages.
+
+A recording is a directory holding a ``manifest.json`` and the recorded HTML
+files. The manifest maps page URLs, or ``fnmatch`` patterns of URLs, to either a
+list of snapshots taken while scrolling::
+
+    {"pages": {"https://www.reddit.com/user/*": {"snapshots": ["0.html", "1.html"]}}}
+
+or a single page whose feed items are revealed a few at a time on every scroll::
+
+    {"pages": {"https://www.reddit.com/user/*": {
+        "page": "feed.html", "item_selector": "shreddit-post", "items_per_scroll": 10
+    }}}
+
+Only the part of the WebDriver API used by the extractors is implemented. The
+scripts of ``scrapers.selenium_scraper`` are recognised and emulated; any other
+script is accepted and ignored.
+"""
+
+import argparse
+import json
+import re
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    NoSuchElementException,
+    NoSuchWindowException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+from scrapers.selenium_scraper import (
+    COLLECT_ITEMS_SCRIPT,
+    PRUNE_ITEMS_SCRIPT,
+    SCROLL_HEIGHT_SCRIPT,
+    SCROLL_TO_BOTTOM_SCRIPT,
+    WebScraper,
+)
+
+MANIFEST = "manifest.json"
+# Height added to the page by each scroll step, only its growth matters.
+STEP_HEIGHT = 1000
+SIMPLE_XPATH = re.compile(r"^\.?//([\w-]+|\*)(?:\[@([\w-]+)='([^']*)'\])?$")
+
+
+def _to_css(by: str, value: str) -> str:
+    if by == By.CSS_SELECTOR:
+        return value
+    if by == By.ID:
+        return f'[id="{value}"]'
+    if by == By.NAME:
+        return f'[name="{value}"]'
+    if by == By.CLASS_NAME:
+        return f".{value}"
+    if by == By.TAG_NAME:
+        return value
+    if by == By.XPATH:
+        match = SIMPLE_XPATH.match(value)
+        if match:
+            tag, attribute, attribute_value = match.groups()
+            if attribute:
+                return f'{tag}[{attribute}="{attribute_value}"]'
+            return tag
+    raise InvalidSelectorException(f"Unsupported locator for replay: {by}={value}")
+
+
+class ReplayElement:
+    def __init__(self, tag):
+        self._tag = tag
+        self.keys_sent: List[str] = []
+
+    @property
+    def tag_name(self) -> str:
+        return self._tag.name
+
+    @property
+    def text(self) -> str:
+        return self._tag.get_text(" ", strip=True)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+    def send_keys(self, *values) -> None:
+        self.keys_sent.extend(str(value) for value in values)
+
+    def click(self) -> None:
+        pass
+
+    def submit(self) -> None:
+        pass
+
+
+class SnapshotPage:
+    """Page moving to the next recorded snapshot on every scroll."""
+
+    def __init__(self, snapshots: List[str]):
+        self.snapshots = snapshots
+        self.position = 0
+        self._soups: Dict[int, BeautifulSoup] = {}
+
+    @property
+    def source(self) -> str:
+        return self.snapshots[self.position]
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self.position not in self._soups:
+            self._soups[self.position] = BeautifulSoup(self.source, "html.parser")
+        return self._soups[self.position]
+
+    @property
+    def height(self) -> int:
+        return (self.position + 1) * STEP_HEIGHT
+
+    def scroll(self) -> None:
+        self.position = min(self.position + 1, len(self.snapshots) - 1)
+
+
+class GrowingPage:
+    """Page showing a few more of its feed items on every scroll."""
+
+    def __init__(self, html: str, item_selector: str, items_per_scroll: int):
+        self.soup = BeautifulSoup(html, "html.parser")
+        self.items_per_scroll = items_per_scroll
+        # Hidden items are taken out last to first, so that putting them back
+        # first to last restores each one at its recorded index.
+        self.hidden = []
+        items = self.soup.select(item_selector)
+        for item in reversed(items[items_per_scroll:]):
+            self.hidden.append((item, item.parent, item.parent.index(item)))
+            item.extract()
+        self.hidden.reverse()
+        self.shown = len(items) - len(self.hidden)
+
+    @property
+    def source(self) -> str:
+        return str(self.soup)
+
+    @property
+    def height(self) -> int:
+        return self.shown * STEP_HEIGHT
+
+    def scroll(self) -> None:
+        step = self.items_per_scroll
+        revealed, self.hidden = self.hidden[:step], self.hidden[step:]
+        for item, parent, index in revealed:
+            parent.insert(index, item)
+        self.shown += len(revealed)
+
+
+class ReplayTab:
+    def __init__(self):
+        self.url: Optional[str] = None
+        self.page = None
+        self.collected = 0
+
+
+class ReplaySwitchTo:
+    def __init__(self, driver: "ReplayDriver"):
+        self._driver = driver
+
+    def new_window(self, type_hint: Optional[str] = None) -> None:
+        self._driver._open_window()
+
+    def window(self, handle: str) -> None:
+        if handle not in self._driver._tabs:
+            raise NoSuchWindowException(f"No such window: {handle}")
+        self._driver.current_window_handle = handle
+
+
+class ReplayDriver:
+    """WebDriver replaying a recording made with ``record`` or built offline."""
+
+    def __init__(self, recording_dir):
+        self.recording_dir = Path(recording_dir)
+        manifest = json.loads((self.recording_dir / MANIFEST).read_text())
+        self.pages: Dict[str, dict] = manifest["pages"]
+        self._tabs: Dict[str, ReplayTab] = {}
+        self._next_handle = 0
+        self.current_window_handle = None
+        self.switch_to = ReplaySwitchTo(self)
+        self._open_window()
+
+    @property
+    def window_handles(self) -> List[str]:
+        return list(self._tabs)
+
+    @property
+    def _tab(self) -> ReplayTab:
+        return self._tabs[self.current_window_handle]
+
+    @property
+    def current_url(self) -> Optional[str]:
+        return self._tab.url
+
+    @property
+    def page_source(self) -> str:
+        if self._tab.page is None:
+            return "<html><head></head><body></body></html>"
+        return self._tab.page.source
+
+    def close(self) -> None:
+        del self._tabs[self.current_window_handle]
+
+    def _open_window(self) -> None:
+        handle = f"replay-{self._next_handle}"
+        self._next_handle += 1
+        self._tabs[handle] = ReplayTab()
+        self.current_window_handle = handle
+
+    def _load(self, url: str):
+        entry = self.pages.get(url)
+        if entry is None:
+            entry = next(
+                (
+                    entry
+                    for pattern, entry in self.pages.items()
+                    if fnmatch(url, pattern)
+                ),
+                None,
+            )
+        if entry is None:
+            raise WebDriverException(f"No recording for {url}")
+
+        if "snapshots" in entry:
+            return SnapshotPage(
+                [self._read(snapshot) for snapshot in entry["snapshots"]]
+            )
+        return GrowingPage(
+            self._read(entry["page"]),
+            entry["item_selector"],
+            entry.get("items_per_scroll", 10),
+        )
+
+    def _read(self, name: str) -> str:
+        return (self.recording_dir / name).read_text(encoding="utf-8")
+
+    def get(self, url: str) -> None:
+        tab = self._tab
+        tab.url = url
+        tab.page = self._load(url)
+        tab.collected = 0
+
+    def execute_script(self, script: str, *args):
+        page = self._tab.page
+        if script == SCROLL_TO_BOTTOM_SCRIPT:
+            if page is not None:
+                page.scroll()
+            return None
+        if script == SCROLL_HEIGHT_SCRIPT:
+            return page.height if page is not None else 0
+        if script in (COLLECT_ITEMS_SCRIPT, PRUNE_ITEMS_SCRIPT):
+            if page is None:
+                return []
+            # Pages only ever grow, so items already handed out are a prefix.
+            items = page.soup.select(args[0])
+            collected = self._tab.collected
+            self._tab.collected = len(items)
+            return [str(item) for item in items[collected:]]
+        return None
+
+    def find_elements(self, by: str = By.ID, value: Optional[str] = None):
+        page = self._tab.page
+        if page is None:
+            return []
+        return [ReplayElement(tag) for tag in page.soup.select(_to_css(by, value))]
+
+    def find_element(self, by: str = By.ID, value: Optional[str] = None):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matching {by}={value}")
+        return elements[0]
+
+    def set_page_load_timeout(self, time_to_wait: float) -> None:
+        pass
+
+    def set_script_timeout(self, time_to_wait: float) -> None:
+        pass
+
+    def quit(self) -> None:
+        self._tabs.clear()
+
+
+def record(url: str, recording_dir, max_snapshots: int = 50) -> Path:
+    """Record the snapshots of a live page while it is being scrolled.
+
+    Pages needing a login have to be recorded with a session already logged in,
+    e.g. by running the extractor's ``_start_session`` on the driver first.
+    """
+    recording_dir = Path(recording_dir)
+    recording_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = recording_dir / MANIFEST
+    manifest = {"pages": {}}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+    prefix = f"page_{len(manifest['pages']):03d}"
+
+    scraper = WebScraper()
+    snapshots = []
+
+    with scraper.create_driver() as driver:
+        driver.get(url)
+        for _ in scraper.iter_scroll(driver):
+            name = f"{prefix}_{len(snapshots):03d}.html"
+            (recording_dir / name).write_text(driver.page_source, encoding="utf-8")
+            snapshots.append(name)
+            if len(snapshots) >= max_snapshots:
+                break
+
+    manifest["pages"][url] = {"snapshots": snapshots}
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return recording_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a page for replay.")
+    parser.add_argument("url")
+    parser.add_argument("recording_dir")
+    parser.add_argument("--max-snapshots", type=int, default=50)
+    args = parser.parse_args()
+    record(args.url, args.recording_dir, args.max_snapshots)
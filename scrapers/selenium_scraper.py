@@ -9,6 +9,41 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 from config.config import settings
+from telemetry import metrics, stage
+
+SCROLL_TO_BOTTOM_SCRIPT = "window.scrollTo(0, document.documentElement.scrollHeight);"
+SCROLL_HEIGHT_SCRIPT = "return document.documentElement.scrollHeight"
+COLLECT_ITEMS_SCRIPT = """
+const items = document.querySelectorAll(arguments[0] + ':not([data-crawled])');
+return Array.from(items, (item) => {
+    item.setAttribute('data-crawled', '');
+    return item.outerHTML;
+});
+"""
+# Collected items are removed from the DOM and replaced by a single spacer of the
+# same total height, so the page keeps its scroll position and scrollHeight keeps
+# growing while Chrome memory stays flat.
+PRUNE_ITEMS_SCRIPT = """
+const items = document.querySelectorAll(arguments[0]);
+if (!items.length) {
+    return [];
+}
+let spacer = document.getElementById('crawler-spacer');
+if (!spacer) {
+    spacer = document.createElement('div');
+    spacer.id = 'crawler-spacer';
+    items[0].before(spacer);
+}
+let height = parseFloat(spacer.style.height || '0');
+const html = Array.from(items, (item) => {
+    height += item.getBoundingClientRect().height;
+    const outerHTML = item.outerHTML;
+    item.remove();
+    return outerHTML;
+});
+spacer.style.height = height + 'px';
+return html;
+"""
 
 
 class WebScraper:
@@ -21,48 +56,146 @@ class WebScraper:
         self.chrome_options.add_argument(
             "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         )
+        # Keep background tabs loading at full speed for multi-author crawls.
+        self.chrome_options.add_argument("--disable-background-timer-throttling")
+        self.chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+        self.chrome_options.add_argument("--disable-renderer-backgrounding")
 
     @contextmanager
     def create_driver(self):
-        driver = webdriver.Remote(
-            command_executor=settings.SELENIUM_HUB_URL,
-            options=self.chrome_options,
-        )
+        with stage("driver_startup"):
+            if settings.SELENIUM_DRIVER == "replay":
+                from scrapers.replay_driver import ReplayDriver
+
+                driver = ReplayDriver(settings.SELENIUM_REPLAY_DIR)
+            else:
+                driver = webdriver.Remote(
+                    command_executor=settings.SELENIUM_HUB_URL,
+                    options=self.chrome_options,
+                )
 
-        driver.set_page_load_timeout(45)
-        driver.set_script_timeout(45)
+            driver.set_page_load_timeout(45)
+            driver.set_script_timeout(45)
 
+        metrics.SESSIONS_IN_FLIGHT.inc()
         try:
             yield driver
         finally:
+            metrics.SESSIONS_IN_FLIGHT.dec()
             driver.quit()
 
     def wait_for_element(self, driver, selector, timeout=30):
         WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.XPATH, selector))
         )
-        time.sleep(2)
+        time.sleep(settings.SELENIUM_SETTLE_PAUSE)
+
+    def scroll_page(self, driver):
+        for _ in self.iter_scroll(driver):
+            pass
+
+    def iter_scroll(self, driver, max_attempts=5):
+        """Scroll to the bottom until the page stops growing.
 
-    def scroll_page(self, driver, scroll_pause_time=2):
+        Yields once before the first scroll and then after every scroll that
+        loaded new content, so callers can read items while scrolling goes on.
+        """
+        yield
         last_height = 0
         attempt = 0
 
-        while attempt < 5:
-            driver.execute_script(
-                "window.scrollTo(0, document.documentElement.scrollHeight);"
-            )
-            time.sleep(3)
+        while attempt < max_attempts:
+            with stage("scroll"):
+                driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+                time.sleep(settings.SELENIUM_SCROLL_PAUSE)
 
-            try:
-                WebDriverWait(driver, 10).until(
-                    lambda d: d.execute_script(
-                        "return document.documentElement.scrollHeight"
+                try:
+                    WebDriverWait(driver, settings.SELENIUM_SCROLL_TIMEOUT).until(
+                        lambda d: d.execute_script(SCROLL_HEIGHT_SCRIPT) > last_height
                     )
-                    > last_height
-                )
-                last_height = driver.execute_script(
-                    "return document.documentElement.scrollHeight"
-                )
-                attempt = 0
-            except TimeoutException:
+                    grew = True
+                except TimeoutException:
+                    grew = False
+
+            if not grew:
                 attempt += 1
+                continue
+            last_height = driver.execute_script(SCROLL_HEIGHT_SCRIPT)
+            attempt = 0
+            yield
+
+    def open_tab(self, driver, first=False):
+        """Switch to a fresh tab and return its window handle.
+
+        The window the session starts with is reused for the first tab.
+        """
+        if not first:
+            driver.switch_to.new_window("tab")
+        return driver.current_window_handle
+
+    def close_tab(self, driver):
+        """Close the current tab, switch to another one before using the driver."""
+        driver.close()
+
+    def iter_scroll_tabs(self, driver, handles, finished, max_attempts=5):
+        """Scroll several tabs in turn until none of them grows anymore.
+
+        Every round scrolls all active tabs and then pauses once, so the waits of
+        all tabs overlap. Yields a tab handle, with that tab switched to, once
+        before its first scroll and then whenever its page grew. Handles added
+        to ``finished`` by the caller are not scrolled anymore. A tab is given up
+        after ``max_attempts`` rounds without growth, and no sooner than
+        ``iter_scroll`` would give up on it.
+        """
+        scroll_pause_time = settings.SELENIUM_SCROLL_PAUSE
+        idle_timeout = max_attempts * (
+            scroll_pause_time + settings.SELENIUM_SCROLL_TIMEOUT
+        )
+        last_heights = {}
+        last_growth = {}
+        idle_rounds = {}
+        for handle in handles:
+            driver.switch_to.window(handle)
+            yield handle
+            last_heights[handle] = 0
+            last_growth[handle] = time.monotonic()
+            idle_rounds[handle] = 0
+
+        while True:
+            active = [
+                handle
+                for handle in handles
+                if handle not in finished
+                and (
+                    idle_rounds[handle] < max_attempts
+                    or time.monotonic() - last_growth[handle] < idle_timeout
+                )
+            ]
+            if not active:
+                return
+
+            with stage("scroll"):
+                for handle in active:
+                    driver.switch_to.window(handle)
+                    driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+                time.sleep(scroll_pause_time)
+
+            for handle in active:
+                driver.switch_to.window(handle)
+                height = driver.execute_script(SCROLL_HEIGHT_SCRIPT)
+                if height > last_heights[handle]:
+                    last_heights[handle] = height
+                    last_growth[handle] = time.monotonic()
+                    idle_rounds[handle] = 0
+                    yield handle
+                else:
+                    idle_rounds[handle] += 1
+
+    def collect_items(self, driver, css_selector, prune=False):
+        """Return the outer HTML of items matching the selector not collected yet.
+
+        With ``prune`` the collected items are also removed from the page.
+        """
+        script = PRUNE_ITEMS_SCRIPT if prune else COLLECT_ITEMS_SCRIPT
+        with stage("collect_items"):
+            return driver.execute_script(script, css_selector)
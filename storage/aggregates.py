@@ -0,0 +1,421 @@
+"""Aggregates of the stored posts, maintained as posts are stored.
+
+Each storage batch updates, per author, its most liked post and its number of
+posts, and per author and week (starting on Monday) its most liked post. A
+re-crawled post is never counted twice. ``SqliteAggregates`` keeps every
+post's author and week, so a post whose likes, author or week changed moves
+between groups; ``RedisAggregates`` keeps the aggregates alone. Reads never
+scan the posts: they cost one lookup per author or week.
+
+Rows have the same columns and order as the queries of ``analytics.queries``,
+which remain the way to query a date range.
+"""
+
+import abc
+import importlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import redis
+
+from config.config import settings
+from models.data_models import Author, Post
+from storage.base_storage import BaseStorageHandler, parse_column
+
+logger = logging.getLogger(__name__)
+
+# Aggregated fields of a post: id, author_id, week, num_likes, title.
+PostRow = Tuple[str, str, Optional[str], Optional[int], Optional[str]]
+
+
+def week_of(timestamp: Optional[datetime]) -> Optional[str]:
+    """ISO date of the Monday starting the UTC week of a timestamp."""
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return (timestamp.date() - timedelta(days=timestamp.weekday())).isoformat()
+
+
+def post_row(post: Post) -> PostRow:
+    return (
+        post.id,
+        post.author_id,
+        week_of(post.timestamp),
+        post.num_likes,
+        post.title,
+    )
+
+
+def _best_first(row: Dict) -> tuple:
+    # Most likes first, posts without likes last.
+    likes = row["num_likes"]
+    return (likes is None, -(likes or 0))
+
+
+class BaseAggregates(abc.ABC):
+    @abc.abstractmethod
+    def update_posts(self, rows: Sequence[PostRow]) -> None:
+        """Add stored posts to the aggregates, or move them if they changed"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def set_author_names(self, names: Dict[str, str]) -> None:
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def top_post_per_author(self) -> List[Dict]:
+        """Most liked post of each author"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def top_post_per_author_weekly(self) -> List[Dict]:
+        """Most liked post of each author for each week"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def top_authors(self, limit: int = 10) -> List[Dict]:
+        """Authors with the most posts"""
+        raise NotImplementedError("Method not implemented")
+
+    def update(self, posts: Sequence[Post], author: Optional[Author] = None) -> None:
+        if author is not None:
+            self.set_author_names({author.id: author.name})
+        if posts:
+            # A post crawled twice in a batch counts once, with its last values.
+            rows = {post.id: post_row(post) for post in posts}
+            self.update_posts(list(rows.values()))
+
+
+class SqliteAggregates(BaseAggregates):
+    """Aggregates in a local SQLite file, shared by the workers of one host."""
+
+    def __init__(self, config: dict):
+        self.path = config["path"]
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id TEXT PRIMARY KEY, author_id TEXT NOT NULL, week TEXT,
+                    num_likes INTEGER, title TEXT) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS posts_by_author
+                    ON posts (author_id, num_likes DESC, id);
+                CREATE INDEX IF NOT EXISTS posts_by_week
+                    ON posts (author_id, week, num_likes DESC, id);
+                CREATE TABLE IF NOT EXISTS authors (
+                    id TEXT PRIMARY KEY, name TEXT,
+                    post_count INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS authors_by_count
+                    ON authors (post_count DESC, id);
+                CREATE TABLE IF NOT EXISTS best_posts (
+                    author_id TEXT PRIMARY KEY, post_id TEXT NOT NULL) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS best_weekly_posts (
+                    author_id TEXT NOT NULL, week TEXT NOT NULL,
+                    post_id TEXT NOT NULL,
+                    PRIMARY KEY (author_id, week)) WITHOUT ROWID;
+                """)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def update_posts(self, rows: Sequence[PostRow]) -> None:
+        with self._connection() as connection:
+            groups = set()
+            for row in rows:
+                post_id, author_id, week = row[:3]
+                previous = connection.execute(
+                    "SELECT author_id, week FROM posts WHERE id = ?", (post_id,)
+                ).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?)", row
+                )
+                if previous is None or previous[0] != author_id:
+                    self._add_count(connection, author_id, 1)
+                    if previous is not None:
+                        self._add_count(connection, previous[0], -1)
+                # A week of None stands for all the author's posts.
+                groups.update([(author_id, week), (author_id, None)])
+                if previous is not None:
+                    groups.update([tuple(previous), (previous[0], None)])
+            for author_id, week in groups:
+                self._refresh_best(connection, author_id, week)
+
+    @staticmethod
+    def _add_count(connection: sqlite3.Connection, author_id: str, count: int):
+        connection.execute(
+            "INSERT INTO authors (id, post_count) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET post_count = post_count + excluded.post_count",
+            (author_id, count),
+        )
+
+    @staticmethod
+    def _refresh_best(
+        connection: sqlite3.Connection, author_id: str, week: Optional[str]
+    ):
+        # One index seek per group whose posts changed.
+        if week is None:
+            best = connection.execute(
+                "SELECT id FROM posts WHERE author_id = ? "
+                "ORDER BY num_likes DESC, id LIMIT 1",
+                (author_id,),
+            ).fetchone()
+            if best is None:
+                connection.execute(
+                    "DELETE FROM best_posts WHERE author_id = ?", (author_id,)
+                )
+            else:
+                connection.execute(
+                    "INSERT OR REPLACE INTO best_posts VALUES (?, ?)",
+                    (author_id, best[0]),
+                )
+            return
+        best = connection.execute(
+            "SELECT id FROM posts WHERE author_id = ? AND week = ? "
+            "ORDER BY num_likes DESC, id LIMIT 1",
+            (author_id, week),
+        ).fetchone()
+        if best is None:
+            connection.execute(
+                "DELETE FROM best_weekly_posts WHERE author_id = ? AND week = ?",
+                (author_id, week),
+            )
+        else:
+            connection.execute(
+                "INSERT OR REPLACE INTO best_weekly_posts VALUES (?, ?, ?)",
+                (author_id, week, best[0]),
+            )
+
+    def set_author_names(self, names: Dict[str, str]) -> None:
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO authors (id, name) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name",
+                list(names.items()),
+            )
+
+    def top_post_per_author(self) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT p.id, p.title, p.author_id, a.name, p.num_likes "
+            "FROM best_posts b JOIN posts p ON p.id = b.post_id "
+            "JOIN authors a ON a.id = b.author_id WHERE a.name IS NOT NULL "
+            "ORDER BY p.num_likes IS NULL, p.num_likes DESC, p.author_id"
+        )
+        columns = ("post_id", "title", "author_id", "author_name", "num_likes")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def top_post_per_author_weekly(self) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT p.id, p.title, p.author_id, a.name, b.week, p.num_likes "
+            "FROM best_weekly_posts b JOIN posts p ON p.id = b.post_id "
+            "JOIN authors a ON a.id = b.author_id WHERE a.name IS NOT NULL "
+            "ORDER BY b.week DESC, p.num_likes IS NULL, p.num_likes DESC, p.author_id"
+        )
+        columns = ("post_id", "title", "author_id", "author_name", "week", "num_likes")
+        return [
+            {**dict(zip(columns, row)), "week": datetime.fromisoformat(row[4])}
+            for row in rows
+        ]
+
+    def top_authors(self, limit: int = 10) -> List[Dict]:
+        rows = self._connection().execute(
+            "SELECT id, name, post_count FROM authors "
+            "WHERE name IS NOT NULL AND post_count > 0 "
+            "ORDER BY post_count DESC, id LIMIT ?",
+            (limit,),
+        )
+        columns = ("author_id", "author_name", "post_count")
+        return [dict(zip(columns, row)) for row in rows]
+
+
+# Offers each post as the best post of its author and of its author and week,
+# and counts it in its author's HyperLogLog, atomically so concurrent workers
+# never lose an update. ARGV: the key prefix, then id, author_id, week ("" for
+# none) and likes ("" for none) of each post. Best posts are stored as
+# "likes|id".
+UPDATE_SCRIPT = """
+local prefix = ARGV[1]
+-- Most likes first, posts without likes last, ties going to the lowest id.
+local function before(likes, id, other_likes, other_id)
+    if likes ~= other_likes then
+        if not likes then return false end
+        if not other_likes then return true end
+        return likes > other_likes
+    end
+    return id < other_id
+end
+local function offer(key, group, id, likes)
+    local best = redis.call('HGET', key, group)
+    if best then
+        local best_likes, best_id = string.match(best, '^([^|]*)|(.*)$')
+        if best_id ~= id and not before(likes, id, tonumber(best_likes), best_id) then
+            return
+        end
+    end
+    redis.call('HSET', key, group, (likes or '') .. '|' .. id)
+end
+local authors = {}
+for i = 2, #ARGV, 4 do
+    local id, author, week = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+    local likes = tonumber(ARGV[i + 3])
+    offer(prefix .. ':best', author, id, likes)
+    if week ~= '' then
+        offer(prefix .. ':weekly', author .. '|' .. week, id, likes)
+    end
+    if redis.call('PFADD', prefix .. ':seen:' .. author, id) == 1 then
+        authors[author] = true
+    end
+end
+for author in pairs(authors) do
+    local count = redis.call('PFCOUNT', prefix .. ':seen:' .. author)
+    redis.call('ZADD', prefix .. ':counts', -count, author)
+end
+"""
+
+
+class RedisAggregates(BaseAggregates):
+    """Aggregates shared by all storage workers, kept in a few Redis keys.
+
+    Only the aggregates are kept, so memory grows with the number of authors
+    and weeks rather than with the posts: a hash of the best post per author,
+    one per author and week, and a HyperLogLog of the post ids of each author,
+    whose estimate is copied to a sorted set of authors scored by minus their
+    count. Titles are read from the stored posts when the rows are read.
+
+    Posts are not remembered, so unlike ``SqliteAggregates`` a best post that
+    lost likes keeps its place until another post beats it, and a post moved
+    to another author or week stays in its previous groups.
+    """
+
+    def __init__(self, config: dict, storage: Optional[BaseStorageHandler] = None):
+        self.client = redis.Redis.from_url(config["url"], decode_responses=True)
+        self.prefix = config.get("prefix", "aggregates")
+        self._update = self.client.register_script(UPDATE_SCRIPT)
+        self._storage = storage
+
+    @property
+    def storage(self) -> BaseStorageHandler:
+        if self._storage is None:
+            # Only reads need the storage, for the titles.
+            from celery_tasks.base_task import create_storage
+
+            self._storage = create_storage()
+        return self._storage
+
+    def update_posts(self, rows: Sequence[PostRow]) -> None:
+        args = [self.prefix]
+        for post_id, author_id, week, num_likes, _ in rows:
+            likes = "" if num_likes is None else num_likes
+            args += [post_id, author_id, week or "", likes]
+        self._update(args=args)
+
+    def set_author_names(self, names: Dict[str, str]) -> None:
+        self.client.hset(f"{self.prefix}:names", mapping=names)
+
+    def top_post_per_author(self) -> List[Dict]:
+        best = self.client.hgetall(f"{self.prefix}:best")
+        rows = self._best_posts(
+            [((author, None), post) for author, post in best.items()]
+        )
+        return sorted(rows, key=lambda row: (*_best_first(row), row["author_id"]))
+
+    def top_post_per_author_weekly(self) -> List[Dict]:
+        best = self.client.hgetall(f"{self.prefix}:weekly")
+        rows = self._best_posts(
+            [(tuple(group.rsplit("|", 1)), post) for group, post in best.items()]
+        )
+        rows.sort(key=lambda row: (*_best_first(row), row["author_id"]))
+        rows.sort(key=lambda row: row["week"], reverse=True)
+        return rows
+
+    def top_authors(self, limit: int = 10) -> List[Dict]:
+        rows = []
+        start = 0
+        # Authors whose name is unknown are skipped, as by the notebook's join.
+        while len(rows) < limit:
+            counts = self.client.zrange(
+                f"{self.prefix}:counts", start, start + limit - 1, withscores=True
+            )
+            if not counts:
+                break
+            names = self.client.hmget(
+                f"{self.prefix}:names", [author for author, _ in counts]
+            )
+            rows += [
+                {"author_id": author, "author_name": name, "post_count": int(-count)}
+                for (author, count), name in zip(counts, names)
+                if name is not None and count < 0
+            ]
+            start += limit
+        return rows[:limit]
+
+    def _best_posts(self, best: List[Tuple[tuple, str]]) -> List[Dict]:
+        if not best:
+            return []
+        names = self.client.hmget(
+            f"{self.prefix}:names", [author for (author, _), _ in best]
+        )
+        rows = []
+        for ((author, week), post), name in zip(best, names):
+            if name is None:
+                continue
+            likes, post_id = post.split("|", 1)
+            row = {
+                "post_id": post_id,
+                "title": None,
+                "author_id": author,
+                "author_name": name,
+            }
+            if week is not None:
+                row["week"] = datetime.fromisoformat(week)
+            row["num_likes"] = int(likes) if likes else None
+            rows.append(row)
+        titles = stored_titles(self.storage, [row["post_id"] for row in rows])
+        for row in rows:
+            row["title"] = titles.get(row["post_id"])
+        return rows
+
+
+def stored_titles(
+    storage: BaseStorageHandler, post_ids: List[str]
+) -> Dict[str, Optional[str]]:
+    """Titles of stored posts, read from their objects in one dataset scan.
+
+    Titles are only displayed, when they can't be read they are left out.
+    """
+    if not post_ids:
+        return {}
+    paths = [f"posts/{post_id}.parquet" for post_id in dict.fromkeys(post_ids)]
+    try:
+        table = ds.dataset(
+            paths,
+            schema=pa.schema([("id", pa.string()), ("title", pa.string())]),
+            format="parquet",
+            filesystem=storage.arrow_filesystem(),
+        ).to_table(columns=["id", "title"])
+    except Exception as e:
+        logger.warning(f"Could not read the titles of {len(paths)} posts: {e}")
+        return {}
+    titles = parse_column(table.column("title"), pa.string())
+    return dict(zip(table.column("id").to_pylist(), titles.to_pylist()))
+
+
+def create_aggregates() -> Optional[BaseAggregates]:
+    """Aggregates backend of the AGGREGATES setting, None when disabled."""
+    aggregates_config = settings.AGGREGATES
+    if not aggregates_config["enabled"]:
+        return None
+    module_path, class_name = aggregates_config["class"].rsplit(".", 1)
+    module = importlib.import_module(module_path)
+    aggregates_class = getattr(module, class_name)
+
+    return aggregates_class(aggregates_config["config"])
@@ -1,6 +1,52 @@
 import abc
+import uuid
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 
 from models.data_models import Author, Media, Post
+from telemetry import stage
+
+
+def row_table(data: Dict) -> pa.Table:
+    """Single row table of a dumped model, every value stored as a string"""
+    converted_data = {}
+    for key, value in data.items():
+        if isinstance(value, str):
+            converted_data[key] = [str(value)]
+        elif hasattr(value, "__str__"):
+            converted_data[key] = [str(value)]
+        else:
+            converted_data[key] = [value]
+    return pa.Table.from_pydict(converted_data)
+
+
+def parse_column(array: pa.ChunkedArray, type: pa.DataType) -> pa.ChunkedArray:
+    """Cast a column written by ``row_table`` back to its type, "None" being null"""
+    if not pa.types.is_string(array.type):
+        return pc.cast(array, type)
+    null = pa.scalar(None, pa.string())
+    array = pc.if_else(pc.equal(array, "None"), null, array)
+    if not pa.types.is_timestamp(type):
+        return pc.cast(array, type)
+    # Aware datetimes end with their UTC offset, they are kept as naive UTC.
+    aware = pc.match_substring_regex(array, r"[+-]\d\d:\d\d$")
+    utc = pc.cast(
+        pc.cast(pc.if_else(aware, array, null), pa.timestamp("us", tz="UTC")), type
+    )
+    return pc.coalesce(utc, pc.cast(pc.if_else(aware, null, array), type))
+
+
+def parquet_bytes(table: pa.Table, **options) -> bytes:
+    buffer = BytesIO()
+    with stage("parquet_encode"):
+        pq.write_table(table, buffer, **options)
+    return buffer.getvalue()
 
 
 class BaseStorageHandler(abc.ABC):
@@ -24,3 +70,40 @@ class BaseStorageHandler(abc.ABC):
     def store_media(self, media: Media) -> None:
         """Store the media in the bucket"""
         raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def put_bytes(
+        self, path: str, data: bytes, content_type: str = "application/octet-stream"
+    ) -> None:
+        """Write an object to the data bucket"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def get_bytes(self, path: str) -> bytes:
+        """Read an object from the data bucket"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def list_paths(self, prefix: str) -> List[str]:
+        """Paths of the objects of the data bucket under a prefix, sorted"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def delete_paths(self, paths: List[str]) -> None:
+        """Delete objects of the data bucket, missing ones are ignored"""
+        raise NotImplementedError("Method not implemented")
+
+    def arrow_filesystem(self) -> pafs.FileSystem:
+        """Arrow filesystem rooted at the data bucket, to scan objects as datasets"""
+        raise NotImplementedError("Method not implemented")
+
+    def store_deltas(self, kind: str, rows: List[Dict]) -> None:
+        """Store counters-only changes of records, stamped with the crawl time"""
+        if not rows:
+            return
+        crawled_at = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        table = pa.Table.from_pylist(rows).append_column(
+            "crawled_at", pa.array([crawled_at] * len(rows), type=pa.timestamp("us"))
+        )
+        path = f"deltas/{kind}/{crawled_at:%Y-%m-%d}/{uuid.uuid4().hex}.parquet"
+        self.put_bytes(path, parquet_bytes(table), "application/parquet")
@@ -0,0 +1,167 @@
+import abc
+import enum
+import hashlib
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import redis
+from pydantic import BaseModel
+
+from models.data_models import Author, Post
+
+# Fields whose change requires rewriting the full record. Post timestamps are
+# left out: relative dates ("2d ago") are resolved at crawl time and drift.
+CONTENT_FIELDS: Dict[Type[BaseModel], Tuple[str, ...]] = {
+    Post: ("author_id", "text", "title", "url"),
+    Author: ("name", "headline", "url", "joined_date"),
+}
+# Engagement counters, stored as small delta records when only they changed.
+COUNTER_FIELDS: Dict[Type[BaseModel], Tuple[str, ...]] = {
+    Post: ("num_likes", "num_comments"),
+    Author: ("publication_score", "comment_score"),
+}
+
+
+class Change(enum.Enum):
+    NEW = "new"
+    CONTENT = "content"
+    COUNTERS = "counters"
+    UNCHANGED = "unchanged"
+
+
+def _digest(values) -> str:
+    content = "\x1f".join("" if value is None else str(value) for value in values)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def record_digest(record: BaseModel) -> str:
+    """``<content digest>:<counters digest>`` of the normalized record fields."""
+    model = type(record)
+    content = _digest(getattr(record, field) for field in CONTENT_FIELDS[model])
+    counters = _digest(getattr(record, field) for field in COUNTER_FIELDS[model])
+    return f"{content}:{counters}"
+
+
+def counters_row(record: BaseModel) -> dict:
+    """Counters-only delta of a record."""
+    row = {"id": record.id}
+    row.update(
+        {field: getattr(record, field) for field in COUNTER_FIELDS[type(record)]}
+    )
+    return row
+
+
+def classify(stored: Optional[str], digest: str) -> Change:
+    if stored is None:
+        return Change.NEW
+    if stored == digest:
+        return Change.UNCHANGED
+    if stored.split(":")[0] != digest.split(":")[0]:
+        return Change.CONTENT
+    return Change.COUNTERS
+
+
+class BaseChangeIndex(abc.ABC):
+    """Maps the id of each stored record to the digest of its stored version."""
+
+    @abc.abstractmethod
+    def get_digests(self, kind: str, ids: Sequence[str]) -> List[Optional[str]]:
+        """Stored digests of the records, None for records never stored"""
+        raise NotImplementedError("Method not implemented")
+
+    @abc.abstractmethod
+    def set_digests(self, kind: str, digests: Dict[str, str]) -> None:
+        """Record the digests of records just stored"""
+        raise NotImplementedError("Method not implemented")
+
+    def changes(self, kind: str, records: Sequence[BaseModel]) -> List[Change]:
+        """Compare records with their stored versions, in a single lookup."""
+        if not records:
+            return []
+        stored = self.get_digests(kind, [record.id for record in records])
+        return [
+            classify(digest, record_digest(record))
+            for digest, record in zip(stored, records)
+        ]
+
+    def commit(self, kind: str, records: Sequence[BaseModel]) -> None:
+        if records:
+            self.set_digests(
+                kind, {record.id: record_digest(record) for record in records}
+            )
+
+
+class MemoryChangeIndex(BaseChangeIndex):
+    """Change index kept in the worker process, for tests and single workers."""
+
+    def __init__(self, config: Optional[dict] = None):
+        self._digests: Dict[str, Dict[str, str]] = defaultdict(dict)
+
+    def get_digests(self, kind: str, ids: Sequence[str]) -> List[Optional[str]]:
+        digests = self._digests[kind]
+        return [digests.get(record_id) for record_id in ids]
+
+    def set_digests(self, kind: str, digests: Dict[str, str]) -> None:
+        self._digests[kind].update(digests)
+
+
+class SqliteChangeIndex(BaseChangeIndex):
+    """Change index in a local SQLite file, shared by the workers of one host."""
+
+    def __init__(self, config: dict):
+        self.path = config["path"]
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "kind TEXT NOT NULL, id TEXT NOT NULL, digest TEXT NOT NULL, "
+                "PRIMARY KEY (kind, id)) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def get_digests(self, kind: str, ids: Sequence[str]) -> List[Optional[str]]:
+        connection = self._connection()
+        found = {}
+        # Stay below SQLite's limit on the number of bound parameters.
+        for start in range(0, len(ids), 500):
+            end = start + 500
+            chunk = list(ids[start:end])
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                connection.execute(
+                    f"SELECT id, digest FROM digests WHERE kind = ? "
+                    f"AND id IN ({placeholders})",
+                    [kind, *chunk],
+                ).fetchall()
+            )
+        return [found.get(record_id) for record_id in ids]
+
+    def set_digests(self, kind: str, digests: Dict[str, str]) -> None:
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO digests (kind, id, digest) VALUES (?, ?, ?)",
+                [(kind, record_id, digest) for record_id, digest in digests.items()],
+            )
+
+
+class RedisChangeIndex(BaseChangeIndex):
+    """Change index shared by all storage workers, one Redis hash per kind."""
+
+    def __init__(self, config: dict):
+        self.client = redis.Redis.from_url(config["url"], decode_responses=True)
+        self.prefix = config.get("prefix", "digests")
+
+    def get_digests(self, kind: str, ids: Sequence[str]) -> List[Optional[str]]:
+        return self.client.hmget(f"{self.prefix}:{kind}", list(ids))
+
+    def set_digests(self, kind: str, digests: Dict[str, str]) -> None:
+        self.client.hset(f"{self.prefix}:{kind}", mapping=digests)
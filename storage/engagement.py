@@ -0,0 +1,244 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from io import BytesIO
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from models.data_models import Post
+from storage.base_storage import BaseStorageHandler, parquet_bytes
+
+ENGAGEMENT_SCHEMA = pa.schema(
+    [
+        ("post_id", pa.string()),
+        ("crawled_at", pa.timestamp("us")),
+        ("num_likes", pa.int64()),
+        ("num_comments", pa.int64()),
+    ]
+)
+
+# Points are sorted by post and time, so consecutive values are close and
+# delta-encode to a few bits each; post ids repeat and are dictionary-encoded.
+WRITE_OPTIONS = {
+    "use_dictionary": ["post_id"],
+    "column_encoding": {
+        "crawled_at": "DELTA_BINARY_PACKED",
+        "num_likes": "DELTA_BINARY_PACKED",
+        "num_comments": "DELTA_BINARY_PACKED",
+    },
+    "compression": "zstd",
+    "row_group_size": 10000,
+}
+
+METRICS = ("num_likes", "num_comments")
+
+# Name of the single file a closed day partition is rewritten into.
+COMPACTED = "compacted.parquet"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class EngagementStore:
+    """Time series of the like and comment counts of posts.
+
+    Every crawl appends one point per post to an immutable Parquet file under
+    ``engagement/day=YYYY-MM-DD/``. Only those four columns are stored, so
+    queries never read post bodies, and a query over a time window only reads
+    the day partitions it overlaps. Once a day is over, ``compact`` rewrites its
+    partition into a single file.
+    """
+
+    prefix = "engagement"
+
+    def __init__(self, storage: BaseStorageHandler):
+        self.storage = storage
+
+    def append(
+        self, posts: List[Post], crawled_at: Optional[datetime] = None
+    ) -> Optional[str]:
+        """Append the current counts of the posts as one file.
+
+        Returns:
+            The path of the written file, None when there was nothing to write
+        """
+        if not posts:
+            return None
+        if crawled_at is None:
+            crawled_at = datetime.now(tz=timezone.utc)
+        crawled_at = _naive_utc(crawled_at)
+
+        table = pa.Table.from_pydict(
+            {
+                "post_id": [post.id for post in posts],
+                "crawled_at": [crawled_at] * len(posts),
+                "num_likes": [post.num_likes for post in posts],
+                "num_comments": [post.num_comments for post in posts],
+            },
+            schema=ENGAGEMENT_SCHEMA,
+        ).sort_by([("post_id", "ascending")])
+
+        path = f"{self.prefix}/day={crawled_at:%Y-%m-%d}/{uuid.uuid4().hex}.parquet"
+        data = parquet_bytes(table, **WRITE_OPTIONS)
+        self.storage.put_bytes(path, data, "application/parquet")
+        return path
+
+    def compact(self, day: date) -> Optional[str]:
+        """Rewrite the files of a day partition into a single file.
+
+        Appends go to the partition of the current day, so only past days are
+        compacted. Points are deduplicated, a compaction interrupted before the
+        small files were deleted is completed by running it again.
+
+        Returns:
+            The path of the compacted file, None when there was nothing to compact
+        """
+        prefix = f"{self.prefix}/day={day}/"
+        path = f"{prefix}{COMPACTED}"
+        paths = self.storage.list_paths(prefix)
+        if paths in ([], [path]):
+            return None
+
+        table = pa.concat_tables(
+            pq.read_table(
+                BytesIO(self.storage.get_bytes(part)), schema=ENGAGEMENT_SCHEMA
+            )
+            for part in paths
+        )
+        grouped = table.group_by(
+            ["post_id", "crawled_at"], use_threads=False
+        ).aggregate([(metric, "last") for metric in METRICS])
+        table = pa.table(
+            [
+                grouped[f"{name}_last" if name in METRICS else name]
+                for name in ENGAGEMENT_SCHEMA.names
+            ],
+            schema=ENGAGEMENT_SCHEMA,
+        ).sort_by([("post_id", "ascending"), ("crawled_at", "ascending")])
+        self.storage.put_bytes(
+            path, parquet_bytes(table, **WRITE_OPTIONS), "application/parquet"
+        )
+        self.storage.delete_paths([part for part in paths if part != path])
+        return path
+
+    def compact_closed(self, now: Optional[datetime] = None) -> List[str]:
+        """Compact the partitions of the days before ``now``, UTC.
+
+        Returns:
+            The paths of the compacted files
+        """
+        today = _naive_utc(now or datetime.now(tz=timezone.utc)).date()
+        days = sorted(
+            {
+                date.fromisoformat(path.split("/")[1].removeprefix("day="))
+                for path in self.storage.list_paths(f"{self.prefix}/day=")
+            }
+        )
+        compacted = [self.compact(day) for day in days if day < today]
+        return [path for path in compacted if path is not None]
+
+    def points(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        post_id: Optional[str] = None,
+    ) -> pa.Table:
+        """All points crawled in ``[start, end]``, optionally of a single post."""
+        filters = []
+        if post_id is not None:
+            filters.append(("post_id", "=", post_id))
+        if start is not None:
+            start = _naive_utc(start)
+            filters.append(("crawled_at", ">=", start))
+        if end is not None:
+            end = _naive_utc(end)
+            filters.append(("crawled_at", "<=", end))
+
+        tables = [
+            pq.read_table(
+                BytesIO(self.storage.get_bytes(path)),
+                schema=ENGAGEMENT_SCHEMA,
+                filters=filters or None,
+            )
+            for path in self._paths(start, end)
+        ]
+        if not tables:
+            return ENGAGEMENT_SCHEMA.empty_table()
+        return pa.concat_tables(tables).sort_by(
+            [("post_id", "ascending"), ("crawled_at", "ascending")]
+        )
+
+    def curve(
+        self,
+        post_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Counts of a post over time, oldest first."""
+        table = self.points(start, end, post_id=post_id)
+        return table.select(["crawled_at", *METRICS]).to_pylist()
+
+    def top_risers(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: int = 10,
+        metric: str = "num_likes",
+    ) -> List[Dict]:
+        """Posts whose ``metric`` grew the most between ``start`` and ``end``.
+
+        The rise of a post is the difference between its last and first points
+        in the window, so posts need at least two points in it to rank.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+        table = self.points(start, end)
+        if table.num_rows == 0:
+            return []
+        # The points are sorted, first and last follow that order when the
+        # grouping runs on a single thread.
+        grouped = table.group_by("post_id", use_threads=False).aggregate(
+            [(metric, "first"), (metric, "last"), (metric, "count")]
+        )
+        grouped = grouped.append_column(
+            "rise", pc.subtract(grouped[f"{metric}_last"], grouped[f"{metric}_first"])
+        ).filter(pc.greater(grouped[f"{metric}_count"], 1))
+        top = grouped.sort_by([("rise", "descending"), ("post_id", "ascending")])
+        return [
+            {
+                "post_id": row["post_id"],
+                "first": row[f"{metric}_first"],
+                "last": row[f"{metric}_last"],
+                "rise": row["rise"],
+                "points": row[f"{metric}_count"],
+            }
+            for row in top.slice(0, limit).to_pylist()
+        ]
+
+    def _paths(self, start: Optional[datetime], end: Optional[datetime]) -> List[str]:
+        if start is None or end is None:
+            paths = self.storage.list_paths(f"{self.prefix}/day=")
+            return [path for path in paths if self._in_window(path, start, end)]
+
+        paths = []
+        day: date = start.date()
+        while day <= end.date():
+            paths.extend(self.storage.list_paths(f"{self.prefix}/day={day}/"))
+            day += timedelta(days=1)
+        return paths
+
+    def _in_window(
+        self, path: str, start: Optional[datetime], end: Optional[datetime]
+    ) -> bool:
+        day = date.fromisoformat(path.split("/")[1].removeprefix("day="))
+        if start is not None and day < start.date():
+            return False
+        if end is not None and day > end.date():
+            return False
+        return True
@@ -0,0 +1,100 @@
+import logging
+import os
+from typing import List
+
+import pyarrow.fs as pafs
+
+from models.data_models import Author, Media, Post
+from storage.base_storage import BaseStorageHandler, parquet_bytes, row_table
+from telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LocalStorageHandler(BaseStorageHandler):
+    """Stores the buckets as directories of the local filesystem.
+
+    Meant for development, tests and offline runs: object paths are the same as
+    with MinIO, but media files are not downloaded, only their metadata is kept.
+    """
+
+    def __init__(self, local_config: dict):
+        self.root = local_config["root"]
+        self.buckets = {"data": "extracts-data", "media": "extracts-media"}
+        self.setup_buckets()
+
+    def setup_buckets(self):
+        for bucket in self.buckets.values():
+            os.makedirs(os.path.join(self.root, bucket), exist_ok=True)
+
+    def store_author(self, author: Author):
+        try:
+            path = f"authors/{author.id}.parquet"
+            self._save_parquet(author.model_dump(), path)
+        except Exception as e:
+            logger.error(f"Error storing author {author.id}: {e}")
+            raise
+
+    def store_post(self, post: Post):
+        try:
+            path = f"posts/{post.id}.parquet"
+            self._save_parquet(post.model_dump(), path)
+        except Exception as e:
+            logger.error(f"Error storing post {post.id}: {e}")
+            raise
+
+    def store_media(self, media: Media):
+        try:
+            path = f"media/metadata/{media.id}.parquet"
+            self._save_parquet(media.model_dump(), path)
+        except Exception as e:
+            logger.error(f"Error storing media {media.id}: {e}")
+            raise
+
+    def put_bytes(
+        self, path: str, data: bytes, content_type: str = "application/octet-stream"
+    ):
+        full_path = self._full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Write then rename, so readers never see a partial object.
+        tmp_path = f"{full_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, full_path)
+        metrics.BYTES_UPLOADED.inc(len(data), bucket=self.buckets["data"])
+
+    def get_bytes(self, path: str) -> bytes:
+        with open(self._full_path(path), "rb") as f:
+            return f.read()
+
+    def list_paths(self, prefix: str) -> List[str]:
+        data_root = os.path.join(self.root, self.buckets["data"])
+        # Only walk the directory the prefix points into.
+        start = os.path.join(data_root, os.path.dirname(prefix))
+        paths = []
+        for directory, _, files in os.walk(start):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                full_path = os.path.join(directory, name)
+                path = os.path.relpath(full_path, data_root).replace(os.sep, "/")
+                if path.startswith(prefix):
+                    paths.append(path)
+        return sorted(paths)
+
+    def delete_paths(self, paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(self._full_path(path))
+            except FileNotFoundError:
+                pass
+
+    def arrow_filesystem(self) -> pafs.FileSystem:
+        data_root = os.path.abspath(os.path.join(self.root, self.buckets["data"]))
+        return pafs.SubTreeFileSystem(data_root, pafs.LocalFileSystem())
+
+    def _full_path(self, path: str) -> str:
+        return os.path.join(self.root, self.buckets["data"], path)
+
+    def _save_parquet(self, data: dict, path: str):
+        self.put_bytes(path, parquet_bytes(row_table(data)), "application/parquet")
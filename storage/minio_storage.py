@@ -1,26 +1,66 @@
+import hashlib
 import logging
 import os
+import time
 from io import BytesIO
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-import pyarrow as pa
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
 import requests
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 
 from config.config import settings
 from models.data_models import Author, Media, Post
-from storage.base_storage import BaseStorageHandler
+from storage.base_storage import BaseStorageHandler, row_table
+from telemetry import metrics, stage
 
 logger = logging.getLogger(__name__)
 
 
+def _buckets_flag_path(endpoint: str, buckets) -> str:
+    key = f"{endpoint}/{','.join(sorted(buckets))}".encode("utf-8")
+    digest = hashlib.sha1(key).hexdigest()[:16]
+    return os.path.join(settings.MINIO_BUCKETS_FLAG_DIR, f"minio-buckets-{digest}")
+
+
 class MinIOHandler(BaseStorageHandler):
     def __init__(self, minio_config: dict):
+        self.config = minio_config
         self.client = Minio(**minio_config)
         self.buckets = {"data": "extracts-data", "media": "extracts-media"}
-        self.setup_buckets()
+        self._buckets_flag = _buckets_flag_path(
+            minio_config["endpoint"], self.buckets.values()
+        )
+        if not self.buckets_verified():
+            self.setup_buckets()
+            self._mark_buckets_verified()
+
+    def buckets_verified(self) -> bool:
+        """Whether a process on this host set up the buckets within the TTL.
+
+        Worker children are recycled often, the flag file spares each new one
+        the bucket round-trips.
+        """
+        ttl = settings.MINIO_BUCKETS_CHECK_TTL
+        if ttl <= 0:
+            return False
+        try:
+            age = time.time() - os.path.getmtime(self._buckets_flag)
+        except OSError:
+            return False
+        return age < ttl
+
+    def _mark_buckets_verified(self):
+        if settings.MINIO_BUCKETS_CHECK_TTL <= 0:
+            return
+        try:
+            with open(self._buckets_flag, "w"):
+                pass
+        except OSError as e:
+            logger.warning(f"Could not flag buckets as verified: {e}")
 
     def setup_buckets(self):
         for bucket in self.buckets.values():
@@ -42,6 +82,7 @@ class MinIOHandler(BaseStorageHandler):
             self._save_parquet(data, path, self.buckets["data"])
         except Exception as e:
             logger.error(f"Error storing author {author.id}: {e}")
+            raise
 
     def store_post(self, post: Post):
         try:
@@ -50,6 +91,7 @@ class MinIOHandler(BaseStorageHandler):
             self._save_parquet(data, path, self.buckets["data"])
         except Exception as e:
             logger.error(f"Error storing post {post.id}: {e}")
+            raise
 
     def store_media(self, media: Media):
         try:
@@ -64,27 +106,74 @@ class MinIOHandler(BaseStorageHandler):
 
         except Exception as e:
             logger.error(f"Error storing media {media.id}: {e}")
+            raise
+
+    def put_bytes(
+        self, path: str, data: bytes, content_type: str = "application/octet-stream"
+    ):
+        try:
+            with stage("upload"):
+                self.client.put_object(
+                    self.buckets["data"],
+                    path,
+                    BytesIO(data),
+                    length=len(data),
+                    content_type=content_type,
+                )
+            metrics.BYTES_UPLOADED.inc(len(data), bucket=self.buckets["data"])
+        except Exception as e:
+            logger.error(f"Error writing {path}: {e}")
+            raise
+
+    def get_bytes(self, path: str) -> bytes:
+        response = self.client.get_object(self.buckets["data"], path)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def list_paths(self, prefix: str) -> List[str]:
+        objects = self.client.list_objects(
+            self.buckets["data"], prefix=prefix, recursive=True
+        )
+        return sorted(obj.object_name for obj in objects)
+
+    def delete_paths(self, paths: List[str]) -> None:
+        errors = list(
+            self.client.remove_objects(
+                self.buckets["data"], [DeleteObject(path) for path in paths]
+            )
+        )
+        for error in errors:
+            logger.error(f"Error deleting {error.name}: {error.message}")
+        if errors:
+            raise IOError(f"Could not delete {len(errors)} objects")
+
+    def arrow_filesystem(self) -> pafs.FileSystem:
+        s3 = pafs.S3FileSystem(
+            access_key=self.config["access_key"],
+            secret_key=self.config["secret_key"],
+            endpoint_override=self.config["endpoint"],
+            scheme="https" if self.config.get("secure", True) else "http",
+        )
+        return pafs.SubTreeFileSystem(self.buckets["data"], s3)
 
     def _save_parquet(self, data: Dict, path: str, bucket: str):
         """Save data as Parquet file and upload to MinIO"""
         try:
-            converted_data = {}
-            for key, value in data.items():
-                if isinstance(value, str):
-                    converted_data[key] = [str(value)]
-                elif hasattr(value, "__str__"):
-                    converted_data[key] = [str(value)]
-                else:
-                    converted_data[key] = [value]
-
             os.makedirs(os.path.dirname(path), exist_ok=True)
 
-            table = pa.Table.from_pydict(converted_data)
-            pq.write_table(table, path)
+            table = row_table(data)
+            with stage("parquet_encode"):
+                pq.write_table(table, path)
 
-            self.client.fput_object(
-                bucket, path, path, content_type="application/parquet"
-            )
+            with stage("upload"):
+                self.client.fput_object(
+                    bucket, path, path, content_type="application/parquet"
+                )
+            if metrics.enabled():
+                metrics.BYTES_UPLOADED.inc(os.path.getsize(path), bucket=bucket)
 
             os.remove(path)
 
@@ -94,8 +183,9 @@ class MinIOHandler(BaseStorageHandler):
 
     def _download_media(self, media: Media) -> Optional[str]:
         try:
-            response = requests.get(str(media.original_url))
-            response.raise_for_status()
+            with stage("media_download"):
+                response = requests.get(str(media.original_url))
+                response.raise_for_status()
 
             mime_to_ext = {
                 "image/jpeg": ".jpg",
@@ -126,12 +216,16 @@ class MinIOHandler(BaseStorageHandler):
             data = BytesIO(response.content)
             data.seek(0)
 
-            self.client.put_object(
-                self.buckets["media"],
-                path,
-                data,
-                length=len(response.content),
-                content_type=content_type,
+            with stage("upload"):
+                self.client.put_object(
+                    self.buckets["media"],
+                    path,
+                    data,
+                    length=len(response.content),
+                    content_type=content_type,
+                )
+            metrics.BYTES_UPLOADED.inc(
+                len(response.content), bucket=self.buckets["media"]
             )
 
             return (
@@ -2,9 +2,10 @@ from datetime import datetime, timedelta
 
 import streamlit as st
 
-from celery_app import app
-from celery_tasks import tasks
+from celery_tasks import client
 from config.config import settings
+from telemetry import tracing
+from telemetry.task_stats import task_stats
 
 st.set_page_config(page_title="Social Media Scraper", layout="wide")
 
@@ -15,28 +16,24 @@ if "tasks" not in st.session_state:
 def submit_scraping_task(author_name, source_type):
     """Submit a new scraping task and return the task ID"""
     try:
-        task = tasks.crawl_author.delay(
-            author_name=author_name,
-            date_start=datetime.now() - timedelta(days=21),
-            source_type=source_type,
-        )
+        with tracing.start_trace("submit", author=author_name, source=source_type):
+            task = client.crawl_author(
+                author_name=author_name,
+                date_start=datetime.now() - timedelta(days=21),
+                source_type=source_type,
+            )
         return task.id
     except Exception as e:
         st.error(f"Error submitting task: {str(e)}")
         return None
 
 
-def get_task_status(task_id):
-    """Get the status of a Celery task"""
+def get_task_statuses(task_ids):
+    """Get the status of the Celery tasks and of the tasks they queued"""
     try:
-        task = app.AsyncResult(task_id)
-        return {
-            "status": task.status,
-            "result": task.result,
-            "error": str(task.traceback) if task.failed() else None,
-        }
+        return client.task_statuses(task_ids)
     except Exception as e:
-        return {"status": "ERROR", "error": str(e)}
+        return {task_id: {"status": "ERROR", "error": str(e)} for task_id in task_ids}
 
 
 st.title("Social Media User Scraper")
@@ -69,17 +66,19 @@ if submitted and author_name:
             f"Started scraping for {source_type.capitalize()} user: {author_name}"
         )
 
-if st.session_state.tasks:
-    st.header("Active Tasks")
 
-    if st.button("🔄 Refresh Task Status"):
-        st.rerun()
+@st.fragment(run_every=settings.DASHBOARD_REFRESH_SECONDS)
+def show_tasks():
+    if not st.session_state.tasks:
+        return
+    st.header("Active Tasks")
 
+    statuses = get_task_statuses(list(st.session_state.tasks))
     for task_id, task_info in list(st.session_state.tasks.items()):
         with st.expander(
             f"{task_info['source_type'].capitalize()} Task for {task_info['author_name']}"
         ):
-            status = get_task_status(task_id)
+            status = statuses[task_id]
 
             st.session_state.tasks[task_id]["status"] = status["status"]
 
@@ -93,6 +92,16 @@ if st.session_state.tasks:
             else:
                 st.info(f"🔄 Task is {status['status']}...")
 
+            children = status.get("children")
+            if children:
+                st.write(
+                    f"Queued tasks ({sum(children.values())}): "
+                    + ", ".join(
+                        f"{count} {state.lower()}"
+                        for state, count in sorted(children.items())
+                    )
+                )
+
             elapsed = datetime.now() - task_info["start_time"]
             st.write(f"Elapsed time: {str(elapsed).split('.')[0]}")
 
@@ -103,3 +112,82 @@ if st.session_state.tasks:
                 ):
                     del st.session_state.tasks[task_id]
                     st.rerun()
+
+
+@st.fragment(run_every=settings.DASHBOARD_REFRESH_SECONDS)
+def show_queues():
+    st.header("Queues")
+    stats = task_stats()
+    if stats is None:
+        st.info("Set TASK_STATS_ENABLED=true to see queue depths and throughput.")
+        return
+    try:
+        depths = stats.queue_depths(queue.name for queue in settings.CELERY_TASK_QUEUES)
+        throughput = stats.throughput(minutes=5)
+    except Exception as e:
+        st.error(f"Error reading queue stats: {str(e)}")
+        return
+
+    columns = st.columns(len(depths))
+    for column, (queue, depth) in zip(columns, depths.items()):
+        rate = sum(
+            sum(states.values())
+            for (task_queue, _), states in throughput.items()
+            if task_queue == queue
+        )
+        column.metric(
+            queue, f"{depth} waiting", f"{rate:.1f} tasks/min", delta_color="off"
+        )
+
+    if throughput:
+        st.caption("Finished tasks per minute over the last 5 minutes")
+        st.dataframe(
+            [
+                {
+                    "queue": queue,
+                    "source": source or "-",
+                    **{state.lower(): round(rate, 1) for state, rate in states.items()},
+                }
+                for (queue, source), states in sorted(throughput.items())
+            ],
+            hide_index=True,
+        )
+
+
+@st.cache_resource
+def get_aggregates():
+    # Imported here, the storage code would slow down every cold start.
+    from storage.aggregates import create_aggregates
+
+    return create_aggregates()
+
+
+@st.fragment(run_every=settings.DASHBOARD_REFRESH_SECONDS)
+def show_top_posts():
+    st.header("Top Posts")
+    aggregates = get_aggregates()
+    if aggregates is None:
+        st.info("Set AGGREGATES_ENABLED=true to see the top posts and authors.")
+        return
+    try:
+        top_authors = aggregates.top_authors(limit=10)
+        top_posts = aggregates.top_post_per_author()
+        weekly = aggregates.top_post_per_author_weekly()
+    except Exception as e:
+        st.error(f"Error reading aggregates: {str(e)}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Authors with the most posts")
+        st.dataframe(top_authors, hide_index=True)
+    with col2:
+        st.subheader("Most liked post per author")
+        st.dataframe(top_posts, hide_index=True)
+    st.subheader("Most liked post per author and week")
+    st.dataframe(weekly, hide_index=True)
+
+
+show_tasks()
+show_queues()
+show_top_posts()
@@ -0,0 +1,4 @@
+from telemetry.metrics import REGISTRY, stage
+from telemetry.server import start_http_server
+
+__all__ = ["REGISTRY", "stage", "start_http_server"]
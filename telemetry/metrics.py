@@ -0,0 +1,259 @@
+"""Process-local metrics rendered in the Prometheus text format.
+
+Metrics are plain in-memory counters guarded by a lock, each worker process
+keeps its own and serves them itself (see ``telemetry.server``). When metrics
+are disabled every update returns right away and ``stage`` hands out a shared
+no-op context manager, so instrumented code pays one attribute lookup.
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.config import settings
+from telemetry import tracing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _State:
+    enabled: bool = settings.METRICS_ENABLED
+
+
+_state = _State()
+
+
+def enabled() -> bool:
+    return _state.enabled
+
+
+def set_enabled(value: bool) -> None:
+    _state.enabled = value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra="") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError("Method not implemented")
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not _state.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        if not _state.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        if not _state.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total))
+                for key, (counts, total) in self._values.items()
+            )
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "crawler_stage_seconds",
+        "Time spent per pipeline stage",
+        ("stage", "source"),
+    )
+)
+TASK_SECONDS = REGISTRY.register(
+    Histogram("crawler_task_seconds", "Task run time", ("task", "state"))
+)
+RETRIES = REGISTRY.register(
+    Counter("crawler_task_retries_total", "Task retries", ("task", "source"))
+)
+DEFERRALS = REGISTRY.register(
+    Counter(
+        "crawler_task_deferrals_total",
+        "Tasks re-queued while the Selenium Grid had no free slot",
+        ("task", "source"),
+    )
+)
+BYTES_UPLOADED = REGISTRY.register(
+    Counter("crawler_bytes_uploaded_total", "Bytes written to storage", ("bucket",))
+)
+POSTS_PROCESSED = REGISTRY.register(
+    Counter("crawler_posts_processed_total", "Posts validated for storage")
+)
+MEDIA_PROCESSED = REGISTRY.register(
+    Counter("crawler_media_processed_total", "Media stored")
+)
+SESSIONS_IN_FLIGHT = REGISTRY.register(
+    Gauge("crawler_browser_sessions", "Browser sessions currently open")
+)
+
+
+class _Stage:
+    __slots__ = ("labels", "start", "span")
+
+    def __init__(self, labels: Dict[str, str], span: Optional[tracing.Span]):
+        self.labels = labels
+        self.span = span
+
+    def __enter__(self):
+        if self.span is not None:
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if _state.enabled:
+            STAGE_SECONDS.observe(time.perf_counter() - self.start, **self.labels)
+        if self.span is not None:
+            self.span.__exit__(*exc_info)
+        return False
+
+
+_NULL_STAGE = nullcontext()
+
+
+def stage(name: str, source: Optional[str] = None):
+    """Time a block of code as one pipeline stage.
+
+    The time goes to the ``crawler_stage_seconds`` histogram, and to a span
+    when the code runs within a trace.
+
+    Usage:
+        with stage("parse", source="linkedin"):
+            ...
+    """
+    traced = tracing.active()
+    if not _state.enabled and not traced:
+        return _NULL_STAGE
+    labels = {"stage": name, "source": source or ""}
+    span = tracing.Span(name, {"source": labels["source"]}) if traced else None
+    return _Stage(labels, span)
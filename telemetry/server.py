@@ -0,0 +1,50 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from telemetry.metrics import REGISTRY, Registry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _handler(registry: Registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def start_http_server(
+    port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY
+) -> Optional[ThreadingHTTPServer]:
+    """Serve the metrics on ``/metrics`` from a daemon thread.
+
+    Returns:
+        The running server, None when the port could not be bound
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _handler(registry))
+    except OSError as e:
+        logger.warning(f"Could not expose metrics on port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info(f"Exposing metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,80 @@
+"""Queue depths and task throughput for the dashboard, read from Redis.
+
+Workers count their finished tasks in one Redis hash per minute, with a field
+per queue, source and state. The hashes expire after an hour. Queue depths are
+the lengths of the broker's queue lists, so TASK_STATS_URL should point at the
+broker's Redis database.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+import redis
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "crawler:throughput:"
+RETENTION_SECONDS = 3600
+
+
+class TaskStats:
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def record(
+        self, queue: str, source: str, state: str, now: Optional[float] = None
+    ) -> None:
+        key = f"{KEY_PREFIX}{_minute(now)}"
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hincrby(key, f"{queue}|{source}|{state}", 1)
+        pipeline.expire(key, RETENTION_SECONDS)
+        pipeline.execute()
+
+    def throughput(
+        self, minutes: int = 5, now: Optional[float] = None
+    ) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Tasks finished per minute over the last full minutes.
+
+        Returns:
+            Per (queue, source), the tasks per minute of each final state
+        """
+        current = _minute(now)
+        pipeline = self.client.pipeline(transaction=False)
+        for minute in range(current - minutes, current):
+            pipeline.hgetall(f"{KEY_PREFIX}{minute}")
+
+        rates = defaultdict(lambda: defaultdict(float))
+        for counts in pipeline.execute():
+            for field, count in counts.items():
+                queue, source, state = field.split("|")
+                rates[(queue, source)][state] += int(count) / minutes
+        return {key: dict(states) for key, states in rates.items()}
+
+    def queue_depths(self, queues: Iterable[str]) -> Dict[str, int]:
+        """Messages waiting in each queue of the broker."""
+        queues = list(queues)
+        pipeline = self.client.pipeline(transaction=False)
+        for queue in queues:
+            pipeline.llen(queue)
+        return dict(zip(queues, pipeline.execute()))
+
+
+def _minute(now: Optional[float]) -> int:
+    return int((time.time() if now is None else now) // 60)
+
+
+_stats: Optional[TaskStats] = None
+
+
+def task_stats() -> Optional[TaskStats]:
+    """Shared client, None when TASK_STATS_ENABLED is off."""
+    global _stats
+    if not settings.TASK_STATS["enabled"]:
+        return None
+    if _stats is None:
+        _stats = TaskStats(settings.TASK_STATS["url"])
+    return _stats
@@ -0,0 +1,277 @@
+"""Trace spans following one crawl through all the tasks it fans out into.
+
+A trace is started where a crawl is submitted (``start_trace``). Its id and
+the id of the current span travel to the tasks it queues in Celery message
+headers, and each task continues the trace (``continue_trace``). Within a
+trace, ``span`` records a nested phase; ``telemetry.stage`` does so too.
+Outside a trace, or with tracing disabled, ``span`` is a shared no-op.
+"""
+
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "trace_id"
+PARENT_HEADER = "trace_parent_id"
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_span_id: ContextVar[Optional[str]] = ContextVar("span_id", default=None)
+
+
+class _State:
+    enabled: bool = settings.TRACING["enabled"]
+    exporter: Optional["BaseSpanExporter"] = None
+
+
+_state = _State()
+
+
+def enabled() -> bool:
+    return _state.enabled
+
+
+def set_enabled(value: bool) -> None:
+    _state.enabled = value
+
+
+def active() -> bool:
+    """Whether spans opened now belong to a trace."""
+    return _state.enabled and _trace_id.get() is not None
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def headers() -> Dict[str, str]:
+    """Message headers continuing the current trace in another task."""
+    if not active():
+        return {}
+    return {TRACE_HEADER: _trace_id.get(), PARENT_HEADER: _span_id.get()}
+
+
+class BaseSpanExporter:
+    def export(self, span: dict) -> None:
+        raise NotImplementedError("Method not implemented")
+
+    def flush(self) -> None:
+        """Send spans kept in a buffer, if any"""
+
+
+class JsonlSpanExporter(BaseSpanExporter):
+    """Appends one JSON line per span to a local file."""
+
+    def __init__(self, config: dict):
+        self.path = config["path"]
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: dict) -> None:
+        line = json.dumps(span) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class OtlpHttpSpanExporter(BaseSpanExporter):
+    """Posts spans in the OTLP/HTTP JSON encoding to a collector.
+
+    Spans are buffered and sent on ``flush``, which runs at the end of every
+    task and trace, so a task pays for one request at most.
+    """
+
+    def __init__(self, config: dict):
+        self.url = config["url"]
+        self.service_name = config.get("service_name", "crawlers")
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: dict) -> None:
+        with self._lock:
+            self._buffer.append(span)
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        # Imported here: submitting clients load tracing and rarely export OTLP.
+        import requests
+
+        try:
+            requests.post(self.url, json=self.payload(spans), timeout=5)
+        except requests.RequestException as e:
+            logger.warning(f"Could not export {len(spans)} spans: {e}")
+
+    def payload(self, spans: List[dict]) -> dict:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", self.service_name)
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "telemetry.tracing"},
+                            "spans": [_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: dict) -> dict:
+    start = int(span["start"] * 1e9)
+    otlp_span = {
+        "traceId": span["trace_id"],
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": 1,
+        "startTimeUnixNano": str(start),
+        "endTimeUnixNano": str(start + int(span["duration"] * 1e9)),
+        "attributes": [
+            _otlp_attribute(key, value) for key, value in span["attributes"].items()
+        ],
+        "status": {"code": 2 if span["status"] == "error" else 1},
+    }
+    if span["parent_id"]:
+        otlp_span["parentSpanId"] = span["parent_id"]
+    return otlp_span
+
+
+def exporter() -> BaseSpanExporter:
+    if _state.exporter is None:
+        tracing_config = settings.TRACING
+        module_path, class_name = tracing_config["class"].rsplit(".", 1)
+        module = importlib.import_module(module_path)
+        exporter_class = getattr(module, class_name)
+
+        _state.exporter = exporter_class(tracing_config["config"])
+    return _state.exporter
+
+
+def set_exporter(span_exporter: Optional[BaseSpanExporter]) -> None:
+    _state.exporter = span_exporter
+
+
+class Span:
+    """A timed phase of a trace, current while its ``with`` block runs."""
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Dict,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = trace_id or _trace_id.get()
+        self.parent_id = parent_id if trace_id else _span_id.get()
+        self.span_id = uuid.uuid4().hex[:16]
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._tokens = (_trace_id.set(self.trace_id), _span_id.set(self.span_id))
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _span_id.reset(self._tokens[1])
+        _trace_id.reset(self._tokens[0])
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes.setdefault("error", f"{exc_type.__name__}: {exc}")
+        try:
+            exporter().export(
+                {
+                    "trace_id": self.trace_id,
+                    "span_id": self.span_id,
+                    "parent_id": self.parent_id,
+                    "name": self.name,
+                    "start": self.start,
+                    "duration": duration,
+                    "status": self.status,
+                    "attributes": self.attributes,
+                    "pid": os.getpid(),
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Could not export span {self.name}: {e}")
+        if self.parent_id is None:
+            flush()
+        return False
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name: str, **attributes):
+    """Record a phase of the current trace.
+
+    Usage:
+        with span("upload", path=path):
+            ...
+    """
+    if not active():
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+def start_trace(name: str, **attributes):
+    """Start a new trace, e.g. where a crawl is submitted.
+
+    Usage:
+        with start_trace("submit", author=author) as trace:
+            task = crawl_author.delay(...)
+        trace_id = trace.trace_id if trace else None
+    """
+    if not _state.enabled:
+        return _NULL_SPAN
+    return Span(name, attributes, trace_id=uuid.uuid4().hex)
+
+
+def continue_trace(
+    name: str, trace_id: Optional[str], parent_id: Optional[str], **attributes
+) -> Optional[Span]:
+    """Span continuing a trace received in message headers, None without one."""
+    if not _state.enabled:
+        return None
+    if trace_id is None:
+        # Eager tasks run within the span of the task that queued them.
+        if _trace_id.get() is None:
+            return None
+        return Span(name, attributes)
+    return Span(name, attributes, trace_id=trace_id, parent_id=parent_id)
+
+
+def flush() -> None:
+    if _state.exporter is not None:
+        try:
+            _state.exporter.flush()
+        except Exception as e:
+            logger.warning(f"Could not flush spans: {e}")
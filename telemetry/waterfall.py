@@ -0,0 +1,113 @@
+"""Print the spans of one crawl as a waterfall.
+
+Reads the spans written by ``JsonlSpanExporter``. Without a trace id the
+latest trace is shown.
+
+Usage: python -m telemetry.waterfall [TRACE_ID] [--path traces/spans.jsonl] [--list]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from config.config import settings
+
+
+def load_traces(path: str) -> Dict[str, List[dict]]:
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def _bounds(spans: List[dict]):
+    start = min(span["start"] for span in spans)
+    end = max(span["start"] + span["duration"] for span in spans)
+    return start, end
+
+
+def _ordered(spans: List[dict]):
+    """Spans depth first, children by start time, with their depth."""
+    span_ids = {span["span_id"] for span in spans}
+    children = defaultdict(list)
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in span_ids else None
+        children[parent].append(span)
+
+    def walk(parent, depth):
+        for span in sorted(children[parent], key=lambda span: span["start"]):
+            yield span, depth
+            yield from walk(span["span_id"], depth + 1)
+
+    return walk(None, 0)
+
+
+def render(spans: List[dict], width: int = 40) -> List[str]:
+    start, end = _bounds(spans)
+    total = max(end - start, 1e-9)
+    lines = [f"{'start ms':>10} {'took ms':>10}  {'':<{width}}  span"]
+    for span, depth in _ordered(spans):
+        offset = span["start"] - start
+        left = min(int(offset / total * width), width - 1)
+        length = max(1, round(span["duration"] / total * width))
+        bar = (" " * left + "#" * length)[:width]
+        name = span["name"]
+        source = span["attributes"].get("source")
+        if source:
+            name = f"{name} [{source}]"
+        if span["status"] == "error":
+            name = f"{name} !"
+        lines.append(
+            f"{offset * 1000:>10.1f} {span['duration'] * 1000:>10.1f}  "
+            f"{bar:<{width}}  {'  ' * depth}{name}"
+        )
+    lines.append(f"{len(spans)} spans, {total * 1000:.1f} ms end to end")
+    return lines
+
+
+def summary(trace_id: str, spans: List[dict]) -> str:
+    start, end = _bounds(spans)
+    roots = [span for span in spans if span["parent_id"] is None]
+    attributes = roots[0]["attributes"] if roots else {}
+    label = " ".join(f"{key}={value}" for key, value in attributes.items())
+    started = datetime.fromtimestamp(start).isoformat(timespec="seconds")
+    return (
+        f"{trace_id}  {started}  {(end - start) * 1000:>10.1f} ms  "
+        f"{len(spans):>4} spans  {label}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace_id", nargs="?")
+    parser.add_argument("--path", default=settings.TRACING["config"]["path"])
+    parser.add_argument("--list", action="store_true", help="List the traces")
+    parser.add_argument("--width", type=int, default=40)
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if not traces:
+        parser.exit(1, f"No spans in {args.path}\n")
+    by_start = sorted(traces, key=lambda trace_id: _bounds(traces[trace_id])[0])
+
+    if args.list:
+        for trace_id in by_start:
+            print(summary(trace_id, traces[trace_id]))
+        return
+
+    trace_id = args.trace_id or by_start[-1]
+    if trace_id not in traces:
+        parser.exit(1, f"Unknown trace {trace_id}\n")
+    print(f"Trace {trace_id}")
+    for line in render(traces[trace_id], args.width):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from analytics import read_aggregates, run_query
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from models.data_models import Author, Post
+from storage.aggregates import (
+    RedisAggregates,
+    SqliteAggregates,
+    stored_titles,
+    week_of,
+)
+from storage.local_storage import LocalStorageHandler
+
+
+def _post(post_id, num_likes, timestamp=datetime(2024, 3, 6), author_id="a1"):
+    return Post(
+        id=post_id,
+        title=f"Title {post_id}",
+        num_likes=num_likes,
+        timestamp=timestamp,
+        author_id=author_id,
+    )
+
+
+@pytest.fixture
+def aggregates(tmp_path):
+    aggregates = SqliteAggregates({"path": str(tmp_path / "aggregates.sqlite3")})
+    aggregates.set_author_names({"a1": "alice", "a2": "bob"})
+    return aggregates
+
+
+def _best(rows):
+    return {
+        (row["author_id"], row.get("week")): (row["post_id"], row["num_likes"])
+        for row in rows
+    }
+
+
+def test_week_starts_on_monday_in_utc():
+    assert week_of(datetime(2024, 3, 10, 23)) == "2024-03-04"
+    assert week_of(datetime(2024, 3, 11)) == "2024-03-11"
+    aware = datetime(2024, 3, 10, 23, tzinfo=timezone(timedelta(hours=-2)))
+    assert week_of(aware) == "2024-03-11"
+    assert week_of(None) is None
+
+
+def test_best_posts_and_counts(aggregates):
+    aggregates.update(
+        [
+            _post("p1", 10),
+            _post("p2", 30),
+            _post("p3", 30, datetime(2024, 3, 12)),
+            _post("p4", 5, author_id="a2"),
+            _post("p5", None, author_id="a2"),
+        ]
+    )
+
+    assert _best(aggregates.top_post_per_author()) == {
+        ("a1", None): ("p2", 30),
+        ("a2", None): ("p4", 5),
+    }
+    assert _best(aggregates.top_post_per_author_weekly()) == {
+        ("a1", datetime(2024, 3, 4)): ("p2", 30),
+        ("a1", datetime(2024, 3, 11)): ("p3", 30),
+        ("a2", datetime(2024, 3, 4)): ("p4", 5),
+    }
+    assert aggregates.top_authors(limit=1) == [
+        {"author_id": "a1", "author_name": "alice", "post_count": 3}
+    ]
+
+
+def test_recrawled_posts_are_counted_once_and_move(aggregates):
+    aggregates.update([_post("p1", 10), _post("p2", 30)])
+
+    # p2 lost likes, p1 was dated into the next week and moved to bob.
+    aggregates.update([_post("p2", 1)])
+    aggregates.update([_post("p1", 10, datetime(2024, 3, 12), author_id="a2")])
+    aggregates.update([_post("p1", 10, datetime(2024, 3, 12), author_id="a2")])
+
+    assert _best(aggregates.top_post_per_author()) == {
+        ("a1", None): ("p2", 1),
+        ("a2", None): ("p1", 10),
+    }
+    assert _best(aggregates.top_post_per_author_weekly()) == {
+        ("a1", datetime(2024, 3, 4)): ("p2", 1),
+        ("a2", datetime(2024, 3, 11)): ("p1", 10),
+    }
+    assert [row["post_count"] for row in aggregates.top_authors()] == [1, 1]
+
+
+def test_authors_without_name_are_left_out(aggregates):
+    aggregates.update([_post("p1", 10, author_id="a3")])
+
+    assert aggregates.top_post_per_author() == []
+    assert aggregates.top_authors() == []
+
+    aggregates.update([], Author(id="a3", name="carol"))
+    assert aggregates.top_authors()[0]["author_name"] == "carol"
+
+
+def test_aggregates_match_the_scan(aggregates, tmp_path, monkeypatch):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+    monkeypatch.setitem(settings.CHANGE_INDEX, "enabled", False)
+    monkeypatch.setitem(settings.AGGREGATES, "enabled", True)
+    monkeypatch.setattr(tasks.store_metadata, "_aggregates", aggregates)
+
+    for author_id, name in (("a1", "alice"), ("a2", "bob")):
+        posts = [
+            _post(
+                f"{author_id}-{i}",
+                (i * 7) % 11,
+                datetime(2024, 3, 1) + timedelta(days=i),
+                author_id,
+            )
+            for i in range(20)
+        ]
+        tasks.store_metadata(
+            {"id": author_id, "name": name}, [post.model_dump() for post in posts]
+        )
+
+    for query in ("top-posts", "top-posts-weekly", "top-authors"):
+        assert read_aggregates(aggregates, query) == run_query(storage, query)
+
+
+def test_update_failures_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(StorageTask, "_storage", MagicMock())
+    monkeypatch.setitem(settings.CHANGE_INDEX, "enabled", False)
+    monkeypatch.setitem(settings.AGGREGATES, "enabled", True)
+    broken = MagicMock(update=MagicMock(side_effect=ConnectionError("down")))
+    monkeypatch.setattr(tasks.store_metadata, "_aggregates", broken)
+
+    tasks.store_metadata(None, [_post("p1", 1).model_dump()])
+
+    assert "Could not update aggregates of 1 posts" in caplog.text
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return call
+
+    def execute(self):
+        return [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+class FakeRedis:
+    """Holds the state the update script leaves, for the reads."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.hashes = {}
+        self.script = MagicMock()
+
+    def register_script(self, script):
+        return self.script
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def zrange(self, key, start, end, withscores=False):
+        members = sorted(
+            self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0])
+        )
+        stop = None if end == -1 else end + 1
+        members = members[start:stop]
+        return members if withscores else [member for member, _ in members]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with patch("storage.aggregates.redis.Redis.from_url", return_value=client):
+        yield client
+
+
+def test_redis_update_runs_one_script_per_batch(redis_client):
+    aggregates = RedisAggregates({"url": "redis://localhost"})
+
+    aggregates.update(
+        [_post("p1", 10), _post("p2", None, None), _post("p1", 12)],
+        Author(id="a1", name="alice"),
+    )
+
+    # Titles are not sent, Redis only keeps the aggregates.
+    redis_client.script.assert_called_once_with(
+        args=[
+            "aggregates",
+            *("p1", "a1", "2024-03-04", 12),
+            *("p2", "a1", "", ""),
+        ]
+    )
+    assert redis_client.hashes["aggregates:names"] == {"a1": "alice"}
+
+
+def test_redis_reads(redis_client, tmp_path):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+    storage.store_post(_post("p2", 30))
+    storage.store_post(Post(id="p4", author_id="a2"))
+    redis_client.zsets = {"aggregates:counts": {"a1": -3, "a2": -3, "a3": -9}}
+    redis_client.hashes = {
+        "aggregates:names": {"a1": "alice", "a2": "bob"},
+        "aggregates:best": {"a1": "30|p2", "a2": "|p4", "a3": "1|p9"},
+        "aggregates:weekly": {"a1|2024-03-04": "30|p2", "a1|2024-03-11": "30|p3"},
+    }
+    aggregates = RedisAggregates({"url": "redis://localhost"}, storage)
+
+    assert aggregates.top_post_per_author() == [
+        {
+            "post_id": "p2",
+            "title": "Title p2",
+            "author_id": "a1",
+            "author_name": "alice",
+            "num_likes": 30,
+        },
+        {
+            "post_id": "p4",
+            "title": None,
+            "author_id": "a2",
+            "author_name": "bob",
+            "num_likes": None,
+        },
+    ]
+    weekly = aggregates.top_post_per_author_weekly()
+    assert [(row["week"], row["post_id"]) for row in weekly] == [
+        (datetime(2024, 3, 11), "p3"),
+        (datetime(2024, 3, 4), "p2"),
+    ]
+    # a3 has no stored author, the next authors fill the page.
+    assert aggregates.top_authors(limit=1) == [
+        {"author_id": "a1", "author_name": "alice", "post_count": 3}
+    ]
+
+
+def test_stored_titles_are_left_out_when_unreadable(tmp_path, caplog):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+    storage.store_post(_post("p1", 1))
+
+    assert stored_titles(storage, ["p1", "p1"]) == {"p1": "Title p1"}
+    assert stored_titles(storage, ["p1", "missing"]) == {}
+    assert "Could not read the titles of 2 posts" in caplog.text
+
+
+def test_cli_reads_the_aggregates(aggregates):
+    aggregates.update([_post("p1", 10), _post("p2", 5, author_id="a2")])
+    env = {
+        **os.environ,
+        "AGGREGATES_ENABLED": "true",
+        "AGGREGATES_CLASS": "storage.aggregates.SqliteAggregates",
+        "AGGREGATES_PATH": aggregates.path,
+        # The aggregates are read without touching the storage.
+        "STORAGE_BACKEND": "missing",
+    }
+
+    output = subprocess.run(
+        [sys.executable, "-m", "analytics.queries", "top-authors", "--json"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+
+    assert output.splitlines() == [
+        '{"author_id": "a1", "author_name": "alice", "post_count": 1}',
+        '{"author_id": "a2", "author_name": "bob", "post_count": 1}',
+    ]
@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from analytics import run_query
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from models.data_models import Author, Post
+from storage.local_storage import LocalStorageHandler
+
+POSTS = [
+    # Week of Monday 2024-03-04.
+    ("p1", "a1", datetime(2024, 3, 4, 9), 10),
+    ("p2", "a1", datetime(2024, 3, 6, 9), 30),
+    ("p3", "a2", datetime(2024, 3, 10, 23), 5),
+    # Week of Monday 2024-03-11, p4 is aware and on Monday in UTC.
+    ("p4", "a1", datetime(2024, 3, 11, 1, tzinfo=timezone(timedelta(hours=-2))), 50),
+    ("p5", "a2", datetime(2024, 3, 12, 9), 20),
+    ("p6", "a2", datetime(2024, 3, 13, 9), 20),
+    # Author never stored, left out like by the notebook's join.
+    ("p7", "a3", datetime(2024, 3, 12, 9), 100),
+]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+    storage.store_author(Author(id="a1", name="alice"))
+    storage.store_author(Author(id="a2", name="bob"))
+    for post_id, author_id, timestamp, likes in POSTS:
+        storage.store_post(
+            Post(
+                id=post_id,
+                title=f"Title {post_id}",
+                timestamp=timestamp,
+                num_likes=likes,
+                num_comments=1,
+                author_id=author_id,
+            )
+        )
+    storage.store_post(Post(id="p8", author_id="a2"))
+    return storage
+
+
+def test_top_post_per_author(storage):
+    assert run_query(storage, "top-posts") == [
+        {
+            "post_id": "p4",
+            "title": "Title p4",
+            "author_id": "a1",
+            "author_name": "alice",
+            "num_likes": 50,
+        },
+        {
+            "post_id": "p5",
+            "title": "Title p5",
+            "author_id": "a2",
+            "author_name": "bob",
+            "num_likes": 20,
+        },
+    ]
+
+
+def test_top_post_per_author_weekly(storage):
+    rows = run_query(storage, "top-posts-weekly")
+
+    assert [(row["week"], row["author_name"], row["post_id"]) for row in rows] == [
+        (datetime(2024, 3, 11), "alice", "p4"),
+        (datetime(2024, 3, 11), "bob", "p5"),
+        (datetime(2024, 3, 4), "alice", "p2"),
+        (datetime(2024, 3, 4), "bob", "p3"),
+    ]
+
+
+def test_top_authors(storage):
+    assert run_query(storage, "top-authors") == [
+        {"author_id": "a2", "author_name": "bob", "post_count": 4},
+        {"author_id": "a1", "author_name": "alice", "post_count": 3},
+    ]
+    assert len(run_query(storage, "top-authors", limit=1)) == 1
+
+
+def test_date_range_is_applied(storage):
+    rows = run_query(
+        storage,
+        "top-authors",
+        since=datetime(2024, 3, 6),
+        until=datetime(2024, 3, 12, 9),
+    )
+
+    # p2, p3 and p4 (03-11 03:00 UTC) fall in the range, p5 starts it after.
+    assert rows == [
+        {"author_id": "a1", "author_name": "alice", "post_count": 2},
+        {"author_id": "a2", "author_name": "bob", "post_count": 1},
+    ]
+
+
+def test_newer_deltas_update_the_counters(storage):
+    storage.store_deltas(
+        "posts", [{"id": "p5", "num_likes": 10}, {"id": "p6", "num_likes": 90}]
+    )
+
+    rows = run_query(storage, "top-posts")
+
+    assert [(row["post_id"], row["num_likes"]) for row in rows] == [
+        ("p6", 90),
+        ("p4", 50),
+    ]
+
+
+def test_deltas_older_than_the_post_object_are_ignored(storage):
+    storage.store_deltas("posts", [{"id": "p6", "num_likes": 90}])
+    # p6 stored in full after its delta.
+    later = datetime.now().timestamp() + 60
+    os.utime(
+        os.path.join(storage.root, "extracts-data/posts/p6.parquet"), (later, later)
+    )
+
+    rows = run_query(storage, "top-posts")
+
+    assert rows[1]["post_id"] == "p5"
+
+
+def test_no_data(tmp_path):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+
+    assert run_query(storage, "top-posts") == []
+    with pytest.raises(ValueError):
+        run_query(storage, "top-comments")
+
+
+def test_run_query_task(storage, monkeypatch):
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+
+    result = tasks.run_query.apply(args=("top-authors",), kwargs={"limit": 1})
+
+    assert result.get() == [{"author_id": "a2", "author_name": "bob", "post_count": 4}]
+
+
+def test_cli(storage):
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "local",
+        "LOCAL_STORAGE_ROOT": storage.root,
+    }
+
+    output = subprocess.run(
+        [sys.executable, "-m", "analytics.queries", "top-authors", "--scan", "--json"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+
+    assert output.splitlines() == [
+        '{"author_id": "a2", "author_name": "bob", "post_count": 4}',
+        '{"author_id": "a1", "author_name": "alice", "post_count": 3}',
+    ]
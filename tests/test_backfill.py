@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import ExtractTask
+from config.config import settings
+from extractors.base_extractor import BaseExtractor, SliceCursorError
+from extractors.reddit_json_extractor import RedditJsonExtractor, _to_base36
+from models.data_models import Author, ExtractionBatch, Post
+
+EPOCH = datetime(2024, 1, 1)
+
+
+def test_time_slices_cover_the_range_without_gaps():
+    end = EPOCH + timedelta(days=180)
+
+    slices = tasks._time_slices(EPOCH, end, 6)
+
+    assert len(slices) == 6
+    assert slices[0][0] == EPOCH
+    assert slices[-1][1] == end
+    assert all(a[1] == b[0] for a, b in zip(slices, slices[1:]))
+    assert all(stop - start == timedelta(days=30) for start, stop in slices)
+
+
+def test_slice_cursor_bisects_post_ids_by_creation_date():
+    # One post per minute, with two ids out of three deleted.
+    newest_id = 3_000_000
+
+    def created(post_id):
+        return (EPOCH + timedelta(minutes=post_id)).replace(tzinfo=timezone.utc)
+
+    def get_json(path, params=None):
+        if path == "/r/all/new.json":
+            ids = [newest_id]
+        else:
+            ids = [int(fullname[3:], 36) for fullname in params["id"].split(",")]
+            ids = [post_id for post_id in ids if post_id % 3 == 0]
+        children = [
+            {
+                "kind": "t3",
+                "data": {
+                    "id": _to_base36(post_id),
+                    "created_utc": created(post_id).timestamp(),
+                },
+            }
+            for post_id in ids
+        ]
+        return {"data": {"children": children}}
+
+    extractor = RedditJsonExtractor(fallback=MagicMock())
+    extractor._get_json = MagicMock(side_effect=get_json)
+
+    cursor = extractor.slice_cursor(EPOCH + timedelta(minutes=1_234_567))
+
+    assert cursor == f"t3_{_to_base36(1_234_569)}"
+    assert extractor._get_json.call_count <= 1 + extractor.cursor_search_rounds
+    assert extractor.slice_cursor(EPOCH + timedelta(minutes=newest_id)) is None
+
+
+def test_backfill_author_runs_slices_in_a_chord():
+    extractor = MagicMock(supports_time_slices=True)
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor), patch(
+        "celery_tasks.tasks.chord"
+    ) as chord:
+        tasks.backfill_author("author", EPOCH, "reddit", num_slices=4)
+
+    header = list(chord.call_args.args[0])
+    assert [signature.task for signature in header] == ["crawling:crawl_slice"] * 4
+    assert [signature.args[1] for signature in header][0] == EPOCH
+    assert {signature.args[4] for signature in header} == {
+        settings.BACKFILL_SLICE_LIMIT
+    }
+    body = chord.return_value.call_args.args[0]
+    assert body.task == "processing:finish_backfill"
+    assert body.args == ("author",)
+
+
+def test_backfill_author_falls_back_to_a_single_slice():
+    extractor = MagicMock(spec=BaseExtractor, supports_time_slices=False)
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor), patch(
+        "celery_tasks.tasks.chord"
+    ) as chord:
+        tasks.backfill_author("author", EPOCH, "linkedin", num_slices=4)
+
+    (signature,) = list(chord.call_args.args[0])
+    assert signature.task == "crawling:crawl_slice"
+    # The single crawl is allowed the posts of all the slices.
+    assert signature.args[1] == EPOCH
+    assert signature.args[4] == 4 * settings.BACKFILL_SLICE_LIMIT
+
+
+def _slice_extractor(*listings):
+    """Extractor listing the author then the posts of each listing in turn."""
+    author = Author(id="t2_author", name="author")
+    extractor = MagicMock(uses_browser=False, supports_time_slices=True)
+    extractor.slice_cursor.return_value = "t3_cursor"
+    extractor.extract_iter.side_effect = [
+        iter(
+            [
+                author,
+                ExtractionBatch(
+                    posts=[Post(id=post_id, author_id="t2_author") for post_id in ids],
+                    medias=[],
+                ),
+            ]
+        )
+        for ids in listings
+    ]
+    return extractor
+
+
+def test_crawl_slice_queues_the_posts_from_the_slice_cursor():
+    extractor = _slice_extractor(["p1"])
+    end = EPOCH + timedelta(days=30)
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=extractor
+    ), patch.object(tasks.process_crawled_data, "delay") as delay:
+        result = tasks.crawl_slice("author", EPOCH, end, "reddit")
+
+    source = extractor.extract_iter.call_args.args[0]
+    assert (source.date_start, source.date_end) == (EPOCH, end)
+    assert source.cursor == "t3_cursor"
+    # Only the author id goes through the result backend, the posts are queued.
+    assert result == "t2_author"
+    author_data, posts_data, _ = delay.call_args.args
+    assert author_data["id"] == "t2_author"
+    assert [post["id"] for post in posts_data] == ["p1"]
+
+
+def test_crawl_slice_fails_when_the_cursor_lists_nothing():
+    extractor = _slice_extractor(["p1"])
+    extractor.extract_iter.side_effect = SliceCursorError("empty listing")
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=extractor
+    ), patch.object(tasks.crawl_slice, "retry") as retry, pytest.raises(
+        SliceCursorError
+    ):
+        tasks.crawl_slice("author", EPOCH, EPOCH + timedelta(days=30), "reddit")
+
+    # The slice is not listed again from the newest post, nor retried.
+    assert extractor.extract_iter.call_count == 1
+    retry.assert_not_called()
+
+
+def test_empty_slice_beyond_the_listing_reach_is_logged(caplog):
+    extractor = _slice_extractor([], [])
+    extractor.listing_reach.return_value = EPOCH + timedelta(days=10)
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor):
+        result = tasks.crawl_slice(
+            "author", EPOCH, EPOCH + timedelta(days=30), "reddit"
+        )
+
+    assert result is None
+    errors = [record for record in caplog.records if record.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert "beyond the reach" in errors[0].getMessage()
+
+
+def test_empty_slice_within_the_listing_reach_is_not_an_error(caplog):
+    extractor = _slice_extractor([], [])
+    extractor.listing_reach.return_value = None
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor):
+        tasks.crawl_slice("author", EPOCH, EPOCH + timedelta(days=30), "reddit")
+
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
+
+
+def test_finish_backfill_returns_the_author_of_any_slice():
+    assert tasks.finish_backfill([None, "t2_author", "t2_author"], "author") == (
+        "t2_author"
+    )
+    assert tasks.finish_backfill([None, None], "author") is None
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from benchmarks import suite
+
+
+def _report(**medians):
+    return {
+        "results": {
+            name: {"median": median, "min": median, "number": 1, "repeat": 1}
+            for name, median in medians.items()
+        }
+    }
+
+
+def test_compare_flags_regressions_past_the_threshold():
+    baseline = _report(parse=1.0, format=1.0, store=1.0)
+    current = _report(parse=1.1, format=1.5, new=9.0)
+
+    rows = suite.compare(baseline, current, threshold=0.2)
+
+    assert [(row["name"], row["regressed"]) for row in rows] == [
+        ("parse", False),
+        ("format", True),
+    ]
+    assert rows[1]["change"] == pytest.approx(0.5)
+
+
+def test_compare_command_fails_on_regression(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    baseline.write_text(json.dumps(_report(parse=1.0)))
+
+    current.write_text(json.dumps(_report(parse=1.05)))
+    assert suite.main(["compare", str(baseline), str(current)]) == 0
+
+    current.write_text(json.dumps(_report(parse=2.0)))
+    assert suite.main(["compare", str(baseline), str(current)]) == 1
+    assert "REGRESSED" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("name", sorted(suite.BENCHMARKS))
+def test_benchmarks_run_offline(monkeypatch, name):
+    monkeypatch.setattr(suite, "TARGET_LOOP_SECONDS", 0.001)
+
+    result = suite.measure(suite.BENCHMARKS[name], repeat=1)
+
+    assert result["median"] > 0
@@ -0,0 +1,156 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from models.data_models import Author, Post
+from storage.change_index import (
+    Change,
+    MemoryChangeIndex,
+    RedisChangeIndex,
+    SqliteChangeIndex,
+    record_digest,
+)
+
+
+def _post(post_id, num_likes=1, text=None, timestamp=datetime(2024, 1, 1)):
+    return Post(
+        id=post_id,
+        text=text or f"Text {post_id}",
+        num_likes=num_likes,
+        num_comments=0,
+        timestamp=timestamp,
+        author_id="a1",
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request, tmp_path):
+    if request.param == "memory":
+        return MemoryChangeIndex()
+    return SqliteChangeIndex({"path": str(tmp_path / "index.sqlite3")})
+
+
+def test_changes_are_classified_against_stored_digests(index):
+    index.commit("posts", [_post("p1"), _post("p2"), _post("p3")])
+
+    changes = index.changes(
+        "posts",
+        [
+            _post("p1", timestamp=datetime(2024, 1, 5)),
+            _post("p2", num_likes=7),
+            _post("p3", text="Edited"),
+            _post("p4"),
+        ],
+    )
+
+    assert changes == [Change.UNCHANGED, Change.COUNTERS, Change.CONTENT, Change.NEW]
+
+
+def test_kinds_are_kept_apart(index):
+    index.commit("posts", [_post("x1")])
+
+    assert index.changes("authors", [Author(id="x1", name="x")]) == [Change.NEW]
+
+
+def test_sqlite_index_survives_reopening(tmp_path):
+    config = {"path": str(tmp_path / "index.sqlite3")}
+    SqliteChangeIndex(config).commit("posts", [_post(f"p{i}") for i in range(1200)])
+
+    changes = SqliteChangeIndex(config).changes(
+        "posts", [_post(f"p{i}") for i in range(1200)]
+    )
+
+    assert set(changes) == {Change.UNCHANGED}
+
+
+def test_redis_index_uses_one_hash_per_kind():
+    with patch("storage.change_index.redis.Redis.from_url") as from_url:
+        client = from_url.return_value
+        client.hmget.return_value = [record_digest(_post("p1")), None]
+        index = RedisChangeIndex({"url": "redis://localhost"})
+
+        changes = index.changes("posts", [_post("p1"), _post("p2")])
+        index.commit("posts", [_post("p2")])
+
+    assert changes == [Change.UNCHANGED, Change.NEW]
+    client.hmget.assert_called_once_with("digests:posts", ["p1", "p2"])
+    client.hset.assert_called_once_with(
+        "digests:posts", mapping={"p2": record_digest(_post("p2"))}
+    )
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = MagicMock()
+    monkeypatch.setitem(settings.CHANGE_INDEX, "enabled", True)
+    monkeypatch.setattr(tasks.store_metadata, "_change_index", MemoryChangeIndex())
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+    return storage
+
+
+def test_recrawl_writes_only_changes(storage):
+    posts = [_post(f"p{i}") for i in range(100)]
+    author = Author(id="a1", name="author", publication_score=10)
+
+    tasks.store_metadata(author.model_dump(), [post.model_dump() for post in posts])
+    assert storage.store_post.call_count == 100
+    assert storage.store_author.call_count == 1
+    storage.reset_mock()
+
+    # Ten posts gained likes, one was edited, the author is unchanged.
+    recrawl = [_post(f"p{i}", num_likes=5) for i in range(10)]
+    recrawl += [_post("p10", text="Edited")] + posts[11:]
+    tasks.store_metadata(author.model_dump(), [post.model_dump() for post in recrawl])
+
+    storage.store_author.assert_not_called()
+    assert [call.args[0].id for call in storage.store_post.call_args_list] == ["p10"]
+    storage.store_deltas.assert_called_once()
+    kind, rows = storage.store_deltas.call_args.args
+    assert kind == "posts"
+    assert rows[0] == {"id": "p0", "num_likes": 5, "num_comments": 0}
+    assert len(rows) == 10
+
+
+def test_author_counters_change_writes_a_delta(storage):
+    author = Author(id="a1", name="author", publication_score=10)
+    tasks.store_metadata(author.model_dump(), [])
+
+    author.publication_score = 12
+    tasks.store_metadata(author.model_dump(), [])
+
+    assert storage.store_author.call_count == 1
+    storage.store_deltas.assert_called_once_with(
+        "authors", [{"id": "a1", "publication_score": 12, "comment_score": 0}]
+    )
+
+
+def test_everything_is_stored_when_index_fails(storage, monkeypatch):
+    broken = MagicMock(changes=MagicMock(side_effect=ConnectionError))
+    monkeypatch.setattr(tasks.store_metadata, "_change_index", broken)
+
+    tasks.store_metadata(None, [_post("p1").model_dump()])
+    tasks.store_metadata(None, [_post("p1").model_dump()])
+
+    assert storage.store_post.call_count == 2
+
+
+def test_failed_writes_are_not_committed(storage):
+    posts = [_post("p1"), _post("p2")]
+
+    def store_post(post):
+        if post.id == "p1":
+            raise OSError("disk full")
+
+    storage.store_post.side_effect = store_post
+    with pytest.raises(OSError):
+        tasks.store_metadata(None, [post.model_dump() for post in posts])
+
+    storage.store_post.reset_mock(side_effect=True)
+    tasks.store_metadata(None, [post.model_dump() for post in posts])
+
+    # Only the post whose write failed is written again.
+    assert [call.args[0].id for call in storage.store_post.call_args_list] == ["p1"]
@@ -0,0 +1,175 @@
+import ast
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from celery import Celery
+
+from celery_tasks import client, tasks
+from telemetry import tracing
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Generous next to the ~0.2s measured, it catches the task code coming back.
+IMPORT_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = (
+    "celery_tasks.tasks",
+    "selenium",
+    "bs4",
+    "pyarrow",
+    "minio",
+    "pydantic",
+    "requests",
+)
+
+
+def _import_times(code: str) -> dict:
+    """Cumulative import time in microseconds of each module ``code`` loads."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def _heavy(times: dict) -> list:
+    return [
+        name
+        for name in times
+        if any(
+            name == module or name.startswith(f"{module}.") for module in HEAVY_MODULES
+        )
+    ]
+
+
+def test_client_imports_no_task_code():
+    times = _import_times("import celery_tasks.client")
+
+    assert _heavy(times) == []
+    assert times["celery_tasks.client"] / 1e6 < IMPORT_BUDGET_SECONDS
+
+
+def test_dashboard_imports_no_task_code():
+    # The page runs on import, only its imports besides streamlit are timed.
+    tree = ast.parse((ROOT / "streamlit_app.py").read_text())
+    imports = [
+        ast.unparse(node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        and "streamlit" not in ast.unparse(node)
+    ]
+    times = _import_times("; ".join(imports))
+
+    assert _heavy(times) == []
+
+
+def test_task_names_match_the_tasks():
+    assert client.CRAWL_AUTHOR == tasks.crawl_author.name
+    assert client.BACKFILL_AUTHOR == tasks.backfill_author.name
+
+
+def test_tasks_are_routed_by_name():
+    route = client.app.amqp.router.route({}, client.CRAWL_AUTHOR)
+
+    assert route["queue"].name == "crawling"
+
+
+@pytest.fixture
+def send_task(monkeypatch):
+    send_task = MagicMock()
+    monkeypatch.setattr(client.app, "send_task", send_task)
+    return send_task
+
+
+def test_crawl_author_sends_the_task_by_name(send_task):
+    date_start = datetime(2024, 1, 1)
+
+    client.crawl_author("author", date_start, "reddit")
+
+    send_task.assert_called_once_with(
+        "crawling:crawl_author",
+        kwargs={
+            "author_name": "author",
+            "date_start": date_start,
+            "source_type": "reddit",
+            "limit": None,
+        },
+        headers=None,
+    )
+
+
+def test_submit_continues_the_current_trace(send_task):
+    tracing.set_enabled(True)
+    tracing.set_exporter(MagicMock())
+    try:
+        with tracing.start_trace("submit") as trace:
+            client.backfill_author("author", datetime(2024, 1, 1), "reddit")
+    finally:
+        tracing.set_enabled(False)
+        tracing.set_exporter(None)
+
+    headers = send_task.call_args.kwargs["headers"]
+    assert headers[tracing.TRACE_HEADER] == trace.trace_id
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    app = Celery("test", backend="cache+memory://")
+    monkeypatch.setattr(client, "app", app)
+    return app.backend
+
+
+def _store(backend, task_id, status, children=(), result=None, traceback=None):
+    meta = {
+        "task_id": task_id,
+        "status": status,
+        "result": result,
+        "traceback": traceback,
+        "children": [[[child, None], None] for child in children],
+    }
+    backend.set(backend.get_key_for_task(task_id), backend.encode(meta))
+
+
+def test_task_statuses_follow_the_queued_tasks(backend, monkeypatch):
+    _store(backend, "crawl", "SUCCESS", ["process"], result="t2_author")
+    _store(backend, "process", "SUCCESS", ["store", "media1", "media2"])
+    _store(backend, "store", "SUCCESS")
+    _store(backend, "media1", "FAILURE", traceback="Traceback ...")
+    mget = MagicMock(wraps=backend.mget)
+    monkeypatch.setattr(backend, "mget", mget)
+
+    statuses = client.task_statuses(["crawl", "unknown"])
+
+    assert statuses["crawl"] == {
+        "status": "SUCCESS",
+        "result": "t2_author",
+        "error": None,
+        "children": {"SUCCESS": 2, "FAILURE": 1, "PENDING": 1},
+    }
+    assert statuses["unknown"]["status"] == "PENDING"
+    # One MGET per level of the task tree, not one lookup per task.
+    assert mget.call_count == 3
+
+
+def test_task_statuses_read_group_members(backend):
+    _store(backend, "backfill", "SUCCESS")
+    meta = backend.get_task_meta("backfill")
+    meta["children"] = [[["group", None], [[["slice1", None], None]]]]
+    backend.set(backend.get_key_for_task("backfill"), backend.encode(meta))
+    _store(backend, "slice1", "STARTED")
+
+    statuses = client.task_statuses(["backfill"])
+
+    assert statuses["backfill"]["children"] == {"STARTED": 1}
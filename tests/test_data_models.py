@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import HttpUrl, ValidationError
+
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from models.data_models import Media, Post
+
+POSTS_DATA = [
+    {
+        "id": f"t3_{i}",
+        "text": f"Body {i}",
+        "timestamp": "2024-01-01T12:00:00",
+        "num_likes": str(i),
+        "url": f"https://reddit.com/r/test/comments/{i}/",
+        "author_id": "t2_author",
+    }
+    for i in range(3)
+]
+
+
+def test_validate_many_matches_one_by_one():
+    assert Post.validate_many(POSTS_DATA) == [Post(**data) for data in POSTS_DATA]
+
+
+def test_validate_many_parses_urls_by_default():
+    posts = Post.validate_many(POSTS_DATA)
+
+    assert isinstance(posts[0].url, HttpUrl)
+    with pytest.raises(ValidationError):
+        Media.validate_many([{"id": "m", "post_id": "p", "original_url": "nope"}])
+
+
+def test_trusted_mode_keeps_urls_and_validates_the_rest():
+    posts = Post.validate_many(POSTS_DATA, trusted=True)
+
+    assert posts[0].url == "https://reddit.com/r/test/comments/0/"
+    assert posts[1].num_likes == 1
+    assert posts[0].timestamp.year == 2024
+    media = Media.validate_one(
+        {"id": "m", "post_id": "p", "original_url": "https://i.redd.it/a.jpg"},
+        trusted=True,
+    )
+    assert media.original_url == "https://i.redd.it/a.jpg"
+    with pytest.raises(ValidationError):
+        Post.validate_many([{"id": "t3_x"}], trusted=True)
+
+
+def test_trusted_and_parsed_models_dump_the_same():
+    parsed = Post.validate_many(POSTS_DATA)
+    trusted = Post.validate_many(POSTS_DATA, trusted=True)
+
+    assert [post.model_dump() for post in trusted] == [
+        post.model_dump() for post in parsed
+    ]
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_store_metadata_validates_posts_in_one_batch(monkeypatch, trusted):
+    monkeypatch.setattr(settings, "TRUSTED_VALIDATION", trusted)
+    storage = MagicMock()
+
+    with patch.object(StorageTask, "_storage", storage), patch.object(
+        Post, "validate_many", wraps=Post.validate_many
+    ) as validate_many:
+        tasks.store_metadata(None, POSTS_DATA)
+
+    validate_many.assert_called_once_with(POSTS_DATA, trusted=trusted)
+    assert storage.store_post.call_count == 3
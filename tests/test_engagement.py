@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from models.data_models import Post
+from storage.engagement import EngagementStore
+from storage.local_storage import LocalStorageHandler
+
+START = datetime(2024, 3, 1, 12)
+
+
+def _post(post_id, num_likes, num_comments=0):
+    return Post(
+        id=post_id,
+        text="A long post body that the engagement series never stores",
+        num_likes=num_likes,
+        num_comments=num_comments,
+        timestamp=datetime(2024, 3, 1),
+        author_id="a1",
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageHandler({"root": str(tmp_path)})
+
+
+@pytest.fixture
+def store(storage):
+    store = EngagementStore(storage)
+    # p1 rises fast, p2 slowly, p3 is only seen once.
+    for hours, likes in enumerate([(10, 5), (40, 6), (90, 8)]):
+        posts = [_post("p1", likes[0], hours), _post("p2", likes[1])]
+        if hours == 0:
+            posts.append(_post("p3", 1000))
+        store.append(posts, crawled_at=START + timedelta(hours=hours * 12))
+    return store
+
+
+def test_points_are_partitioned_by_day_and_delta_encoded(store, storage):
+    paths = storage.list_paths("engagement/")
+    assert [path.split("/")[1] for path in paths] == [
+        "day=2024-03-01",
+        "day=2024-03-02",
+        "day=2024-03-02",
+    ]
+
+    metadata = pq.ParquetFile(storage._full_path(paths[0])).metadata
+    assert metadata.schema.names == [
+        "post_id",
+        "crawled_at",
+        "num_likes",
+        "num_comments",
+    ]
+    columns = metadata.row_group(0)
+    assert "DELTA_BINARY_PACKED" in columns.column(2).encodings
+    assert "RLE_DICTIONARY" in columns.column(0).encodings
+
+
+def test_curve_returns_the_points_of_one_post_in_order(store):
+    curve = store.curve("p1")
+
+    assert [point["num_likes"] for point in curve] == [10, 40, 90]
+    assert [point["num_comments"] for point in curve] == [0, 1, 2]
+    assert curve[0]["crawled_at"] == START
+
+
+def test_curve_is_limited_to_the_window(store):
+    curve = store.curve("p1", start=START + timedelta(hours=12))
+
+    assert [point["num_likes"] for point in curve] == [40, 90]
+
+
+def test_top_risers_rank_growth_within_the_window(store):
+    risers = store.top_risers(START, START + timedelta(days=2))
+
+    assert [(row["post_id"], row["rise"]) for row in risers] == [
+        ("p1", 80),
+        ("p2", 3),
+    ]
+    assert risers[0]["points"] == 3
+
+    late = store.top_risers(START + timedelta(hours=12), START + timedelta(days=2))
+    assert [(row["post_id"], row["rise"]) for row in late] == [("p1", 50), ("p2", 2)]
+    assert (
+        store.top_risers(START, START + timedelta(days=2), limit=1)[0]["post_id"]
+        == "p1"
+    )
+
+
+def test_top_risers_rejects_unknown_metrics(store):
+    with pytest.raises(ValueError):
+        store.top_risers(START, START + timedelta(days=1), metric="text")
+
+
+def test_store_metadata_appends_engagement(monkeypatch, storage):
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+    monkeypatch.setitem(settings.CHANGE_INDEX, "enabled", False)
+    monkeypatch.setattr(settings, "ENGAGEMENT_ENABLED", True)
+
+    tasks.store_metadata(None, [_post("p1", 3).model_dump()])
+    tasks.store_metadata(None, [_post("p1", 7).model_dump()])
+
+    curve = EngagementStore(storage).curve("p1")
+    assert [point["num_likes"] for point in curve] == [3, 7]
+
+
+def test_compaction_rewrites_past_days_into_one_file(store, storage):
+    points = store.points()
+
+    assert store.compact_closed(now=datetime(2024, 3, 2, 18)) == [
+        "engagement/day=2024-03-01/compacted.parquet"
+    ]
+    assert store.compact_closed(now=datetime(2024, 3, 3)) == [
+        "engagement/day=2024-03-02/compacted.parquet"
+    ]
+    assert store.compact_closed(now=datetime(2024, 3, 3)) == []
+
+    assert storage.list_paths("engagement/") == [
+        "engagement/day=2024-03-01/compacted.parquet",
+        "engagement/day=2024-03-02/compacted.parquet",
+    ]
+    assert store.points().equals(points)
+    metadata = pq.ParquetFile(
+        storage._full_path("engagement/day=2024-03-02/compacted.parquet")
+    ).metadata
+    assert metadata.num_rows == 4
+    assert "DELTA_BINARY_PACKED" in metadata.row_group(0).column(2).encodings
+
+
+def test_interrupted_compaction_completes_without_duplicates(store, storage):
+    points = store.points()
+    small = {
+        path: storage.get_bytes(path)
+        for path in storage.list_paths("engagement/day=2024-03-02/")
+    }
+    store.compact(date(2024, 3, 2))
+    # The small files were not deleted.
+    for path, data in small.items():
+        storage.put_bytes(path, data)
+    assert store.points().num_rows > points.num_rows
+
+    store.compact(date(2024, 3, 2))
+
+    assert storage.list_paths("engagement/day=2024-03-02/") == [
+        "engagement/day=2024-03-02/compacted.parquet"
+    ]
+    assert store.points().equals(points)
+
+
+def test_compact_engagement_task(store, storage, monkeypatch):
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+
+    result = tasks.compact_engagement.apply()
+
+    assert len(result.get()) == 2
+    assert len(storage.list_paths("engagement/")) == 2
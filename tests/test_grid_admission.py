@@ -0,0 +1,174 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import GRID_DEFERRALS_HEADER, ExtractTask
+from config.config import settings
+from scrapers.grid import GridCapacityError, count_free_slots, free_slots
+
+
+def _slot(session=None, browser_name="chrome"):
+    return {
+        "id": {"hostId": "node", "id": "slot"},
+        "session": session,
+        "stereotype": {"browserName": browser_name},
+    }
+
+
+def _status(*nodes, ready=True):
+    return {"value": {"ready": ready, "message": "", "nodes": list(nodes)}}
+
+
+def _node(*slots, availability="UP"):
+    return {"availability": availability, "maxSessions": len(slots), "slots": slots}
+
+
+BUSY = {"sessionId": "abc", "start": "2024-01-01T00:00:00Z"}
+
+
+class StubGridHandler(BaseHTTPRequestHandler):
+    status: dict = {}
+    requests_seen: int = 0
+
+    def do_GET(self):
+        type(self).requests_seen += 1
+        if self.path != "/wd/hub/status":
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(self.status).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_grid(monkeypatch):
+    StubGridHandler.requests_seen = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGridHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        settings,
+        "SELENIUM_STATUS_URL",
+        f"http://127.0.0.1:{server.server_port}/wd/hub/status",
+    )
+    monkeypatch.setattr(settings, "SELENIUM_ADMISSION_CONTROL", True)
+    yield StubGridHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_count_free_slots_ignores_busy_down_and_other_browsers():
+    status = _status(
+        _node(_slot(), _slot(BUSY), _slot(browser_name="firefox")),
+        _node(_slot(), availability="DOWN"),
+        _node(_slot(), _slot()),
+    )["value"]
+
+    assert count_free_slots(status) == 3
+
+
+def test_count_free_slots_is_zero_when_grid_not_ready():
+    assert count_free_slots(_status(_node(_slot()), ready=False)["value"]) == 0
+
+
+def test_free_slots_reads_status_endpoint(stub_grid):
+    stub_grid.status = _status(_node(_slot(), _slot(BUSY)))
+
+    assert free_slots() == 1
+
+
+def test_free_slots_is_unknown_when_hub_unreachable(stub_grid):
+    assert free_slots("http://127.0.0.1:9/wd/hub/status") is None
+
+
+def _browser_extractor():
+    extractor = MagicMock(supports_raw_fetch=False, uses_browser=True)
+    extractor.extract_iter.return_value = iter([])
+    return extractor
+
+
+def test_crawl_author_is_deferred_while_grid_full(stub_grid, monkeypatch):
+    stub_grid.status = _status(_node(_slot(BUSY)))
+    monkeypatch.setattr(settings, "SELENIUM_MAX_DEFERRALS", 3)
+    extractor = _browser_extractor()
+    signature_from_request = tasks.crawl_author.signature_from_request
+
+    # Eager tasks run their retry signature right away, so the deferrals chain
+    # until SELENIUM_MAX_DEFERRALS is reached.
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=extractor
+    ), patch.object(
+        ExtractTask, "signature_from_request", wraps=signature_from_request
+    ) as signature:
+        result = tasks.crawl_author.apply(
+            args=("author", datetime(2000, 1, 1), "reddit")
+        )
+
+    assert result.state == "FAILURE"
+    assert isinstance(result.result, GridCapacityError)
+    extractor.extract_iter.assert_not_called()
+    calls = [
+        call.kwargs for call in signature.call_args_list if "headers" in call.kwargs
+    ]
+    assert [call["headers"][GRID_DEFERRALS_HEADER] for call in calls] == [1, 2, 3]
+    assert all(
+        settings.SELENIUM_DEFER_COUNTDOWN
+        <= call["countdown"]
+        <= 2 * settings.SELENIUM_DEFER_COUNTDOWN
+        for call in calls
+    )
+
+
+def test_crawl_author_fails_after_max_deferrals(stub_grid, monkeypatch):
+    stub_grid.status = _status(_node(_slot(BUSY)))
+    monkeypatch.setattr(settings, "SELENIUM_MAX_DEFERRALS", 2)
+    extractor = _browser_extractor()
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor):
+        result = tasks.crawl_author.apply(
+            args=("author", datetime(2000, 1, 1), "reddit"),
+            headers={GRID_DEFERRALS_HEADER: 2},
+            retries=3,
+        )
+
+    assert result.state == "FAILURE"
+    assert isinstance(result.result, GridCapacityError)
+
+
+def test_crawl_author_runs_when_slot_free(stub_grid):
+    stub_grid.status = _status(_node(_slot(BUSY), _slot()))
+    extractor = _browser_extractor()
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor):
+        result = tasks.crawl_author.apply(
+            args=("author", datetime(2000, 1, 1), "reddit")
+        )
+
+    assert result.state == "SUCCESS"
+    extractor.extract_iter.assert_called_once()
+
+
+def test_http_extractors_skip_grid_check(stub_grid):
+    stub_grid.status = _status(_node(_slot(BUSY)))
+    extractor = _browser_extractor()
+    extractor.uses_browser = False
+
+    with patch.object(ExtractTask, "get_extractor", return_value=extractor):
+        result = tasks.crawl_author.apply(
+            args=("author", datetime(2000, 1, 1), "reddit")
+        )
+
+    assert result.state == "SUCCESS"
+    assert stub_grid.requests_seen == 0
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from benchmarks import load_test
+from models.data_models import Author, ExtractionBatch, Source
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "lognormal"])
+def test_num_posts_follows_the_mean(distribution):
+    rng = random.Random(0)
+
+    counts = [load_test.num_posts(rng, 40, distribution) for _ in range(2000)]
+
+    assert sum(counts) / len(counts) == pytest.approx(40, rel=0.15)
+
+
+def test_synthetic_extractor_is_deterministic(monkeypatch):
+    monkeypatch.setitem(load_test.PROFILE, "media_rate", 0.5)
+    source = Source(
+        author="author00001",
+        date_start="2000-01-01",
+        source_type=load_test.SOURCE_TYPE,
+        limit=100,
+    )
+
+    first = list(load_test.SyntheticExtractor().extract_iter(source))
+    second = list(load_test.SyntheticExtractor().extract_iter(source))
+
+    assert isinstance(first[0], Author)
+    assert all(isinstance(batch, ExtractionBatch) for batch in first[1:])
+    assert first == second
+    posts = [post for batch in first[1:] for post in batch.posts]
+    assert len({post.id for post in posts}) == len(posts) <= 100
+
+
+def test_load_test_runs_the_task_chain():
+    options = {
+        "concurrency": 2,
+        "profile": {"posts_mean": 15, "distribution": "fixed", "media_rate": 1.0},
+    }
+
+    # Two processes, so the worker and settings changes stay out of this one.
+    report = load_test.run(4, workers=2, options=options)
+
+    assert report["authors"] == 4
+    assert report["authors_per_hour"] > 0
+    stages = report["stages"]
+    assert stages["crawling:crawl_author"]["tasks"] == 4
+    # 15 posts in batches of 10 make two batches per author.
+    assert stages["processing:process_crawled_data"]["tasks"] == 8
+    assert stages["storage:store_metadata"]["tasks"] == 8
+    assert stages["media:process_media"]["tasks"] == 60
+    for worker in report["workers"]:
+        assert worker["peak_rss_bytes"] > 0
+        assert worker["queue_depth"]
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from loaders import Loader
+from loaders.base import latest_per_id
+from loaders.sqlite_target import SqliteTarget
+from models.data_models import Author, Media, Post
+from storage.local_storage import LocalStorageHandler
+
+
+def _post(post_id, num_likes, title=None):
+    return Post(
+        id=post_id,
+        title=title or f"Title {post_id}",
+        timestamp=datetime(2024, 3, 6, 9),
+        num_likes=num_likes,
+        num_comments=1,
+        author_id="a1",
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorageHandler({"root": str(tmp_path / "storage")})
+    storage.store_author(Author(id="a1", name="alice", publication_score=3))
+    for i in range(5):
+        storage.store_post(_post(f"p{i}", i))
+    storage.store_media(
+        Media(id="m1", post_id="p1", original_url="https://example.com/a.jpg")
+    )
+    return storage
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def target(request, tmp_path):
+    if request.param == "sqlite":
+        target = SqliteTarget({"path": str(tmp_path / "warehouse.sqlite3")})
+    else:
+        pytest.importorskip("duckdb")
+        from loaders.duckdb_target import DuckDBTarget
+
+        target = DuckDBTarget({"path": str(tmp_path / "warehouse.duckdb")})
+    yield target
+    target.close()
+
+
+def _rows(target, sql):
+    return target.connection.execute(sql).fetchall()
+
+
+def _likes(target):
+    return dict(_rows(target, "SELECT id, num_likes FROM posts"))
+
+
+def test_records_are_loaded_with_their_types(storage, target):
+    loaded = Loader(storage, target, workers=4).load()
+
+    assert loaded == {
+        "authors": 1,
+        "posts": 5,
+        "media": 1,
+        "author_deltas": 0,
+        "post_deltas": 0,
+    }
+    assert _likes(target) == {f"p{i}": i for i in range(5)}
+    assert _rows(target, "SELECT name, publication_score FROM authors") == [
+        ("alice", 3)
+    ]
+    assert _rows(target, "SELECT post_id, hosted_url FROM media") == [("p1", None)]
+    # The notebook's post count query runs as is.
+    assert _rows(
+        target,
+        "SELECT a.id, COUNT(p.id) FROM authors a JOIN posts p ON a.id = p.author_id "
+        "GROUP BY a.id",
+    ) == [("a1", 5)]
+
+
+def test_loads_are_incremental(storage, target):
+    loader = Loader(storage, target)
+    loader.load()
+
+    assert sum(loader.load().values()) == 0
+
+    storage.store_post(_post("p1", 50, title="Edited"))
+    storage.store_post(_post("p9", 9))
+    assert loader.load()["posts"] == 2
+    assert _likes(target)["p1"] == 50
+    assert len(_likes(target)) == 6
+
+
+def test_newer_deltas_update_the_counters(storage, target):
+    loader = Loader(storage, target)
+    loader.load()
+    storage.store_deltas("posts", [{"id": "p1", "num_likes": 70, "num_comments": 2}])
+    storage.store_deltas(
+        "authors", [{"id": "a1", "publication_score": 8, "comment_score": 1}]
+    )
+
+    assert loader.load(["author_deltas", "post_deltas"]) == {
+        "author_deltas": 1,
+        "post_deltas": 1,
+    }
+    assert _likes(target)["p1"] == 70
+    assert _rows(target, "SELECT publication_score FROM authors") == [(8,)]
+
+
+def test_deltas_older_than_the_record_are_ignored(storage, target):
+    storage.store_deltas("posts", [{"id": "p1", "num_likes": 70, "num_comments": 2}])
+    # p1 stored in full after its delta, both loaded in the same run.
+    later = time.time() + 60
+    os.utime(
+        os.path.join(storage.root, "extracts-data/posts/p1.parquet"), (later, later)
+    )
+
+    Loader(storage, target).load()
+
+    assert _likes(target)["p1"] == 1
+
+
+def test_interrupted_load_resumes_after_the_last_batch(storage, target):
+    loader = Loader(storage, target, batch_files=2)
+    upsert = target.upsert
+    calls = []
+
+    def failing_upsert(table, rows, versions):
+        calls.append(table)
+        if len(calls) == 3:
+            raise ConnectionError("lost")
+        upsert(table, rows, versions)
+
+    with patch.object(target, "upsert", side_effect=failing_upsert):
+        with pytest.raises(ConnectionError):
+            loader.load(["posts"])
+
+    assert len(_likes(target)) == 4
+    assert loader.load(["posts"]) == {"posts": 1}
+
+
+def test_latest_row_per_id_is_kept():
+    schema = pa.schema([("id", pa.string()), ("_modified_at", pa.timestamp("us"))])
+    rows = pa.table(
+        {
+            "id": ["b", "a", "b"],
+            "_modified_at": [
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 2),
+            ],
+        },
+        schema=schema,
+    )
+
+    assert latest_per_id(rows).to_pylist() == [
+        {"id": "a", "_modified_at": datetime(2024, 1, 1)},
+        {"id": "b", "_modified_at": datetime(2024, 1, 2)},
+    ]
+
+
+def test_load_warehouse_task(storage, tmp_path, monkeypatch):
+    path = str(tmp_path / "warehouse.sqlite3")
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+    monkeypatch.setitem(settings.LOAD_TARGET, "enabled", True)
+    monkeypatch.setitem(settings.LOAD_TARGET, "config", {"path": path})
+
+    result = tasks.load_warehouse.apply(kwargs={"sources": ["posts"]})
+
+    assert result.get() == {"posts": 5}
+    assert len(_likes(SqliteTarget({"path": path}))) == 5
+
+
+def test_snowflake_target_stages_a_batch_in_a_few_files(storage):
+    connector = MagicMock()
+    cursor = connector.connect.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = []
+    modules = {
+        "snowflake": MagicMock(connector=connector),
+        "snowflake.connector": connector,
+    }
+    with patch.dict(sys.modules, modules):
+        from loaders.snowflake_target import SnowflakeTarget
+
+        target = SnowflakeTarget(
+            {
+                "account": "account",
+                "user": "user",
+                "password": "password",
+                "database": "database",
+                "schema": "schema",
+                "stage": "stage",
+                "workers": 2,
+            }
+        )
+        Loader(storage, target).load(["posts"])
+
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    puts = [statement for statement in statements if statement.startswith("PUT ")]
+    assert len(puts) == 2
+    assert all("@stage/loads/" in statement for statement in puts)
+    assert any(
+        statement.startswith("COPY INTO staged_posts") for statement in statements
+    )
+    assert any(
+        statement.startswith("MERGE INTO posts t USING staged_posts s")
+        for statement in statements
+    )
+    assert statements[-1] == "COMMIT"
+    # DDL would commit the transaction early, none runs between BEGIN and COMMIT.
+    begin = statements.index("BEGIN")
+    assert not any(statement.startswith("CREATE") for statement in statements[begin:])
+    assert sorted(path for path, _ in cursor.executemany.call_args.args[1]) == [
+        f"posts/p{i}.parquet" for i in range(5)
+    ]
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+from urllib.request import urlopen
+
+import pytest
+from celery.exceptions import Retry
+
+from celery_tasks import signals, tasks
+from scrapers.grid import GridCapacityError
+from telemetry import metrics
+from telemetry.server import start_http_server
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.set_enabled(True)
+    metrics.REGISTRY.clear()
+    yield metrics
+    metrics.set_enabled(False)
+    metrics.REGISTRY.clear()
+
+
+def test_counters_and_histograms_render_in_text_format(enabled_metrics):
+    registry = metrics.Registry()
+    uploads = registry.register(
+        metrics.Counter("uploads_total", "Bytes uploaded", ("bucket",))
+    )
+    timings = registry.register(
+        metrics.Histogram("step_seconds", "Step time", ("step",), buckets=(0.1, 1))
+    )
+
+    uploads.inc(10, bucket="data")
+    uploads.inc(5, bucket="data")
+    timings.observe(0.05, step='say "hi"')
+    timings.observe(0.5, step='say "hi"')
+    timings.observe(5, step='say "hi"')
+
+    assert registry.render().splitlines() == [
+        "# HELP uploads_total Bytes uploaded",
+        "# TYPE uploads_total counter",
+        'uploads_total{bucket="data"} 15.0',
+        "# HELP step_seconds Step time",
+        "# TYPE step_seconds histogram",
+        'step_seconds_bucket{step="say \\"hi\\"",le="0.1"} 1',
+        'step_seconds_bucket{step="say \\"hi\\"",le="1.0"} 2',
+        'step_seconds_bucket{step="say \\"hi\\"",le="+Inf"} 3',
+        'step_seconds_sum{step="say \\"hi\\""} 5.55',
+        'step_seconds_count{step="say \\"hi\\""} 3',
+    ]
+
+
+def test_stage_observes_elapsed_time(enabled_metrics):
+    with metrics.stage("parse", "reddit"):
+        pass
+
+    assert metrics.STAGE_SECONDS.count(stage="parse", source="reddit") == 1
+
+
+def test_nothing_is_recorded_when_disabled():
+    metrics.set_enabled(False)
+
+    stage = metrics.stage("parse", "reddit")
+    with stage:
+        metrics.POSTS_PROCESSED.inc(3)
+
+    assert stage is metrics.stage("upload")
+    assert metrics.STAGE_SECONDS.count(stage="parse", source="reddit") == 0
+    assert metrics.POSTS_PROCESSED.value() == 0
+
+
+def test_http_endpoint_serves_the_registry(enabled_metrics):
+    metrics.POSTS_PROCESSED.inc(2)
+    server = start_http_server(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urlopen(url) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "crawler_posts_processed_total 2.0" in body.splitlines()
+
+
+def test_retries_are_counted_per_source(enabled_metrics):
+    crawl = SimpleNamespace(
+        args=["author", "2024-01-01T00:00:00", "linkedin"], kwargs={}
+    )
+    parse = SimpleNamespace(args=[{}, {"source_type": "reddit"}], kwargs={})
+
+    signals.count_retry(sender=tasks.crawl_author, request=crawl)
+    signals.count_retry(sender=tasks.parse_raw_batch, request=parse)
+
+    assert metrics.RETRIES.value(task="crawling:crawl_author", source="linkedin") == 1
+    assert (
+        metrics.RETRIES.value(task="processing:parse_raw_batch", source="reddit") == 1
+    )
+
+
+def test_grid_deferrals_are_not_counted_as_retries(enabled_metrics):
+    crawl = SimpleNamespace(
+        args=["author", "2024-01-01T00:00:00", "linkedin"], kwargs={}
+    )
+    deferral = Retry(exc=GridCapacityError("No free Selenium Grid slot"), when=30)
+
+    signals.count_retry(sender=tasks.crawl_author, request=crawl, reason=deferral)
+
+    assert metrics.RETRIES.value(task="crawling:crawl_author", source="linkedin") == 0
+    assert metrics.DEFERRALS.value(task="crawling:crawl_author", source="linkedin") == 1
@@ -1,10 +1,16 @@
+import os
+import time
 from datetime import datetime
+from io import BytesIO
 from unittest.mock import MagicMock, patch
 
+import pyarrow.parquet as pq
+
 import pytest
 from minio import Minio
 from pydantic import HttpUrl
 
+from config.config import settings
 from models.data_models import Author, Media, Post
 from storage.minio_storage import MinIOHandler
 
@@ -21,6 +27,11 @@ def mock_minio():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def buckets_flag_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "MINIO_BUCKETS_FLAG_DIR", str(tmp_path))
+
+
 @pytest.fixture
 def minio_handler():
     config = {
@@ -85,6 +96,25 @@ def test_setup_buckets_existing(minio_handler, mock_minio):
     mock_minio.make_bucket.assert_not_called()
 
 
+def test_bucket_setup_is_skipped_while_flagged(minio_handler, mock_minio):
+    assert minio_handler.buckets_verified()
+    mock_minio.reset_mock()
+
+    MinIOHandler({"endpoint": "localhost:9000"})
+
+    mock_minio.bucket_exists.assert_not_called()
+
+
+def test_bucket_setup_runs_again_after_the_ttl(minio_handler, mock_minio):
+    expired = time.time() - settings.MINIO_BUCKETS_CHECK_TTL - 1
+    os.utime(minio_handler._buckets_flag, (expired, expired))
+    mock_minio.reset_mock()
+
+    MinIOHandler({"endpoint": "localhost:9000"})
+
+    assert mock_minio.bucket_exists.call_count == 2
+
+
 def test_store_author_success(minio_handler, mock_minio, sample_author):
     with patch("pyarrow.Table") as mock_table_class, patch(
         "pyarrow.parquet.write_table"
@@ -194,6 +224,14 @@ def test_store_media_different_types(minio_handler, mock_minio):
             mock_minio.reset_mock()
 
 
+def test_store_post_raises_on_upload_error(minio_handler, mock_minio, sample_post):
+    with patch("pyarrow.parquet.write_table"), patch("os.remove"):
+        mock_minio.fput_object.side_effect = ConnectionError("upload failed")
+
+        with pytest.raises(ConnectionError):
+            minio_handler.store_post(sample_post)
+
+
 def test_download_media_error(minio_handler, mock_minio, sample_media):
     with patch("requests.get") as mock_get:
         mock_get.side_effect = Exception("Download failed")
@@ -202,3 +240,36 @@ def test_download_media_error(minio_handler, mock_minio, sample_media):
 
         assert result is None
         mock_minio.put_object.assert_not_called()
+
+
+def test_store_deltas_writes_one_file(minio_handler, mock_minio):
+    rows = [{"id": "p1", "num_likes": 5, "num_comments": 1}] * 3
+
+    minio_handler.store_deltas("posts", rows)
+
+    bucket, path, data = mock_minio.put_object.call_args.args
+    assert bucket == "extracts-data"
+    assert path.startswith("deltas/posts/") and path.endswith(".parquet")
+    table = pq.read_table(BytesIO(data.getvalue()))
+    assert table.num_rows == 3
+    assert table.column_names == ["id", "num_likes", "num_comments", "crawled_at"]
+
+
+def test_delete_paths_removes_the_objects_in_one_request(minio_handler, mock_minio):
+    mock_minio.remove_objects.return_value = iter([])
+
+    minio_handler.delete_paths(["engagement/a.parquet", "engagement/b.parquet"])
+
+    bucket, objects = mock_minio.remove_objects.call_args.args
+    assert bucket == "extracts-data"
+    assert [obj.name for obj in objects] == [
+        "engagement/a.parquet",
+        "engagement/b.parquet",
+    ]
+
+
+def test_delete_paths_raises_on_errors(minio_handler, mock_minio):
+    mock_minio.remove_objects.return_value = iter([MagicMock(message="Access Denied")])
+
+    with pytest.raises(IOError):
+        minio_handler.delete_paths(["engagement/a.parquet"])
@@ -0,0 +1,207 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import ExtractTask
+from extractors.reddit_extractor import RedditExtractor
+from models.data_models import Author, Source
+from scrapers.selenium_scraper import SCROLL_HEIGHT_SCRIPT, WebScraper
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class FakeTabsDriver:
+    """Driver whose tabs grow by one step per scroll until their heights run out."""
+
+    def __init__(self, heights):
+        self.heights = heights
+        self.positions = {handle: 0 for handle in heights}
+        self.current_window_handle = next(iter(heights))
+        self.switch_to = MagicMock()
+        self.switch_to.window.side_effect = self._switch
+
+    def _switch(self, handle):
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        handle = self.current_window_handle
+        if script == SCROLL_HEIGHT_SCRIPT:
+            return self.heights[handle][self.positions[handle]]
+        self.positions[handle] = min(
+            self.positions[handle] + 1, len(self.heights[handle]) - 1
+        )
+
+
+@pytest.fixture
+def fake_clock():
+    """Skip the scroll pauses and advance the clock by 10 seconds per reading."""
+    clock = iter(range(0, 10_000, 10))
+    with patch("scrapers.selenium_scraper.time.sleep"), patch(
+        "scrapers.selenium_scraper.time.monotonic", lambda: next(clock)
+    ):
+        yield
+
+
+def test_iter_scroll_tabs_interleaves_until_tabs_stop_growing(fake_clock):
+    driver = FakeTabsDriver({"a": [0, 100, 200, 200], "b": [0, 100, 100]})
+
+    handles = list(WebScraper().iter_scroll_tabs(driver, ["a", "b"], set()))
+
+    assert handles == ["a", "b", "a", "b", "a"]
+
+
+def test_iter_scroll_tabs_skips_finished_tabs(fake_clock):
+    driver = FakeTabsDriver({"a": [0, 100, 200, 300], "b": [0, 100, 200, 300]})
+    finished = set()
+    handles = []
+
+    for handle in WebScraper().iter_scroll_tabs(driver, ["a", "b"], finished):
+        handles.append(handle)
+        if handle == "a":
+            finished.add("a")
+        if len(handles) > 10:
+            break
+
+    assert handles[:2] == ["a", "b"]
+    assert handles[2:] == ["b", "b", "b"]
+
+
+@pytest.fixture
+def tabs_extractor():
+    """RedditExtractor whose browser shows the fixture posts in every tab."""
+    page = (FIXTURES_DIR / "reddit_submitted.html").read_text(encoding="utf-8")
+    fragments = re.findall(r"<shreddit-post .*?</shreddit-post>", page, re.S)
+    driver = MagicMock(page_source=page)
+    extractor = RedditExtractor()
+
+    @contextmanager
+    def create_driver():
+        yield driver
+
+    handles = iter(["tab-1", "tab-2", "tab-3"])
+    extractor.scraper = MagicMock()
+    extractor.scraper.create_driver = create_driver
+    extractor.scraper.open_tab.side_effect = lambda d, first: next(handles)
+    extractor.scraper.iter_scroll_tabs.side_effect = lambda d, tabs, finished: (
+        handle for handle in ["tab-1", "tab-2", "tab-1", "tab-2"] if handle in tabs
+    )
+    extractor.scraper.collect_items.side_effect = [
+        fragments[:2],
+        fragments[:1],
+        fragments[2:],
+        [],
+    ]
+    return extractor
+
+
+def _sources(*authors):
+    return [
+        Source(
+            author=author,
+            date_start=datetime(2000, 1, 1),
+            source_type="reddit",
+            limit=100,
+        )
+        for author in authors
+    ]
+
+
+def test_fetch_many_iter_tags_batches_with_their_source(tabs_extractor):
+    pairs = list(tabs_extractor.fetch_many_iter(_sources("first", "second")))
+
+    assert [(source.author, len(raw.items)) for source, raw in pairs] == [
+        ("first", 2),
+        ("second", 1),
+        ("first", 1),
+    ]
+    assert pairs[0][1].author_page is not None
+    assert pairs[1][1].author_page is not None
+    assert pairs[2][1].author_page is None
+
+
+def test_extract_many_iter_parses_each_tab(tabs_extractor):
+    pairs = list(tabs_extractor.extract_many_iter(_sources("first", "second")))
+
+    authors = [source.author for source, item in pairs if isinstance(item, Author)]
+    assert authors == ["first", "second"]
+    posts = [
+        (source.author, post.id)
+        for source, item in pairs
+        if not isinstance(item, Author)
+        for post in item.posts
+    ]
+    assert posts == [
+        ("first", "t3_1kabc01"),
+        ("first", "t3_1kabc02"),
+        ("second", "t3_1kabc01"),
+        ("first", "t3_1kabc03"),
+    ]
+
+
+def test_crawl_authors_dispatches_per_author(tabs_extractor, monkeypatch):
+    monkeypatch.setattr(tasks.settings, "OFFLOAD_PARSING", False)
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=tabs_extractor
+    ), patch.object(tasks.process_crawled_data, "delay") as delay:
+        result = tasks.crawl_authors(
+            ["first", "second", "missing"], datetime(2000, 1, 1), "reddit"
+        )
+
+    assert result == {
+        "authors": {"first": "t2_8x9yz", "second": "t2_8x9yz", "missing": None},
+        "requeued": {},
+    }
+    with_author = [call.args[0] is not None for call in delay.call_args_list]
+    assert with_author == [True, True, False]
+
+
+def _failing_feed(*failing):
+    def open_feed(driver, url):
+        if any(f"/user/{author}/" in url for author in failing):
+            raise TimeoutError("feed did not load")
+
+    return open_feed
+
+
+def test_tab_of_a_failed_feed_is_reused(tabs_extractor, monkeypatch):
+    monkeypatch.setattr(tabs_extractor, "_open_feed", _failing_feed("second"))
+
+    pairs = list(tabs_extractor.fetch_many_iter(_sources("first", "second", "third")))
+
+    assert tabs_extractor.scraper.open_tab.call_count == 2
+    tabs = tabs_extractor.scraper.iter_scroll_tabs.call_args.args[1]
+    assert tabs == ["tab-1", "tab-2"]
+    tabs_extractor.scraper.close_tab.assert_not_called()
+    assert ("second", None) in [(source.author, raw) for source, raw in pairs]
+
+
+def test_tab_of_a_failed_last_feed_is_closed(tabs_extractor, monkeypatch):
+    monkeypatch.setattr(tabs_extractor, "_open_feed", _failing_feed("second"))
+
+    list(tabs_extractor.fetch_many_iter(_sources("first", "second")))
+
+    tabs_extractor.scraper.close_tab.assert_called_once()
+
+
+def test_crawl_authors_requeues_skipped_authors(tabs_extractor, monkeypatch):
+    monkeypatch.setattr(tasks.settings, "OFFLOAD_PARSING", True)
+    monkeypatch.setattr(tabs_extractor, "_open_feed", _failing_feed("second"))
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=tabs_extractor
+    ), patch.object(tasks.parse_raw_batch, "delay"), patch.object(
+        tasks.crawl_author, "delay"
+    ) as crawl_author:
+        crawl_author.return_value.id = "retry-task"
+        result = tasks.crawl_authors(
+            ["first", "second"], datetime(2000, 1, 1), "reddit", 50
+        )
+
+    assert result == {"authors": {"first": None}, "requeued": {"second": "retry-task"}}
+    crawl_author.assert_called_once_with("second", datetime(2000, 1, 1), "reddit", 50)
@@ -0,0 +1,142 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from benchmarks.parse_benchmark import available_backends
+from config.config import settings
+from extractors import parsing
+from extractors.linkedin_extractor import LinkedinExtractor
+from extractors.reddit_extractor import RedditExtractor
+from models.data_models import Author, RawBatch, Source
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(params=available_backends())
+def backend(request, monkeypatch):
+    monkeypatch.setattr(settings, "HTML_PARSER", request.param)
+    parsing.resolve_parser.cache_clear()
+    yield request.param
+    parsing.resolve_parser.cache_clear()
+
+
+@pytest.fixture
+def source():
+    return Source(
+        author="etnikhalili",
+        date_start=datetime(2000, 1, 1),
+        source_type="test",
+        limit=100,
+    )
+
+
+def _page(name):
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def test_resolve_parser_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        parsing.resolve_parser("selectolax")
+
+
+def test_reddit_parse_page(backend, source):
+    result = RedditExtractor()._parse_page(_page("reddit_submitted.html"), source)
+
+    assert result.author.id == "t2_8x9yz"
+    assert result.author.joined_date == datetime(2021, 3, 14, 9, 26, 53)
+    assert result.author.publication_score == 24301
+    assert result.author.comment_score == 1207
+    assert [post.id for post in result.posts] == [
+        "t3_1kabc01",
+        "t3_1kabc02",
+        "t3_1kabc03",
+    ]
+    assert result.posts[0].title == "Cozy sunday with the bunnies"
+    assert result.posts[0].text == (
+        "They finally learned to share the blanket.\n"
+        "Hazel on the left\n"
+        "Clover on the right"
+    )
+    assert result.posts[2].num_likes == 12345
+    assert result.posts[2].num_comments == 0
+    assert [media.id for media in result.medias] == [
+        "t3_1kabc01_0",
+        "t3_1kabc01_1",
+        "t3_1kabc02_0",
+    ]
+
+
+def test_linkedin_parse_page(backend, source):
+    result = LinkedinExtractor()._parse_page(
+        _page("linkedin_recent_activity.html"), source
+    )
+
+    assert result.author.name == "Etni Khalili"
+    assert str(result.author.url) == "https://www.linkedin.com/in/etnikhalili/"
+    assert result.author.headline == "Data Engineer | Building pipelines at scale"
+    assert [(post.num_likes, post.num_comments) for post in result.posts] == [
+        (1200, 87),
+        (342, 0),
+        (2000000, 15),
+    ]
+    assert result.posts[0].text == (
+        "Shipped our new ingestion pipeline today.\nThroughput is up 4x."
+    )
+    assert len(result.medias) == 2
+
+
+@pytest.mark.parametrize(
+    "extractor_class, page",
+    [
+        (RedditExtractor, "reddit_submitted.html"),
+        (LinkedinExtractor, "linkedin_recent_activity.html"),
+    ],
+)
+def test_parse_raw_matches_the_page_parse(backend, source, extractor_class, page):
+    extractor = extractor_class()
+    html = _page(page)
+    fragments = [str(item) for item in extractor._select_items(parsing.make_soup(html))]
+
+    items = list(
+        extractor.parse_raw(RawBatch(author_page=html, items=fragments), source)
+    )
+    expected = extractor._parse_page(html, source)
+
+    assert isinstance(items[0], Author)
+    assert items[0] == expected.author
+    # LinkedIn dates are relative to the parse time, compare on the rest.
+    assert [post.model_dump(exclude={"timestamp"}) for post in items[1].posts] == [
+        post.model_dump(exclude={"timestamp"}) for post in expected.posts
+    ]
+    assert items[1].medias == expected.medias
+
+
+def test_linkedin_post_ids_follow_activity_urn(source):
+    extractor = LinkedinExtractor()
+    page = _page("linkedin_recent_activity.html")
+
+    first = extractor._parse_page(page, source)
+    second = extractor._parse_page(page, source)
+
+    assert [post.id for post in first.posts] == [
+        "7325598765432109876",
+        "7321234567890123456",
+        "7300000000000000001",
+    ]
+    assert [post.id for post in second.posts] == [post.id for post in first.posts]
+    assert [(media.id, media.post_id) for media in first.medias] == [
+        ("7325598765432109876-0", "7325598765432109876"),
+        ("7300000000000000001-0", "7300000000000000001"),
+    ]
+
+
+def test_linkedin_post_id_without_urn_is_stable(source):
+    extractor = LinkedinExtractor()
+
+    first = extractor._post_id(None, "author", "Some text", ["https://img/1.jpg"])
+    second = extractor._post_id(None, "author", "Some text", ["https://img/1.jpg"])
+    other = extractor._post_id(None, "author", "Other text", ["https://img/1.jpg"])
+
+    assert first == second
+    assert first != other
@@ -0,0 +1,75 @@
+import pstats
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from celery_tasks import profiling, tasks
+from celery_tasks.base_task import StorageTask
+from config.config import settings
+from models.data_models import Post
+from storage.local_storage import LocalStorageHandler
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    storage = LocalStorageHandler({"root": str(tmp_path)})
+    monkeypatch.setattr(StorageTask, "_storage", storage)
+    monkeypatch.setitem(settings.CHANGE_INDEX, "enabled", False)
+    monkeypatch.setattr(settings, "ENGAGEMENT_ENABLED", False)
+    return storage
+
+
+def _posts():
+    post = Post(id="p1", author_id="a1", timestamp=datetime(2024, 1, 1))
+    return [post.model_dump(mode="json")]
+
+
+def test_profile_header_writes_loadable_artifacts(storage):
+    result = tasks.store_metadata.apply(
+        args=(None, _posts()), headers={profiling.PROFILE_HEADER: True}
+    )
+
+    paths = storage.list_paths("profiles/")
+    assert sorted(path.rsplit(".", 1)[-1] for path in paths) == [
+        "prof",
+        "tracemalloc",
+        "txt",
+    ]
+    assert all(path.startswith(f"profiles/{result.id}.") for path in paths)
+
+    stats = pstats.Stats(storage._full_path(f"profiles/{result.id}.prof"))
+    assert any(function == "store_metadata" for _, _, function in stats.stats)
+    snapshot = tracemalloc.Snapshot.load(
+        storage._full_path(f"profiles/{result.id}.tracemalloc")
+    )
+    assert snapshot.traces
+    summary = storage.get_bytes(f"profiles/{result.id}.txt").decode()
+    assert summary.startswith("storage:store_metadata: ")
+    assert not tracemalloc.is_tracing()
+
+
+def test_runs_are_not_profiled_by_default(storage):
+    tasks.store_metadata.apply(args=(None, _posts()))
+
+    assert storage.list_paths("profiles/") == []
+
+
+@pytest.mark.parametrize(
+    "enabled, rate, header, expected",
+    [
+        (False, 1.0, None, False),
+        (True, 1.0, None, True),
+        (True, 0.0, None, False),
+        (False, 0.0, "true", True),
+        (True, 1.0, "false", False),
+    ],
+)
+def test_sampling(monkeypatch, enabled, rate, header, expected):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", enabled)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", rate)
+    headers = {} if header is None else {profiling.PROFILE_HEADER: header}
+    task = SimpleNamespace(request=SimpleNamespace(headers=headers))
+
+    assert profiling.should_profile(task) is expected
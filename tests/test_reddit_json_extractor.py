@@ -0,0 +1,312 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from config.config import settings
+from extractors.base_extractor import SliceCursorError
+from extractors.reddit_json_extractor import RedditJsonExtractor
+from models.data_models import Author, ExtractionBatch, Post, Source
+
+NOW = datetime.now(tz=timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _epoch(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _post(index: int, age: timedelta, **extra) -> dict:
+    data = {
+        "name": f"t3_post{index}",
+        "title": f"Post {index}",
+        "selftext": f"Body {index}",
+        "created_utc": _epoch(NOW - age),
+        "score": index * 10,
+        "num_comments": index,
+        "permalink": f"/r/test/comments/post{index}/post_{index}/",
+        "url": f"https://www.reddit.com/r/test/comments/post{index}/",
+    }
+    data.update(extra)
+    return {"kind": "t3", "data": data}
+
+
+ABOUT = {
+    "kind": "t2",
+    "data": {
+        "id": "abc123",
+        "name": "stub_user",
+        "created_utc": _epoch(datetime(2020, 1, 1)),
+        "link_karma": 1234,
+        "comment_karma": 56,
+    },
+}
+
+PAGES = {
+    None: {
+        "after": "t3_post2",
+        "children": [
+            _post(1, timedelta(days=1), url="https://i.redd.it/one.jpg"),
+            _post(2, timedelta(days=2)),
+        ],
+    },
+    "t3_post2": {
+        "after": "t3_post4",
+        "children": [
+            _post(
+                3,
+                timedelta(days=3),
+                gallery_data={"items": [{"media_id": "m1"}, {"media_id": "m2"}]},
+                media_metadata={
+                    "m1": {"s": {"u": "https://preview.redd.it/m1.png?width=10"}},
+                    "m2": {"s": {"u": "https://preview.redd.it/m2.gif"}},
+                },
+            ),
+            _post(4, timedelta(days=30)),
+        ],
+    },
+    "t3_post4": {"after": None, "children": [_post(5, timedelta(days=40))]},
+    "t3_post5": {"after": None, "children": []},
+}
+
+
+class StubRedditHandler(BaseHTTPRequestHandler):
+    requests_seen: list = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        self.requests_seen.append((parsed.path, query))
+
+        if parsed.path == "/user/stub_user/about.json":
+            body = ABOUT
+        elif parsed.path == "/user/stub_user/submitted.json":
+            page = dict(PAGES[query.get("after", [None])[0]])
+            limit = int(query["limit"][0])
+            page["children"] = page["children"][:limit]
+            body = {"kind": "Listing", "data": page}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    StubRedditHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRedditHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        settings, "REDDIT_API_URL", f"http://127.0.0.1:{server.server_port}"
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+FALLBACK_AUTHOR = Author(id="t2_abc123", name="stub_user")
+
+
+@pytest.fixture
+def fallback():
+    extractor = MagicMock()
+    extractor.extract_iter.side_effect = lambda source: iter(
+        [
+            FALLBACK_AUTHOR,
+            ExtractionBatch(
+                posts=[
+                    Post(id="t3_post1", author_id="t2_abc123"),
+                    Post(id="t3_browser", author_id="t2_abc123"),
+                ],
+                medias=[],
+            ),
+        ]
+    )
+    return extractor
+
+
+def _source(days=21, limit=100, author="stub_user"):
+    return Source(
+        author=author,
+        date_start=NOW - timedelta(days=days),
+        source_type="reddit",
+        limit=limit,
+    )
+
+
+def test_extract_follows_cursors_until_date_start(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+
+    result = extractor.extract(_source(days=21))
+
+    assert [post.id for post in result.posts] == ["t3_post1", "t3_post2", "t3_post3"]
+    assert result.author.id == "t2_abc123"
+    assert result.author.name == "stub_user"
+    assert result.author.publication_score == 1234
+    assert result.author.comment_score == 56
+    assert result.author.joined_date == datetime(2020, 1, 1)
+    assert all(post.author_id == "t2_abc123" for post in result.posts)
+    assert str(result.posts[0].url) == (
+        "https://reddit.com/r/test/comments/post1/post_1/"
+    )
+    # The third listing page is never requested once date_start is crossed.
+    afters = [
+        query.get("after", [None])[0]
+        for path, query in StubRedditHandler.requests_seen
+        if path.endswith("submitted.json")
+    ]
+    assert afters == [None, "t3_post2"]
+    fallback.extract_iter.assert_not_called()
+
+
+def test_extract_maps_media(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+
+    result = extractor.extract(_source(days=21))
+
+    assert [(media.id, media.post_id) for media in result.medias] == [
+        ("t3_post1_0", "t3_post1"),
+        ("t3_post3_0", "t3_post3"),
+        ("t3_post3_1", "t3_post3"),
+    ]
+    assert str(result.medias[0].original_url) == "https://i.redd.it/one.jpg"
+
+
+def test_extract_stops_at_limit(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+
+    result = extractor.extract(_source(days=365, limit=3))
+
+    assert [post.id for post in result.posts] == ["t3_post1", "t3_post2", "t3_post3"]
+    limits = [
+        query["limit"][0]
+        for path, query in StubRedditHandler.requests_seen
+        if path.endswith("submitted.json")
+    ]
+    assert limits == ["3", "1"]
+
+
+def test_extract_iter_yields_author_then_one_batch_per_page(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+
+    items = list(extractor.extract_iter(_source(days=21)))
+
+    assert items[0].id == "t2_abc123"
+    assert [[post.id for post in batch.posts] for batch in items[1:]] == [
+        ["t3_post1", "t3_post2"],
+        ["t3_post3"],
+    ]
+
+
+def test_extract_falls_back_on_http_error(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    source = _source(author="unknown_user")
+
+    result = extractor.extract(source)
+
+    fallback.extract_iter.assert_called_once_with(source)
+    assert result.author == FALLBACK_AUTHOR
+    assert [post.id for post in result.posts] == ["t3_post1", "t3_browser"]
+
+
+def test_extract_falls_back_mid_listing_without_duplicates(
+    stub_server, fallback, monkeypatch
+):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    get_json = extractor._get_json
+
+    def flaky_get_json(path, params=None):
+        if params and params.get("after"):
+            raise requests.ConnectionError("listing unavailable")
+        return get_json(path, params=params)
+
+    monkeypatch.setattr(extractor, "_get_json", flaky_get_json)
+
+    items = list(extractor.extract_iter(_source(days=21)))
+
+    assert sum(isinstance(item, Author) for item in items) == 1
+    assert [[post.id for post in batch.posts] for batch in items[1:]] == [
+        ["t3_post1", "t3_post2"],
+        ["t3_browser"],
+    ]
+
+
+def test_extract_slice_starts_at_cursor_and_skips_newer_posts(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    source = _source(days=35)
+    source.cursor = "t3_post2"
+    source.date_end = NOW - timedelta(days=2, hours=12)
+
+    result = extractor.extract(source)
+
+    assert [post.id for post in result.posts] == ["t3_post3", "t3_post4"]
+    afters = [
+        query.get("after", [None])[0]
+        for path, query in StubRedditHandler.requests_seen
+        if path.endswith("submitted.json")
+    ]
+    assert afters[0] == "t3_post2"
+
+
+def test_extract_skips_posts_after_date_end(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    source = _source(days=21, limit=2)
+    source.date_end = NOW - timedelta(days=1, hours=12)
+
+    result = extractor.extract(source)
+
+    # Skipped posts don't count against the limit.
+    assert [post.id for post in result.posts] == ["t3_post2", "t3_post3"]
+
+
+def test_post_on_date_end_belongs_to_the_newer_slice(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    source = _source(days=21)
+    source.date_end = NOW - timedelta(days=2)
+
+    result = extractor.extract(source)
+
+    assert [post.id for post in result.posts] == ["t3_post3"]
+
+
+def test_empty_listing_at_the_cursor_raises(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    source = _source(days=50)
+    source.cursor = "t3_post5"
+    source.date_end = NOW - timedelta(days=41)
+
+    with pytest.raises(SliceCursorError):
+        extractor.extract(source)
+    fallback.extract_iter.assert_not_called()
+
+    # Before the author joined an empty listing is expected.
+    source.date_start = datetime(2019, 1, 1)
+    source.date_end = datetime(2019, 6, 1)
+    assert extractor.extract(source).posts == []
+
+
+def test_listing_reach_is_the_oldest_post_of_a_full_listing(stub_server, fallback):
+    extractor = RedditJsonExtractor(fallback=fallback)
+    extractor.page_size = 2
+    extractor.listing_limit = 5
+
+    assert extractor.listing_reach("stub_user") == NOW - timedelta(days=40)
+
+    # A listing ending before the limit holds every post.
+    extractor.listing_limit = 6
+    assert extractor.listing_reach("stub_user") is None
@@ -0,0 +1,105 @@
+import json
+from datetime import datetime
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from benchmarks.replay_benchmark import build_recording
+from config.config import settings
+from extractors.linkedin_extractor import LinkedinExtractor
+from extractors.reddit_extractor import RedditExtractor
+from models.data_models import Author, Source
+from scrapers.replay_driver import ReplayDriver
+from scrapers.selenium_scraper import (
+    COLLECT_ITEMS_SCRIPT,
+    SCROLL_HEIGHT_SCRIPT,
+    SCROLL_TO_BOTTOM_SCRIPT,
+)
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    build_recording(tmp_path, num_posts=3, per_scroll=1)
+    monkeypatch.setattr(settings, "SELENIUM_DRIVER", "replay")
+    monkeypatch.setattr(settings, "SELENIUM_REPLAY_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "SELENIUM_SCROLL_PAUSE", 0)
+    monkeypatch.setattr(settings, "SELENIUM_SCROLL_TIMEOUT", 0)
+    monkeypatch.setattr(settings, "SELENIUM_SETTLE_PAUSE", 0)
+    return tmp_path
+
+
+def _source(author="etnikhalili"):
+    return Source(
+        author=author,
+        date_start=datetime(2000, 1, 1),
+        source_type="test",
+        limit=100,
+    )
+
+
+@pytest.mark.parametrize(
+    "extractor_class, page",
+    [(RedditExtractor, "reddit"), (LinkedinExtractor, "linkedin")],
+)
+def test_extractors_run_end_to_end_offline(recording, extractor_class, page):
+    extractor = extractor_class()
+    html = (recording / f"{page}.html").read_text(encoding="utf-8")
+    expected = extractor._parse_page(html, _source())
+
+    items = list(extractor.extract_iter(_source()))
+
+    assert isinstance(items[0], Author)
+    assert items[0] == expected.author
+    # One post is revealed per scroll, so every post arrives in its own batch.
+    assert [len(batch.posts) for batch in items[1:]] == [1, 1, 1]
+    # LinkedIn ids and relative dates are not stable, compare on the rest.
+    fields = {"url", "text", "title", "num_likes", "num_comments", "author_id"}
+    posts = [post for batch in items[1:] for post in batch.posts]
+    assert [post.model_dump(include=fields) for post in posts] == [
+        post.model_dump(include=fields) for post in expected.posts
+    ]
+
+
+def test_fetch_many_iter_replays_one_tab_per_author(recording):
+    extractor = RedditExtractor()
+
+    pairs = list(extractor.fetch_many_iter([_source("first"), _source("second")]))
+
+    for author in ("first", "second"):
+        batches = [raw for source, raw in pairs if source.author == author]
+        assert batches[0].author_page is not None
+        assert sum(len(raw.items) for raw in batches) == 3
+
+
+def test_snapshots_are_served_in_turn(tmp_path):
+    (tmp_path / "0.html").write_text("<ul><li>one</li></ul>")
+    (tmp_path / "1.html").write_text("<ul><li>one</li><li>two</li></ul>")
+    (tmp_path / "manifest.json").write_text(
+        json.dumps({"pages": {"https://feed/": {"snapshots": ["0.html", "1.html"]}}})
+    )
+    driver = ReplayDriver(tmp_path)
+    driver.get("https://feed/")
+
+    first = driver.execute_script(COLLECT_ITEMS_SCRIPT, "li")
+    height = driver.execute_script(SCROLL_HEIGHT_SCRIPT)
+    driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+    second = driver.execute_script(COLLECT_ITEMS_SCRIPT, "li")
+    driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+
+    assert first == ["<li>one</li>"]
+    assert second == ["<li>two</li>"]
+    assert driver.execute_script(SCROLL_HEIGHT_SCRIPT) > height
+    assert driver.execute_script(COLLECT_ITEMS_SCRIPT, "li") == []
+
+
+def test_find_element_and_unknown_pages(recording):
+    driver = ReplayDriver(recording)
+    driver.get("https://www.linkedin.com/login")
+
+    assert driver.find_element(By.ID, "username").tag_name == "input"
+    assert driver.find_element(By.XPATH, ".//input[@id='password']")
+    with pytest.raises(NoSuchElementException):
+        driver.find_element(By.ID, "missing")
+    with pytest.raises(WebDriverException):
+        driver.get("https://example.com/")
@@ -0,0 +1,195 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import tasks
+from celery_tasks.base_task import ExtractTask
+from config.config import settings
+from extractors.reddit_extractor import RedditExtractor
+from models.data_models import Author, ExtractionBatch, Post, Source
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def reddit_page():
+    return (FIXTURES_DIR / "reddit_submitted.html").read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def source():
+    return Source(
+        author="CozyBvnnies",
+        date_start=datetime(2000, 1, 1),
+        source_type="reddit",
+        limit=100,
+    )
+
+
+@pytest.fixture
+def streaming_extractor(reddit_page):
+    """RedditExtractor whose browser hands out one fixture post per scroll."""
+    extractor = RedditExtractor()
+    fragments = re.findall(r"<shreddit-post .*?</shreddit-post>", reddit_page, re.S)
+    driver = MagicMock(page_source=reddit_page)
+
+    @contextmanager
+    def create_driver():
+        yield driver
+
+    extractor.scraper = MagicMock()
+    extractor.scraper.create_driver = create_driver
+    extractor.scraper.iter_scroll.side_effect = lambda d: iter(fragments)
+    extractor.scraper.collect_items.side_effect = [[f] for f in fragments]
+    return extractor
+
+
+def test_extract_iter_yields_author_then_batches(streaming_extractor, source):
+    items = list(streaming_extractor.extract_iter(source))
+
+    assert isinstance(items[0], Author)
+    assert items[0].id == "t2_8x9yz"
+    assert [[post.id for post in batch.posts] for batch in items[1:]] == [
+        ["t3_1kabc01"],
+        ["t3_1kabc02"],
+        ["t3_1kabc03"],
+    ]
+    assert [len(batch.medias) for batch in items[1:]] == [2, 1, 0]
+
+
+def test_extract_iter_stops_scrolling_at_limit(streaming_extractor, source):
+    source.limit = 2
+
+    items = list(streaming_extractor.extract_iter(source))
+
+    assert [post.id for batch in items[1:] for post in batch.posts] == [
+        "t3_1kabc01",
+        "t3_1kabc02",
+    ]
+    assert streaming_extractor.scraper.collect_items.call_count == 2
+
+
+def test_extract_collects_stream(streaming_extractor, source):
+    result = streaming_extractor.extract(source)
+
+    assert result.author.id == "t2_8x9yz"
+    assert len(result.posts) == 3
+    assert len(result.medias) == 3
+
+
+@pytest.mark.parametrize(
+    "limit,days,deep_crawl,expected",
+    [
+        (100, 21, None, False),
+        (1000, 21, None, True),
+        (100, 180, None, True),
+        (1000, 180, False, False),
+        (10, 1, True, True),
+    ],
+)
+def test_deep_crawl_prunes_collected_items(
+    streaming_extractor, limit, days, deep_crawl, expected
+):
+    source = Source(
+        author="CozyBvnnies",
+        date_start=datetime.now() - timedelta(days=days),
+        source_type="reddit",
+        limit=limit,
+        deep_crawl=deep_crawl,
+    )
+
+    list(streaming_extractor.fetch_iter(source))
+
+    for call in streaming_extractor.scraper.collect_items.call_args_list:
+        assert call.kwargs["prune"] is expected
+
+
+def test_crawl_author_dispatches_each_batch():
+    author = Author(id="t2_author", name="author")
+    extractor = MagicMock(supports_raw_fetch=False)
+    extractor.extract_iter.return_value = iter(
+        [
+            author,
+            ExtractionBatch(posts=[Post(id="p1", author_id="t2_author")], medias=[]),
+            ExtractionBatch(posts=[], medias=[]),
+            ExtractionBatch(posts=[Post(id="p2", author_id="t2_author")], medias=[]),
+        ]
+    )
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=extractor
+    ), patch.object(tasks.process_crawled_data, "delay") as delay:
+        result = tasks.crawl_author("author", datetime(2000, 1, 1), "reddit")
+
+    assert result == "t2_author"
+    assert delay.call_count == 2
+    first_author, first_posts, _ = delay.call_args_list[0].args
+    second_author, second_posts, _ = delay.call_args_list[1].args
+    assert first_author["id"] == "t2_author"
+    assert [post["id"] for post in first_posts] == ["p1"]
+    assert second_author is None
+    assert [post["id"] for post in second_posts] == ["p2"]
+
+
+def test_crawl_author_limit_can_start_a_deep_crawl(streaming_extractor):
+    limit = settings.DEEP_CRAWL_MIN_POSTS
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=streaming_extractor
+    ), patch.object(tasks.parse_raw_batch, "delay") as delay:
+        tasks.crawl_author("CozyBvnnies", datetime.now(), "reddit", limit)
+
+    _, source_data = delay.call_args_list[0].args
+    assert source_data["limit"] == limit
+    assert streaming_extractor._is_deep_crawl(Source(**source_data))
+
+
+def test_fetch_iter_sends_author_page_with_first_batch(streaming_extractor, source):
+    raw_batches = list(streaming_extractor.fetch_iter(source))
+
+    assert raw_batches[0].author_page is not None
+    assert all(batch.author_page is None for batch in raw_batches[1:])
+    assert [len(batch.items) for batch in raw_batches] == [1, 1, 1]
+
+
+def test_crawl_author_offloads_parsing(streaming_extractor):
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=streaming_extractor
+    ), patch.object(tasks.parse_raw_batch, "delay") as delay:
+        result = tasks.crawl_author("CozyBvnnies", datetime(2000, 1, 1), "reddit")
+
+    # The author id is only known once the batches are parsed.
+    assert result is None
+    assert delay.call_count == 3
+    raw_data, source_data = delay.call_args_list[0].args
+    assert raw_data["author_page"].startswith("<!DOCTYPE html>")
+    assert source_data["author"] == "CozyBvnnies"
+    assert source_data["source_type"] == "reddit"
+
+
+def test_parse_raw_batch_queues_parsed_data(streaming_extractor, source, reddit_page):
+    fragment = re.search(r"<shreddit-post .*?</shreddit-post>", reddit_page, re.S)
+    raw_data = {"author_page": reddit_page, "items": [fragment.group(0)]}
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=RedditExtractor()
+    ), patch.object(tasks.process_crawled_data, "delay") as delay:
+        tasks.parse_raw_batch(raw_data, source.model_dump(mode="json"))
+
+    author_data, posts_data, medias_data = delay.call_args.args
+    assert author_data["id"] == "t2_8x9yz"
+    assert [post["id"] for post in posts_data] == ["t3_1kabc01"]
+    assert posts_data[0]["author_id"] == "t2_8x9yz"
+    assert len(medias_data) == 2
+
+
+def test_store_metadata_skips_missing_author():
+    storage = MagicMock()
+    with patch.object(tasks.store_metadata.__class__, "storage", new=storage):
+        tasks.store_metadata(None, [{"id": "p1", "author_id": "t2_author"}])
+
+    storage.store_author.assert_not_called()
+    storage.store_post.assert_called_once()
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+import redis
+
+from celery_tasks import signals, tasks
+from config.config import settings
+from telemetry import task_stats
+from telemetry.task_stats import KEY_PREFIX, TaskStats
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name, args))
+
+        return call
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.lists = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field] = int(self.hashes[key].get(field, 0)) + amount
+        return self.hashes[key][field]
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def hgetall(self, key):
+        return {field: str(value) for field, value in self.hashes.get(key, {}).items()}
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+
+@pytest.fixture
+def stats():
+    with patch("telemetry.task_stats.redis.Redis.from_url", return_value=FakeRedis()):
+        yield TaskStats("redis://localhost")
+
+
+def test_throughput_counts_the_last_full_minutes(stats):
+    now = 1_000_000 * 60
+    for minute in (1, 2, 2, 5):
+        stats.record("crawling", "reddit", "SUCCESS", now=now - minute * 60)
+    stats.record("crawling", "reddit", "FAILURE", now=now - 60)
+    stats.record("storage", "", "SUCCESS", now=now - 60)
+    # The minute in progress is left out.
+    stats.record("storage", "", "SUCCESS", now=now)
+
+    throughput = stats.throughput(minutes=5, now=now)
+
+    assert throughput == {
+        ("crawling", "reddit"): {"SUCCESS": 4 / 5, "FAILURE": 1 / 5},
+        ("storage", ""): {"SUCCESS": 1 / 5},
+    }
+    assert stats.client.ttls[f"{KEY_PREFIX}{now // 60 - 1}"] == 3600
+
+
+def test_queue_depths_in_one_round_trip(stats):
+    stats.client.lists = {"crawling": ["m1", "m2"], "media": ["m3"]}
+
+    depths = stats.queue_depths(["crawling", "storage", "media"])
+
+    assert depths == {"crawling": 2, "storage": 0, "media": 1}
+    assert stats.client.round_trips == 1
+
+
+@pytest.fixture
+def enabled(monkeypatch, stats):
+    monkeypatch.setitem(settings.TASK_STATS, "enabled", True)
+    monkeypatch.setattr(task_stats, "_stats", stats)
+    return stats
+
+
+def _postrun(task, args, kwargs, is_eager=False, state="SUCCESS"):
+    task.push_request(args=args, kwargs=kwargs, is_eager=is_eager)
+    try:
+        signals.count_finished_task(task=task, state=state)
+    finally:
+        task.pop_request()
+
+
+def test_finished_tasks_are_counted_per_queue_and_source(enabled):
+    _postrun(tasks.crawl_author, ("author", "2024-01-01", "reddit"), {})
+    _postrun(tasks.store_metadata, (None, []), {}, state="RETRY")
+
+    fields = {field for counts in enabled.client.hashes.values() for field in counts}
+    assert fields == {"crawling|reddit|SUCCESS", "storage||RETRY"}
+
+
+def test_eager_tasks_are_not_counted(enabled):
+    _postrun(tasks.crawl_author, ("author", "2024-01-01", "reddit"), {}, True)
+
+    assert enabled.client.hashes == {}
+
+
+def test_redis_errors_do_not_fail_the_task(enabled, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(enabled, "record", unavailable)
+
+    _postrun(tasks.crawl_author, ("author", "2024-01-01", "reddit"), {})
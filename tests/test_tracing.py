@@ -0,0 +1,144 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from celery_tasks import signals, tasks
+from celery_tasks.base_task import ExtractTask
+from models.data_models import Author, ExtractionBatch, Post
+from telemetry import metrics, tracing, waterfall
+
+
+class MemorySpanExporter(tracing.BaseSpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def spans():
+    exporter = MemorySpanExporter()
+    tracing.set_enabled(True)
+    tracing.set_exporter(exporter)
+    yield exporter.spans
+    tracing.set_enabled(False)
+    tracing.set_exporter(None)
+
+
+def test_spans_are_noops_outside_a_trace(spans):
+    with tracing.span("parse"), metrics.stage("upload"):
+        pass
+
+    assert spans == []
+    tracing.set_enabled(False)
+    assert tracing.start_trace("submit") is tracing.span("parse")
+
+
+def test_trace_headers_reach_the_tasks_a_trace_queues(spans):
+    with tracing.start_trace("submit", author="author") as trace:
+        headers = {}
+        signals.propagate_trace(headers=headers)
+
+    assert headers == {
+        tracing.TRACE_HEADER: trace.trace_id,
+        tracing.PARENT_HEADER: trace.span_id,
+    }
+    assert [span["name"] for span in spans] == ["submit"]
+    assert spans[0]["parent_id"] is None
+
+
+def test_task_and_stages_continue_the_trace(spans):
+    author = Author(id="t2_author", name="author")
+    extractor = MagicMock(supports_raw_fetch=False, uses_browser=False)
+    extractor.extract_iter.return_value = iter(
+        [
+            author,
+            ExtractionBatch(posts=[Post(id="p1", author_id="t2_author")], medias=[]),
+        ]
+    )
+    queued_headers = []
+
+    def delay(*args):
+        headers = {}
+        signals.propagate_trace(headers=headers)
+        queued_headers.append(headers)
+
+    with patch.object(
+        ExtractTask, "get_extractor", return_value=extractor
+    ), patch.object(tasks.process_crawled_data, "delay", side_effect=delay):
+        tasks.crawl_author.apply(
+            args=("author", datetime(2000, 1, 1), "reddit"),
+            headers={
+                tracing.TRACE_HEADER: "a" * 32,
+                tracing.PARENT_HEADER: "b" * 16,
+            },
+        )
+
+    by_name = {span["name"]: span for span in spans}
+    task_span = by_name["task:crawling:crawl_author"]
+    assert {span["trace_id"] for span in spans} == {"a" * 32}
+    assert task_span["parent_id"] == "b" * 16
+    assert task_span["attributes"]["state"] == "SUCCESS"
+    assert by_name["format"]["parent_id"] == task_span["span_id"]
+    # Children are queued with the trace and the span of the queuing task.
+    assert queued_headers == [
+        {tracing.TRACE_HEADER: "a" * 32, tracing.PARENT_HEADER: task_span["span_id"]}
+    ]
+    assert tracing.current_trace_id() is None
+
+
+def test_jsonl_spans_render_as_a_waterfall(tmp_path, spans):
+    path = tmp_path / "spans.jsonl"
+    exporter = tracing.JsonlSpanExporter({"path": str(path)})
+    tracing.set_exporter(exporter)
+
+    with tracing.start_trace("submit", author="author"):
+        with tracing.span("task:crawling:crawl_author"):
+            with metrics.stage("scroll", "linkedin"):
+                pass
+        with pytest.raises(ValueError), tracing.span("task:storage:store_metadata"):
+            raise ValueError("boom")
+
+    traces = waterfall.load_traces(str(path))
+    assert len(traces) == 1
+    (trace_spans,) = traces.values()
+    lines = waterfall.render(trace_spans, width=20)
+
+    names = [line.split("  ")[-1] for line in lines[1:-1]]
+    assert [name.strip() for name in names] == [
+        "submit",
+        "task:crawling:crawl_author",
+        "scroll [linkedin]",
+        "task:storage:store_metadata !",
+    ]
+    assert lines[3].endswith("    scroll [linkedin]")
+    assert lines[-1].startswith("4 spans")
+
+
+def test_otlp_payload_follows_the_json_encoding():
+    exporter = tracing.OtlpHttpSpanExporter({"url": "http://collector/v1/traces"})
+    span = {
+        "trace_id": "a" * 32,
+        "span_id": "b" * 16,
+        "parent_id": "c" * 16,
+        "name": "parse",
+        "start": 1.5,
+        "duration": 0.25,
+        "status": "error",
+        "attributes": {"source": "reddit"},
+    }
+
+    payload = exporter.payload([span])
+
+    (otlp_span,) = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert otlp_span["startTimeUnixNano"] == "1500000000"
+    assert otlp_span["endTimeUnixNano"] == "1750000000"
+    assert otlp_span["parentSpanId"] == "c" * 16
+    assert otlp_span["status"] == {"code": 2}
+    assert otlp_span["attributes"] == [
+        {"key": "source", "value": {"stringValue": "reddit"}}
+    ]
+    json.dumps(payload)
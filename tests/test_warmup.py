@@ -0,0 +1,54 @@
+import pytest
+
+from celery_app import app
+from celery_tasks import tasks, warmup
+from celery_tasks.base_task import ExtractTask, StorageTask
+from config.config import settings
+from storage.local_storage import LocalStorageHandler
+
+
+@pytest.fixture(autouse=True)
+def cold_process(monkeypatch, tmp_path):
+    monkeypatch.setattr(warmup, "_warmed_up", False)
+    monkeypatch.setattr(ExtractTask, "_extractors", {})
+    monkeypatch.setattr(StorageTask, "_storage", None)
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "local")
+    monkeypatch.setitem(settings.STORAGE["local"]["config"], "root", str(tmp_path))
+
+
+def test_storage_worker_builds_storage_only():
+    timings = warmup.warm_up(app, {"storage"})
+
+    assert set(timings) == {"validators", "storage"}
+    assert isinstance(StorageTask._storage, LocalStorageHandler)
+    assert ExtractTask._extractors == {}
+
+
+def test_crawling_worker_builds_enabled_extractors(monkeypatch):
+    monkeypatch.setitem(settings.EXTRACTORS["linkedin"], "enabled", False)
+
+    timings = warmup.warm_up(app, {"crawling"})
+
+    assert set(timings) == {"validators", "extractors", "parser"}
+    assert list(ExtractTask._extractors) == ["reddit"]
+    assert StorageTask._storage is None
+
+
+def test_storage_tasks_share_the_warmed_up_storage():
+    warmup.warm_up(app)
+
+    assert tasks.store_metadata.storage is tasks.process_media.storage
+
+
+def test_warm_up_runs_once_per_process():
+    assert warmup.warm_up(app)
+    assert warmup.warm_up(app) == {}
+
+
+def test_failed_step_is_left_for_the_first_task(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "unknown")
+
+    timings = warmup.warm_up(app, {"storage"})
+
+    assert "storage" not in timings
+    assert StorageTask._storage is None